@@ -9,6 +9,7 @@ load_dotenv()
 
 from smart_city_agent.mcp_server.db import (
     get_conn,
+    pool_metrics,
     EMERGENCY_DB,
     POWER_DB,
     SANITATION_DB,
@@ -74,6 +75,7 @@ def update_ticket_status(agent_name, ticket_number, new_status):
                     (new_status, ticket_number)
                 )
                 conn.commit()
+        # Status reads are not cached by the chat app, so citizens see this change immediately
         return True
     except Exception as e:
         st.error(f"Update failed: {e}")
@@ -201,3 +203,11 @@ else:
     else:
         st.info(f"No tickets found for {selected_agent}.")
 
+# --- Connection Pool Health ---
+# Pools live in the db module, so they survive Streamlit reruns
+with st.sidebar.expander("Database Pools"):
+    metrics = pool_metrics()
+    if metrics:
+        st.dataframe(pd.DataFrame(metrics), hide_index=True, use_container_width=True)
+    else:
+        st.caption("No connections opened yet.")
@@ -17,10 +17,10 @@ load_dotenv()
 # --- ADK Component Loading ---
 # --- ADK Component Loading ---
 try:
-    from smart_city_agent.local_runner import AdkApp
+    from smart_city_agent.local_runner import get_shared_app
     from smart_city_agent.agent import customer_service_agent
     from smart_city_agent.session_manager import get_session_service
-    from smart_city_agent.message_processor import process_message_with_agent
+    from smart_city_agent.message_processor import process_message_with_agent, stream_message_with_agent
     ADK_AVAILABLE = True
 except ImportError as e:
     ADK_AVAILABLE = False
@@ -88,13 +88,17 @@ if 'user_id' not in st.session_state:
 if 'session_id' not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 
+@st.cache_resource(show_spinner=False)
+def load_shared_adk_app():
+    """One AdkApp (provider clients, tool pools, registry) shared by every browser session."""
+    return get_shared_app(customer_service_agent)
+
 # Initialize ADK AdkApp (simplified initialization)
 if 'adk_app' not in st.session_state:
     if ADK_AVAILABLE and st.session_state.api_key_valid:
         try:
-            # Simplified initialization - AdkApp handles session management internally
-            # when using Gemini API Key (GOOGLE_GENAI_USE_VERTEXAI=False)
-            st.session_state.adk_app = AdkApp(agent=customer_service_agent)
+            # Shared across sessions; conversations stay isolated by session_id
+            st.session_state.adk_app = load_shared_adk_app()
             st.session_state.adk_status = "✅ AdkApp Active"
             # Log success
             with open("status_log.txt", "w") as f:
@@ -118,6 +122,25 @@ if 'adk_app' not in st.session_state:
             with open("status_log.txt", "w") as f:
                 f.write("STATUS: KEY_ERROR\nAPI Key missing")
 
+def chat_history() -> list:
+    """Messages to display: the session transcript plus failed turns (offline notices when the agent is unavailable)."""
+    if not st.session_state.adk_app:
+        return st.session_state.messages
+    messages = list(st.session_state.adk_app.chat_messages(st.session_state.session_id))
+    # Failed turns are not in the transcript (the model must not see the error as a reply); put them back where they happened
+    for inserted, message in enumerate(st.session_state.messages):
+        messages.insert(message["at"] + inserted, message)
+    return messages
+
+def transcript_length() -> int:
+    return len(st.session_state.adk_app.chat_messages(st.session_state.session_id))
+
+def keep_unrecorded_turn(prompt: str, response: str, before: int) -> None:
+    """A turn that failed (all providers down, an exception) is not recorded; keep it so a rerun still shows it."""
+    if transcript_length() == before:
+        st.session_state.messages.append({"role": "user", "content": prompt, "at": before})
+        st.session_state.messages.append({"role": "assistant", "content": response, "at": before})
+
 # Header
 st.markdown('<div class="main-header">🏙️ Addis-Sync</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">Urban Infrastructure Coordination Platform</div>', unsafe_allow_html=True)
@@ -169,35 +192,43 @@ col1, col2 = st.columns([3, 1.2])
 with col1:
     st.header("💬 Addis-Sync Chat")
     
-    # Display chat messages
-    for message in st.session_state.messages:
+    # Display chat messages (the agent's session transcript is the only copy)
+    for message in chat_history():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if message.get("tools"):
+                st.caption("🔧 " + ", ".join(message["tools"]))
     
     # Chat input (Fixed Bottom by default in Streamlit)
     if prompt := st.chat_input("Describe your issue (e.g., 'No power in Bole')..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
         
         with st.chat_message("assistant"):
-            with st.spinner("Processing with agents..."):
-                if st.session_state.adk_app:
-                    try:
-                        response = process_message_with_agent(
-                            runner=st.session_state.adk_app,
-                            user_id=st.session_state.user_id,
-                            session_id=st.session_state.session_id,
-                            prompt=prompt
+            if st.session_state.adk_app:
+                before = transcript_length()
+                try:
+                    # Stream text as it arrives; show tool progress above it
+                    tool_progress = st.empty()
+                    response = st.write_stream(stream_message_with_agent(
+                        runner=st.session_state.adk_app,
+                        user_id=st.session_state.user_id,
+                        session_id=st.session_state.session_id,
+                        prompt=prompt,
+                        on_tool_event=lambda event: tool_progress.caption(
+                            f"🔧 Running {event.name}..." if event.kind == "tool_call" else f"✅ {event.name} done"
                         )
-                        st.markdown(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                    except Exception as e:
-                        st.error(f"Agent Error: {str(e)}")
-                else:
-                    response = "⚠️ System not initialized. Check sidebar logs."
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    ))
+                    tool_progress.empty()
+                except Exception as e:
+                    response = f"Agent Error: {str(e)}"
+                    st.error(response)
+                keep_unrecorded_turn(prompt, response, before)
+            else:
+                response = "⚠️ System not initialized. Check sidebar logs."
+                st.markdown(response)
+                st.session_state.messages.append({"role": "user", "content": prompt})
+                st.session_state.messages.append({"role": "assistant", "content": response})
 
 with col2:
     # Right Sidebar Content
@@ -221,11 +252,9 @@ with col2:
     
     for q in queries:
         if st.button(q, key=f"btn_{q}", use_container_width=True):
-            # Add user message
-            st.session_state.messages.append({"role": "user", "content": q})
-            
-            # Process immediately
+            # Process immediately (the reply lands in the session transcript)
             if st.session_state.adk_app:
+                before = transcript_length()
                 try:
                     with st.spinner("Processing..."):
                         response = process_message_with_agent(
@@ -234,9 +263,11 @@ with col2:
                             session_id=st.session_state.session_id,
                             prompt=q
                         )
-                    st.session_state.messages.append({"role": "assistant", "content": response})
                 except Exception as e:
-                    st.error(f"Error: {e}")
+                    response = f"Error: {e}"
+                keep_unrecorded_turn(q, response, before)
+            else:
+                st.session_state.messages.append({"role": "user", "content": q})
             
             st.rerun()
 
@@ -244,7 +275,7 @@ with col2:
     st.markdown('<div class="right-sidebar-header">📊 Session Stats</div>', unsafe_allow_html=True)
     st.markdown(f"""
     <div class="stat-card">
-        <div style="font-size: 1.5rem; font-weight: bold; color: #1A73E8;">{len(st.session_state.messages)}</div>
+        <div style="font-size: 1.5rem; font-weight: bold; color: #1A73E8;">{len(chat_history())}</div>
         <div style="font-size: 0.8rem; color: #666;">Messages</div>
     </div>
     """, unsafe_allow_html=True)
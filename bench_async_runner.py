@@ -0,0 +1,100 @@
+"""
+Addis-Sync Runner Throughput Benchmark
+Compares AdkApp.run (blocking, one thread per conversation) against
+AdkApp.run_async (one event loop) using the scriptable fake provider.
+
+Usage:
+    python bench_async_runner.py --turns 200 --latency 0.2 --workers 8
+"""
+
+import io
+import time
+import asyncio
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+bench_server = MCPServer(name="bench_mcp_server")
+TOOL_LATENCY = 0.02
+
+
+@bench_server.tool()
+def bench_lookup_office(woreda_name: str) -> dict:
+    """Simulated office lookup (stands in for a psycopg2 round trip)."""
+    time.sleep(TOOL_LATENCY)
+    return {"name": f"{woreda_name} Power Office", "phone": "+251-11-0000000"}
+
+
+# Typical report turn: one tool round trip, then the final answer
+SCRIPT = [
+    [("bench_lookup_office", {"woreda_name": "Bole"})],
+    "Your report has been logged with the Bole Power Office.",
+]
+
+bench_agent = Agent(
+    name="bench_agent",
+    model="fake-model",
+    instruction="You are a benchmark agent.",
+    tools=[bench_lookup_office],
+)
+
+
+def make_app(latency: float) -> AdkApp:
+    app = AdkApp(agent=bench_agent)
+    app.gemini_client = FakeGeminiClient(script=SCRIPT, latency=latency)
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+    return app
+
+
+def bench_sync(app: AdkApp, turns: int, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(
+            lambda i: app.run(user_id="bench", session_id=f"sync-{i}", prompt="No power in Bole"),
+            range(turns)
+        ))
+    return time.perf_counter() - start
+
+
+async def bench_async(app: AdkApp, turns: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            return await app.run_async(user_id="bench", session_id=f"async-{i}", prompt="No power in Bole")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(turns)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AdkApp sync vs async throughput")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated LLM latency per round trip (s)")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for the sync path (Streamlit-like workers)")
+    parser.add_argument("--concurrency", type=int, default=500, help="In-flight turns for the async path")
+    args = parser.parse_args()
+
+    app = make_app(args.latency)
+
+    # Silence the runner's debug prints while timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_elapsed = bench_sync(app, args.turns, args.workers)
+        async_elapsed = asyncio.run(bench_async(app, args.turns, args.concurrency))
+
+    print("=" * 60)
+    print("ADDIS-SYNC RUNNER THROUGHPUT")
+    print("=" * 60)
+    print(f"Turns: {args.turns} | LLM latency: {args.latency}s x2 | Tool latency: {TOOL_LATENCY}s")
+    print(f"  sync  ({args.workers} threads):      {sync_elapsed:7.2f}s  {args.turns / sync_elapsed:8.1f} turns/s")
+    print(f"  async ({args.concurrency} in flight):  {async_elapsed:7.2f}s  {args.turns / async_elapsed:8.1f} turns/s")
+    print(f"  speedup: {sync_elapsed / async_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
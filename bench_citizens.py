@@ -0,0 +1,400 @@
+"""
+Addis-Sync Concurrent-Citizen Load Test
+Drives AdkApp with N virtual citizens, each playing scripted multi-turn
+scenarios across the five domains:
+
+    report     "No power in Bole"          -> office lookup, ask for a contact
+    follow_up  "My number is ..."          -> create_*_ticket, quote the ticket
+    status     "Status of POWR-XXXXXXXX?"  -> fast-path status check (no LLM)
+
+Tools run for real against the local Postgres databases (seed them from
+smart_city_agent/database2/*_db with --seed). The LLM is a stand-in (the
+fake provider) with configurable latency, so results measure the runner,
+tools and database rather than a remote model.
+
+Reports turns/sec, p50/p95/p99 latency per phase, error rates, DB pool
+saturation, ticket-writer batching and tool-cache hit rates, and writes
+everything as JSON for comparing runs.
+
+Usage:
+    python bench_citizens.py --seed
+    python bench_citizens.py --citizens 50 --rounds 2 --latency 0.3 --out run.json
+    python bench_citizens.py --citizens 500 --mode async --latency 0.3 --out run_async.json
+"""
+
+import io
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import psycopg2
+from psycopg2 import sql
+
+from smart_city_agent.local_runner import AdkApp
+from smart_city_agent.providers import Providers
+from smart_city_agent.fake_provider import FakeGeminiClient, FromToolResult
+from smart_city_agent.fast_path import TICKET_RE
+from smart_city_agent.tool_cache import cache_metrics
+from smart_city_agent.mcp_server.db import (
+    pool_metrics,
+    EMERGENCY_DB,
+    POWER_DB,
+    SANITATION_DB,
+    INFRASTRUCTURE_DB,
+    UTILITY_DB,
+)
+from smart_city_agent.mcp_server.ticket_writer import writer_metrics
+
+DATABASE_DIR = Path(__file__).resolve().parent / "smart_city_agent" / "database2"
+PHASES = ("report", "follow_up", "status")
+
+# Woredas seeded in every domain's data.sql
+WOREDAS = [
+    "Addis Ketema", "Arada", "Bole", "Gullele", "Kirkos",
+    "Kolfe Keranio", "Lideta", "Nifas Silk-Lafto", "Yeka", "Akaki Kality",
+]
+
+DOMAINS = {
+    "emergency": {
+        "db": EMERGENCY_DB,
+        "report": "There is a fire near the market in {woreda}",
+        "office_tool": "find_closest_emergency_office",
+        "create_tool": "create_emergency_ticket",
+        "create_args": lambda woreda, contact: {
+            "woreda": woreda, "emergency_type": "fire",
+            "issue_description": "Fire near the market", "user_contact": contact,
+        },
+    },
+    "power": {
+        "db": POWER_DB,
+        "report": "No power in my house in {woreda} since this morning",
+        "office_tool": "get_power_office_by_woreda",
+        "create_tool": "create_power_ticket",
+        "create_args": lambda woreda, contact: {
+            "woreda": woreda, "issue_description": "Power outage since morning", "user_contact": contact,
+        },
+    },
+    "sanitation": {
+        "db": SANITATION_DB,
+        "report": "Garbage has not been collected for a week in {woreda}",
+        "office_tool": "get_sanitation_office_by_woreda",
+        "create_tool": "create_sanitation_ticket",
+        "create_args": lambda woreda, contact: {
+            "woreda": woreda, "issue_description": "Garbage not collected for a week", "user_contact": contact,
+        },
+    },
+    "infrastructure": {
+        "db": INFRASTRUCTURE_DB,
+        "report": "There is a big pothole on the main road in {woreda}",
+        "office_tool": "get_infrastructure_office_by_woreda",
+        "create_tool": "create_infrastructure_ticket",
+        "create_args": lambda woreda, contact: {
+            "woreda": woreda, "issue_description": "Large pothole on the main road", "user_contact": contact,
+        },
+    },
+    "utility": {
+        "db": UTILITY_DB,
+        "report": "No water coming from the tap in {woreda}",
+        "office_tool": "get_utility_office_by_woreda",
+        "create_tool": "create_utility_ticket",
+        "create_args": lambda woreda, contact: {
+            "woreda": woreda, "issue_description": "No water supply", "user_contact": contact,
+        },
+    },
+}
+
+# Stand-in replies; a "?" in a reply means the tool result was missing
+OFFICE_REPLY = FromToolResult("The {name} ({phone}) serves your area. Please share a phone number so I can open a ticket.")
+TICKET_REPLY = FromToolResult("Your ticket {ticket_number} has been created with status {status}.")
+
+
+# --- Database seeding ---
+
+def seed_databases() -> None:
+    """(Re)create each domain database from database2/<domain>_db/{schema,data}.sql."""
+    for domain, spec in DOMAINS.items():
+        cfg = spec["db"]
+        if cfg["type"] != "local":
+            print("DATABASE_URL is set: --seed only supports the local Postgres databases.")
+            return
+        dbname = cfg["dbname"]
+        admin = psycopg2.connect(host=cfg["host"], port=cfg["port"], dbname="postgres",
+                                 user=cfg["user"], password=cfg["password"])
+        admin.autocommit = True
+        with admin.cursor() as cur:
+            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(dbname)))
+            cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(dbname)))
+        admin.close()
+
+        conn = psycopg2.connect(host=cfg["host"], port=cfg["port"], dbname=dbname,
+                                user=cfg["user"], password=cfg["password"])
+        with conn, conn.cursor() as cur:
+            for script in ("schema.sql", "data.sql"):
+                cur.execute((DATABASE_DIR / dbname / script).read_text(encoding="utf-8"))
+        conn.close()
+        print(f"✅ Seeded {dbname}")
+
+
+# --- Stand-in LLM ---
+
+class StandInLLM:
+    """Prompt -> script steps, registered by each citizen before it speaks."""
+    def __init__(self):
+        self.scripts = {}
+
+    def expect(self, prompt: str, steps: list) -> None:
+        self.scripts[prompt] = steps
+
+    def steps_for(self, prompt: str) -> list:
+        return self.scripts.get(prompt, ["Sorry, I did not understand that."])
+
+
+# --- Virtual citizens ---
+
+class Results:
+    def __init__(self):
+        self.latencies = {phase: [] for phase in PHASES}
+        self.errors = {phase: 0 for phase in PHASES}
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float, error=None) -> None:
+        with self._lock:
+            self.latencies[phase].append(seconds)
+            if error:
+                self.errors[phase] += 1
+                if len(self.samples) < 20:
+                    self.samples.append(f"{phase}: {error}")
+
+
+class Citizen:
+    """One virtual citizen: report -> follow-up -> status check, per round."""
+    def __init__(self, index: int, round_: int, llm: StandInLLM):
+        self.user_id = f"citizen-{index}"
+        self.session_id = f"load-{index}-{round_}"
+        rng = random.Random(index * 1000 + round_)
+        self.domain = rng.choice(list(DOMAINS))
+        self.woreda = rng.choice(WOREDAS)
+        spec = DOMAINS[self.domain]
+        contact = f"+251-9{index:08d}"
+
+        self.report = spec["report"].format(woreda=self.woreda)
+        self.follow_up = f"My phone number is {contact}, please open a ticket ({self.session_id})"
+        llm.expect(self.report, [[(spec["office_tool"], {"woreda_name": self.woreda})], OFFICE_REPLY])
+        llm.expect(self.follow_up, [[(spec["create_tool"], spec["create_args"](self.woreda, contact))], TICKET_REPLY])
+
+    @staticmethod
+    def check(phase: str, reply: str):
+        """Return an error description, or None if the reply looks right."""
+        if reply.startswith("❌"):
+            return reply[:120]
+        if phase in ("report", "follow_up") and "?" in reply:
+            return f"tool result missing: {reply[:80]}"
+        if phase == "follow_up" and not TICKET_RE.search(reply):
+            return "no ticket number in reply"
+        if phase == "status" and not reply.startswith("🎫"):
+            return f"status not found: {reply[:80]}"
+        return None
+
+    def prompts(self):
+        yield "report", self.report
+        reply = yield "follow_up", self.follow_up
+        match = TICKET_RE.search(reply or "")
+        if match:
+            yield "status", f"What is the status of {match.group(0)}?"
+
+
+def run_citizen_sync(app: AdkApp, citizen: Citizen, results: Results, think: float) -> None:
+    prompts = citizen.prompts()
+    phase, prompt = next(prompts)
+    while True:
+        start = time.perf_counter()
+        try:
+            reply = app.run(user_id=citizen.user_id, session_id=citizen.session_id, prompt=prompt)
+            error = Citizen.check(phase, reply)
+        except Exception as e:
+            reply, error = "", f"{type(e).__name__}: {e}"
+        results.record(phase, time.perf_counter() - start, error)
+        if think:
+            time.sleep(think)
+        try:
+            phase, prompt = prompts.send(reply)
+        except StopIteration:
+            return
+
+
+async def run_citizen_async(app: AdkApp, citizen: Citizen, results: Results, think: float) -> None:
+    prompts = citizen.prompts()
+    phase, prompt = next(prompts)
+    while True:
+        start = time.perf_counter()
+        try:
+            reply = await app.run_async(user_id=citizen.user_id, session_id=citizen.session_id, prompt=prompt)
+            error = Citizen.check(phase, reply)
+        except Exception as e:
+            reply, error = "", f"{type(e).__name__}: {e}"
+        results.record(phase, time.perf_counter() - start, error)
+        if think:
+            await asyncio.sleep(think)
+        try:
+            phase, prompt = prompts.send(reply)
+        except StopIteration:
+            return
+
+
+# --- Pool saturation sampling ---
+
+class PoolSampler(threading.Thread):
+    """Samples pool_metrics() while the load runs."""
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.peaks = {}
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            for m in pool_metrics():
+                peak = self.peaks.setdefault(m["pool"], {"samples": 0, "saturated": 0, "peak_in_use": 0, "peak_waiters": 0})
+                peak["samples"] += 1
+                peak["saturated"] += m["in_use"] >= m["max_size"]
+                peak["peak_in_use"] = max(peak["peak_in_use"], m["in_use"])
+                peak["peak_waiters"] = max(peak["peak_waiters"], m["waiters"])
+            self.stopped.wait(self.interval)
+
+    def report(self) -> list:
+        pools = []
+        for m in pool_metrics():
+            peak = self.peaks.get(m["pool"], {"samples": 0, "saturated": 0, "peak_in_use": 0, "peak_waiters": 0})
+            pools.append({
+                "pool": m["pool"],
+                "max_size": m["max_size"],
+                "peak_in_use": peak["peak_in_use"],
+                "peak_waiters": peak["peak_waiters"],
+                "saturated_pct": round(100 * peak["saturated"] / peak["samples"], 1) if peak["samples"] else 0.0,
+                "checkouts": m["checkouts"],
+                "timeouts": m["timeouts"],
+                "wait_time_avg_ms": m["wait_time_avg_ms"],
+                "wait_time_max_ms": m["wait_time_max_ms"],
+                "reconnects": m["reconnects"],
+            })
+        return pools
+
+
+# --- Reporting ---
+
+def percentile(values, q):
+    ranked = sorted(values)
+    return ranked[min(len(ranked) - 1, int(q * len(ranked)))]
+
+
+def phase_stats(latencies: list, errors: int) -> dict:
+    if not latencies:
+        return {"count": 0, "errors": errors, "error_rate": 0.0}
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-citizen load test for AdkApp")
+    parser.add_argument("--seed", action="store_true", help="Recreate the local databases from database2/ and exit")
+    parser.add_argument("--citizens", type=int, default=50, help="Concurrent virtual citizens")
+    parser.add_argument("--rounds", type=int, default=1, help="Scenarios per citizen")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stand-in LLM latency per round trip (s)")
+    parser.add_argument("--think", type=float, default=0.0, help="Citizen think time between turns (s)")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync", help="AdkApp.run threads or run_async")
+    parser.add_argument("--out", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_databases()
+        return
+
+    from smart_city_agent.agent import customer_service_agent
+
+    llm = StandInLLM()
+    citizens = [Citizen(i, r, llm) for r in range(args.rounds) for i in range(args.citizens)]
+    results = Results()
+    sampler = PoolSampler()
+
+    # Silence the runner's debug prints while load is applied
+    with contextlib.redirect_stdout(io.StringIO()):
+        providers = Providers(gemini=FakeGeminiClient(script=llm.steps_for, latency=args.latency), name="stand-in")
+        app = AdkApp(agent=customer_service_agent, providers=providers)
+        sampler.start()
+        start = time.perf_counter()
+        if args.mode == "sync":
+            with ThreadPoolExecutor(max_workers=args.citizens) as pool:
+                list(pool.map(lambda c: run_citizen_sync(app, c, results, args.think), citizens))
+        else:
+            async def run_all():
+                gate = asyncio.Semaphore(args.citizens)
+
+                async def one(citizen):
+                    async with gate:
+                        await run_citizen_async(app, citizen, results, args.think)
+
+                await asyncio.gather(*(one(c) for c in citizens))
+            asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+        sampler.stopped.set()
+
+    turns = sum(len(v) for v in results.latencies.values())
+    errors = sum(results.errors.values())
+    report = {
+        "config": vars(args),
+        "turns": turns,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / turns, 4) if turns else 0.0,
+        "phases": {phase: phase_stats(results.latencies[phase], results.errors[phase]) for phase in PHASES},
+        "pools": sampler.report(),
+        "ticket_writers": writer_metrics(),
+        "tool_caches": cache_metrics(),
+        "spans": app.trace_report(),
+        "error_samples": results.samples,
+    }
+
+    print("=" * 72)
+    print("ADDIS-SYNC CONCURRENT-CITIZEN LOAD TEST")
+    print("=" * 72)
+    print(f"Citizens: {args.citizens} x {args.rounds} round(s) | Mode: {args.mode} | LLM latency: {args.latency}s")
+    print(f"Turns: {turns} in {elapsed:.2f}s -> {report['turns_per_sec']} turns/s | errors: {report['error_rate']:.1%}")
+    print(f"{'phase':<10} {'count':>6} {'err%':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for phase, stats in report["phases"].items():
+        if stats["count"]:
+            print(f"{phase:<10} {stats['count']:6d} {stats['error_rate']:6.1%} "
+                  f"{stats['p50_ms']:7.1f}ms {stats['p95_ms']:7.1f}ms {stats['p99_ms']:7.1f}ms")
+    print("-" * 72)
+    for pool in report["pools"]:
+        print(f"pool {pool['pool']}: peak {pool['peak_in_use']}/{pool['max_size']} in use, "
+              f"saturated {pool['saturated_pct']}% of samples, peak waiters {pool['peak_waiters']}, "
+              f"timeouts {pool['timeouts']}")
+    for sample in results.samples[:5]:
+        print(f"  ⚠️ {sample}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
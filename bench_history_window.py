@@ -0,0 +1,89 @@
+"""
+Addis-Sync History Window Benchmark
+Measures the prompt size (system instruction + replayed history) sent to the
+model on every turn of a long conversation, with the full Session.history
+versus the token-budgeted history window.
+
+Usage:
+    python bench_history_window.py --turns 50 --budget 1500
+"""
+
+import io
+import argparse
+import contextlib
+
+from smart_city_agent.agent import customer_service_agent
+from smart_city_agent.local_runner import AdkApp
+from smart_city_agent.history_manager import HistoryManager, content_text
+from smart_city_agent.prompt_compiler import estimate_tokens
+from smart_city_agent.provider_health import ProviderHealthRegistry
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+# A citizen conversation that keeps coming back with new issues
+PROMPTS = [
+    "The street light on Bole Road near Edna Mall has been off for three nights.",
+    "It is in Bole woreda 03, next to the pharmacy.",
+    "Also the water pressure in our building is very low since Monday.",
+    "My phone number is 0911223344.",
+    "Is there anything else I should do while I wait?",
+]
+REPLY = (
+    "Thank you for the details. I have passed this on to the responsible woreda "
+    "office and they will follow up with a technician as soon as possible. "
+    "Please let me know if anything changes in the meantime."
+)
+TICKET_REPLY = "I have created your ticket: {ticket}. Please keep it for follow-up."
+
+
+def script(prompt: str):
+    # Every fifth message creates a ticket (those turns are pinned)
+    if prompt.startswith(PROMPTS[1]):
+        return [TICKET_REPLY.format(ticket="INFR-%08X" % (abs(hash(prompt)) % 0xFFFFFFFF))]
+    return [REPLY]
+
+
+def run_conversation(manager: HistoryManager, turns: int) -> list:
+    app = AdkApp(agent=customer_service_agent, health=ProviderHealthRegistry(), history_manager=manager)
+    app.gemini_client = FakeGeminiClient(script=script)
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+
+    history_sizes, prompt_sizes = [], []
+    for turn in range(turns):
+        prompt = f"{PROMPTS[turn % len(PROMPTS)]} (message {turn + 1})"
+        app.run(user_id="bench", session_id=f"history-{id(manager)}", prompt=prompt)
+        config = app.gemini_client.last_config
+        history = app.gemini_client.last_history
+        history_tokens = sum(estimate_tokens(content_text(c)) for c in history)
+        history_sizes.append(history_tokens)
+        prompt_sizes.append(estimate_tokens(config.system_instruction) + history_tokens + estimate_tokens(prompt))
+    return history_sizes, prompt_sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size per turn: full history vs history window")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=1500, help="History token budget")
+    args = parser.parse_args()
+
+    # Silence the runner's debug prints while measuring
+    with contextlib.redirect_stdout(io.StringIO()):
+        full = run_conversation(HistoryManager(budget=None), args.turns)
+        windowed = run_conversation(HistoryManager(budget=args.budget), args.turns)
+
+    print("=" * 60)
+    print("ADDIS-SYNC PROMPT SIZE PER TURN (~tokens)")
+    print("=" * 60)
+    print(f"{'turn':>5} {'history (full)':>15} {'history (window)':>17} {'prompt (full)':>14} {'prompt (window)':>16}")
+    for turn in range(args.turns):
+        if turn < 5 or (turn + 1) % 5 == 0:
+            print(f"{turn + 1:>5} {full[0][turn]:>15} {windowed[0][turn]:>17} {full[1][turn]:>14} {windowed[1][turn]:>16}")
+    print("-" * 60)
+    total_full, total_window = sum(full[1]), sum(windowed[1])
+    print(f"Prompt tokens over {args.turns} turns: full {total_full} | window {total_window}"
+          f" ({100 * (1 - total_window / total_full):.0f}% less)")
+    print(f"History tokens on the last turn: full {full[0][-1]} | window {windowed[0][-1]}")
+
+
+if __name__ == "__main__":
+    main()
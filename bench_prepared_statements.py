@@ -0,0 +1,107 @@
+"""
+Addis-Sync Prepared Statement Microbenchmark
+Compares per-call latency of the MCP tool queries run with plain
+cur.execute(sql, ...) against the prepared-statement registry
+(PREPARE once per pooled connection, then EXECUTE), under concurrency.
+
+Needs a seeded database: DATABASE_URL (cloud mode) or the local power_db.
+
+Usage:
+    python bench_prepared_statements.py --calls 2000 --threads 8
+"""
+
+import io
+import time
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from smart_city_agent.mcp_server.db import get_conn, pool_metrics, POWER_DB
+from smart_city_agent.mcp_server.statements import execute_prepared
+
+QUERIES = [
+    ("office lookup", """
+        SELECT name, phone, email, address,
+               ST_X(location::geometry) as longitude,
+               ST_Y(location::geometry) as latitude
+        FROM offices
+        WHERE woreda = %s
+        LIMIT 1;
+    """, ("Bole",)),
+    ("ticket status", """
+        SELECT ticket_number, woreda, status, created_at, updated_at
+        FROM tickets
+        WHERE ticket_number = %s;
+    """, ("POWR-00000000",)),
+]
+
+
+def plain_call(sql, params):
+    with get_conn(POWER_DB) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            cur.fetchall()
+
+
+def prepared_call(sql, params):
+    with get_conn(POWER_DB) as conn:
+        with conn.cursor() as cur:
+            execute_prepared(cur, sql, params)
+            cur.fetchall()
+
+
+def percentile(values, q):
+    ranked = sorted(values)
+    return ranked[min(len(ranked) - 1, int(q * len(ranked)))]
+
+
+def measure(call, sql, params, calls: int, threads: int) -> dict:
+    def one(_):
+        start = time.perf_counter()
+        call(sql, params)
+        return time.perf_counter() - start
+
+    # Warm up the pool (and, for the prepared path, every connection's statements)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(threads * 4)))
+        start = time.perf_counter()
+        latencies = list(pool.map(one, range(calls)))
+        elapsed = time.perf_counter() - start
+    return {
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "mean": sum(latencies) / len(latencies) * 1000,
+        "per_sec": calls / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cur.execute vs prepared statements")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("ADDIS-SYNC PREPARED STATEMENTS (per-call latency, ms)")
+    print("=" * 72)
+    print(f"Calls: {args.calls} | Threads: {args.threads}")
+    print(f"{'query':<15} {'path':<10} {'p50':>8} {'p95':>8} {'mean':>8} {'calls/s':>10}")
+    for label, sql, params in QUERIES:
+        for path, call in (("execute", plain_call), ("prepared", prepared_call)):
+            # Silence tracing/pool debug prints while timing
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = measure(call, sql, params, args.calls, args.threads)
+            print(f"{label:<15} {path:<10} {stats['p50']:8.3f} {stats['p95']:8.3f} "
+                  f"{stats['mean']:8.3f} {stats['per_sec']:10.1f}")
+    print("-" * 72)
+    for metrics in pool_metrics():
+        print(f"pool {metrics['pool']}: size {metrics['size']}, "
+              f"wait avg {metrics['wait_time_avg_ms']}ms, max {metrics['wait_time_max_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
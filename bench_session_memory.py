@@ -0,0 +1,143 @@
+"""
+Addis-Sync Session Memory Benchmark
+Measures resident memory per session with N concurrent conversations:
+the old representation (a list of google.genai Content per session plus
+the Streamlit copy in st.session_state.messages) versus the compact
+Transcript records, and the cost of building the provider views.
+
+Usage:
+    python bench_session_memory.py --sessions 10000 --turns 6
+"""
+
+import io
+import gc
+import time
+import argparse
+import contextlib
+import tracemalloc
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from google.genai import types
+    from smart_city_agent.local_runner import Session
+    from smart_city_agent.history_manager import HistoryManager, content_text
+    from smart_city_agent.transcript import ToolExchange
+
+PROMPTS = [
+    "No power in Bole since this morning, the whole block is dark.",
+    "It is Bole woreda 03, near Edna Mall. My phone is 0911223344.",
+    "Can you tell me the status of my ticket?",
+    "Also the street light on our road is broken.",
+]
+REPLY = (
+    "Thank you for reporting this. I have created ticket POWR-1A2B3C4D and the Bole "
+    "power office (+251-11-661-1111) will send a technician. Please keep the number for follow-up."
+)
+OFFICE = {"name": "Bole Power Office", "phone": "+251-11-661-1111", "address": "Bole Road",
+          "latitude": 9.0, "longitude": 38.79}
+TICKET = {"ticket_number": "POWR-1A2B3C4D", "status": "RECEIVED", "created_at": "2025-01-01T08:00:00+00:00"}
+
+
+def conversation(session_index: int, turns: int):
+    """(prompt, reply, tools) per turn; the first turn looks up the office and files a ticket."""
+    for turn in range(turns):
+        # Distinct strings per message, like real conversations
+        prompt = f"{PROMPTS[turn % len(PROMPTS)]} ({session_index}.{turn})"
+        reply = f"{REPLY} ({session_index}.{turn})"
+        tools = []
+        if turn == 0:
+            tools = [
+                ToolExchange("get_power_office_by_woreda", {"woreda_name": "Bole"}, {"result": OFFICE}),
+                ToolExchange("create_power_ticket", {"woreda": "Bole", "issue_description": prompt}, {"result": TICKET}),
+            ]
+        yield prompt, reply, tools
+
+
+def legacy_session(session_index: int, turns: int):
+    """Session.history as Content pairs, plus the UI's duplicate message list."""
+    session = Session(f"legacy-{session_index}")
+    session.history = []
+    ui_messages = []
+    for prompt, reply, _ in conversation(session_index, turns):
+        session.history.append(types.Content(role="user", parts=[types.Part.from_text(text=prompt)]))
+        session.history.append(types.Content(role="model", parts=[types.Part.from_text(text=reply)]))
+        ui_messages.append({"role": "user", "content": prompt})
+        ui_messages.append({"role": "assistant", "content": reply})
+    return session, ui_messages
+
+
+def transcript_session(session_index: int, turns: int, tools: bool):
+    session = Session(f"transcript-{session_index}")
+    for prompt, reply, exchanges in conversation(session_index, turns):
+        session.history.record(prompt, reply, exchanges if tools else ())
+    return session
+
+
+def measure(build, sessions: int) -> tuple:
+    """(bytes per session, objects kept alive) for `sessions` sessions built by `build`."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(i) for i in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / sessions, kept
+
+
+def time_views(sessions: list, manager: HistoryManager, legacy: bool) -> tuple:
+    """Mean µs to build the Gemini history and the OpenAI messages for one turn."""
+    start = time.perf_counter()
+    for session in sessions:
+        gemini = session.history if legacy else manager.build(session)
+    gemini_us = (time.perf_counter() - start) / len(sessions) * 1e6
+
+    start = time.perf_counter()
+    for session in sessions:
+        if legacy:
+            # The old OpenRouter path re-converted every Content on every turn
+            messages = [
+                {"role": "assistant" if c.role == "model" else c.role, "content": content_text(c)}
+                for c in session.history
+            ]
+        else:
+            messages = manager.build_messages(session)
+    openai_us = (time.perf_counter() - start) / len(sessions) * 1e6
+    return gemini_us, openai_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session memory: Content history vs compact transcript")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=6, help="Turns per conversation")
+    args = parser.parse_args()
+
+    legacy_bytes, legacy = measure(lambda i: legacy_session(i, args.turns), args.sessions)
+    text_bytes, _ = measure(lambda i: transcript_session(i, args.turns, tools=False), args.sessions)
+    full_bytes, compact = measure(lambda i: transcript_session(i, args.turns, tools=True), args.sessions)
+
+    manager = HistoryManager(budget=None)
+    sample = min(args.sessions, 2000)
+    legacy_views = time_views([s for s, _ in legacy[:sample]], manager, legacy=True)
+    compact_views = time_views(compact[:sample], manager, legacy=False)
+    cached_views = time_views(compact[:sample], manager, legacy=False)
+
+    print("=" * 72)
+    print(f"ADDIS-SYNC SESSION MEMORY ({args.sessions} sessions x {args.turns} turns)")
+    print("=" * 72)
+    print(f"{'representation':<44} {'bytes/session':>13} {'total MB':>10}")
+    rows = [
+        ("Content history + UI message copy (old)", legacy_bytes),
+        ("Transcript, text only", text_bytes),
+        ("Transcript + tool calls/results", full_bytes),
+    ]
+    for name, per_session in rows:
+        print(f"{name:<44} {per_session:>13,.0f} {per_session * args.sessions / 2**20:>10.1f}")
+    print("-" * 72)
+    print(f"Text-only transcript: {100 * (1 - text_bytes / legacy_bytes):.0f}% less memory per session")
+    print(f"{'views per turn (µs)':<44} {'gemini':>13} {'openai':>10}")
+    print(f"{'old (Content list / re-conversion)':<44} {legacy_views[0]:>13.1f} {legacy_views[1]:>10.1f}")
+    print(f"{'transcript adapters (first build)':<44} {compact_views[0]:>13.1f} {compact_views[1]:>10.1f}")
+    print(f"{'transcript adapters (cached, same turn)':<44} {cached_views[0]:>13.1f} {cached_views[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
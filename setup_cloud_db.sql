@@ -152,3 +152,17 @@ CREATE TABLE IF NOT EXISTS utility.offices (
 -- Mock Data for Utility
 INSERT INTO utility.offices (woreda, name, phone, email, address, location) VALUES
 ('Bole', 'Bole Water & Sewage', '+251-11-662-5555', 'water.bole@aawsa.gov.et', 'Urael', ST_SetSRID(ST_MakePoint(38.77, 9.01), 4326));
+
+
+-- ============================================================================
+-- 💾 CONVERSATION SESSIONS (ADK_SESSION_BACKEND=postgres)
+-- ============================================================================
+CREATE SCHEMA IF NOT EXISTS sessions;
+
+CREATE TABLE IF NOT EXISTS sessions.adk_sessions (
+    session_id TEXT PRIMARY KEY,
+    history JSONB NOT NULL,
+    state JSONB NOT NULL,
+    history_window JSONB,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
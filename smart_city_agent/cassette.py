@@ -0,0 +1,369 @@
+"""
+Provider Cassettes for Addis-Sync: record real LLM exchanges, replay them offline.
+
+Recording wraps the live Gemini / OpenRouter clients and appends every model
+reply (text or function calls) to a JSONL cassette, keyed the same way the
+fake provider picks script steps: (provider, context, user prompt, step),
+where the step is the number of model replies since the user's message and
+the context is a hash of the user messages before it, so the same prompt in
+two conversations ("Yes", "Thanks") gets two recordings. Tool results (e.g.
+fresh ticket numbers) are not part of the key, and a recorded turn replays
+even though the tools return different data.
+
+Replay builds FakeGeminiClient / FakeOpenRouterClient scripts from the
+cassette, with either the recorded latency per model or a fixed simulated
+latency. A prompt that was never recorded raises CassetteMiss.
+
+Cassette format (JSONL, one line per reply; a re-recorded step's later line wins):
+    {"version": 2}
+    {"provider": "gemini", "model": "...", "context": "3f2a...", "prompt": "...", "step": 0,
+     "response": "text" | [{"name": "...", "args": {...}}], "latency": 1.23}
+
+Version 1 cassettes (a single JSON document, no context) still load; their
+replies match the prompt in any conversation.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from .fake_provider import (
+    ConversationScript,
+    FakeGeminiClient,
+    FakeOpenRouterClient,
+    Step,
+    gemini_earlier_prompts,
+    gemini_turn_position,
+    openai_earlier_prompts,
+    openai_turn_position,
+    _user_content,
+)
+
+CASSETTE_VERSION = 2
+GEMINI = "gemini"
+OPENROUTER = "openrouter"
+
+
+class CassetteMiss(RuntimeError):
+    """The replayed conversation asked for a prompt the cassette does not contain."""
+
+
+def _encode_step(step: Step) -> Union[str, List[dict]]:
+    if isinstance(step, str):
+        return step
+    return [{"name": name, "args": args} for name, args in step]
+
+
+def _decode_step(response: Union[str, List[dict]]) -> Step:
+    if isinstance(response, str):
+        return response
+    return [(call["name"], call.get("args") or {}) for call in response]
+
+
+def conversation_context(earlier: Sequence[str]) -> str:
+    """Key of a conversation's earlier user messages (empty for its first turn)."""
+    if not earlier:
+        return ""
+    return hashlib.sha1(json.dumps(list(earlier), ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class Cassette:
+    """
+    Recorded model replies, persisted as JSONL (each reply is appended).
+
+    Args:
+        path: Cassette file (loaded if it exists)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._interactions: Dict[tuple, dict] = {}
+        if os.path.exists(path):
+            for item in self._read(path):
+                self._interactions[self._key(item)] = item
+
+    @staticmethod
+    def _read(path: str) -> List[dict]:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and "interactions" in data:
+            return data["interactions"]         # version 1: one JSON document
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        return [item for item in items if "provider" in item]
+
+    @staticmethod
+    def _key(item: dict) -> tuple:
+        # None: a version 1 reply, recorded without its conversation
+        return item["provider"], item.get("context"), item["prompt"], item["step"]
+
+    def __len__(self) -> int:
+        return len(self._interactions)
+
+    def record(self, provider: str, model: str, prompt: str, step: int, response: Step, latency: float,
+               earlier: Sequence[str] = ()) -> None:
+        """Store one model reply (a re-recorded step replaces the old one) and append it to the file."""
+        item = {
+            "provider": provider,
+            "model": model,
+            "context": conversation_context(earlier),
+            "prompt": prompt,
+            "step": step,
+            "response": _encode_step(response),
+            "latency": round(latency, 4),
+        }
+        line = json.dumps(item, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._interactions[self._key(item)] = item
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", encoding="utf-8") as f:
+                if new_file:
+                    f.write(json.dumps({"version": CASSETTE_VERSION}) + "\n")
+                f.write(line)
+
+    def steps(self, provider: str, prompt: str, earlier: Sequence[str] = ()) -> List[Step]:
+        """Recorded steps of one turn (the prompt after `earlier` user messages), in order."""
+        context = conversation_context(earlier)
+        with self._lock:
+            items = [item for (p, c, text, _), item in self._interactions.items()
+                     if p == provider and c == context and text == prompt]
+            if not items:
+                items = [item for (p, c, text, _), item in self._interactions.items()
+                         if p == provider and c is None and text == prompt]
+        if not items:
+            raise CassetteMiss(f"No {provider} recording for prompt: {prompt[:80]!r}")
+        return [_decode_step(item["response"]) for item in sorted(items, key=lambda i: i["step"])]
+
+    def latencies(self, provider: str) -> Dict[str, float]:
+        """Mean recorded latency per model."""
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            for item in self._interactions.values():
+                if item["provider"] == provider:
+                    totals.setdefault(item["model"], []).append(item["latency"])
+        return {model: sum(values) / len(values) for model, values in totals.items()}
+
+
+# --- Replay ---
+
+class _RecordedLatency(dict):
+    """model -> recorded mean latency; unknown models get the overall mean."""
+    def __init__(self, latencies: Dict[str, float]):
+        super().__init__(latencies)
+        self.fallback = sum(latencies.values()) / len(latencies) if latencies else 0.0
+
+    def get(self, model, default=None):
+        return super().get(model, self.fallback)
+
+
+def _replay_latency(cassette: Cassette, provider: str, latency: Optional[Union[float, Dict[str, float]]]):
+    return _RecordedLatency(cassette.latencies(provider)) if latency is None else latency
+
+
+def replay_gemini_client(cassette: Cassette, latency: Optional[Union[float, Dict[str, float]]] = None) -> FakeGeminiClient:
+    """
+    Gemini client that answers from a cassette.
+
+    Args:
+        cassette: Recorded exchanges
+        latency: Simulated seconds per round trip (None = recorded mean per model)
+    """
+    return FakeGeminiClient(
+        script=ConversationScript(lambda prompt, earlier: cassette.steps(GEMINI, prompt, earlier)),
+        latency=_replay_latency(cassette, GEMINI, latency),
+    )
+
+
+def replay_openrouter_client(
+    cassette: Cassette,
+    latency: Optional[Union[float, Dict[str, float]]] = None,
+    is_async: bool = False,
+) -> FakeOpenRouterClient:
+    """OpenRouter client that answers from a cassette (see replay_gemini_client)."""
+    return FakeOpenRouterClient(
+        script=ConversationScript(lambda prompt, earlier: cassette.steps(OPENROUTER, prompt, earlier)),
+        latency=_replay_latency(cassette, OPENROUTER, latency),
+        is_async=is_async,
+    )
+
+
+# --- Recording: Gemini ---
+
+def gemini_step(parts: list) -> Step:
+    """Script step for the parts of a Gemini reply."""
+    calls = [(p.function_call.name, dict(p.function_call.args or {})) for p in parts if p.function_call]
+    if calls:
+        return calls
+    return "".join(p.text for p in parts if p.text)
+
+
+def _response_parts(response) -> list:
+    if not response.candidates or not response.candidates[0].content:
+        return []
+    return response.candidates[0].content.parts or []
+
+
+class _RecordingChatBase:
+    def __init__(self, chat, model: str, cassette: Cassette):
+        self._chat = chat
+        self._model = model
+        self._cassette = cassette
+
+    def get_history(self, curated: bool = False) -> list:
+        return self._chat.get_history(curated=curated)
+
+    def _position(self, message: Any) -> tuple[str, int, List[str]]:
+        history = self._chat.get_history(curated=False) + [_user_content(message)]
+        return (*gemini_turn_position(history), gemini_earlier_prompts(history))
+
+    def _record(self, position: tuple[str, int, List[str]], parts: list, start: float) -> None:
+        prompt, step, earlier = position
+        self._cassette.record(GEMINI, self._model, prompt, step, gemini_step(parts), time.perf_counter() - start, earlier)
+
+
+class RecordingChat(_RecordingChatBase):
+    """Wraps a google.genai Chat and records every reply."""
+    def send_message(self, message: Any, config: Any = None):
+        position = self._position(message)
+        start = time.perf_counter()
+        response = self._chat.send_message(message, config=config)
+        self._record(position, _response_parts(response), start)
+        return response
+
+    def send_message_stream(self, message: Any, config: Any = None) -> Iterator:
+        position = self._position(message)
+        start = time.perf_counter()
+        parts = []
+        for chunk in self._chat.send_message_stream(message, config=config):
+            parts.extend(_response_parts(chunk))
+            yield chunk
+        self._record(position, parts, start)
+
+
+class RecordingAsyncChat(_RecordingChatBase):
+    """Async twin of RecordingChat."""
+    async def send_message(self, message: Any, config: Any = None):
+        position = self._position(message)
+        start = time.perf_counter()
+        response = await self._chat.send_message(message, config=config)
+        self._record(position, _response_parts(response), start)
+        return response
+
+
+class _RecordingChats:
+    def __init__(self, chats, chat_cls: type, cassette: Cassette):
+        self._chats = chats
+        self._chat_cls = chat_cls
+        self._cassette = cassette
+
+    def create(self, model: str, config: Any = None, history: Optional[list] = None):
+        chat = self._chats.create(model=model, config=config, history=history)
+        return self._chat_cls(chat, model, self._cassette)
+
+
+class _RecordingAio:
+    def __init__(self, aio, cassette: Cassette):
+        self.chats = _RecordingChats(aio.chats, RecordingAsyncChat, cassette)
+
+
+class RecordingGeminiClient:
+    """
+    genai.Client wrapper that records replies to a cassette.
+
+    Args:
+        client: Live genai.Client
+        cassette: Cassette to write
+    """
+    def __init__(self, client, cassette: Cassette):
+        self.client = client
+        self.cassette = cassette
+        self.chats = _RecordingChats(client.chats, RecordingChat, cassette)
+        self.aio = _RecordingAio(client.aio, cassette)
+
+
+# --- Recording: OpenRouter ---
+
+def openai_step(message) -> Step:
+    """Script step for an OpenAI assistant message."""
+    if message.tool_calls:
+        return [(tc.function.name, json.loads(tc.function.arguments or "{}")) for tc in message.tool_calls]
+    return message.content or ""
+
+
+def _stream_step(content: str, tool_calls: Dict[int, dict]) -> Step:
+    if tool_calls:
+        return [
+            (call["name"], json.loads(call["arguments"] or "{}"))
+            for _, call in sorted(tool_calls.items())
+        ]
+    return content
+
+
+class _RecordingCompletions:
+    def __init__(self, completions, cassette: Cassette):
+        self._completions = completions
+        self._cassette = cassette
+
+    def _record(self, model: str, messages: list, step: Step, start: float) -> None:
+        prompt, index = openai_turn_position(messages)
+        self._cassette.record(OPENROUTER, model, prompt, index, step, time.perf_counter() - start,
+                              openai_earlier_prompts(messages))
+
+    def create(self, model: str, messages: list, stream: bool = False, **kwargs):
+        start = time.perf_counter()
+        response = self._completions.create(model=model, messages=messages, stream=stream, **kwargs)
+        if stream:
+            return self._recorded_stream(model, list(messages), response, start)
+        self._record(model, messages, openai_step(response.choices[0].message), start)
+        return response
+
+    def _recorded_stream(self, model: str, messages: list, chunks, start: float) -> Iterator:
+        content = ""
+        tool_calls: Dict[int, dict] = {}
+        for chunk in chunks:
+            if chunk.choices:
+                delta = chunk.choices[0].delta
+                content += delta.content or ""
+                for tc in delta.tool_calls or []:
+                    call = tool_calls.setdefault(tc.index, {"name": "", "arguments": ""})
+                    if tc.function and tc.function.name:
+                        call["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call["arguments"] += tc.function.arguments
+            yield chunk
+        self._record(model, messages, _stream_step(content, tool_calls), start)
+
+
+class _RecordingAsyncCompletions(_RecordingCompletions):
+    async def create(self, model: str, messages: list, **kwargs):
+        start = time.perf_counter()
+        response = await self._completions.create(model=model, messages=messages, **kwargs)
+        self._record(model, messages, openai_step(response.choices[0].message), start)
+        return response
+
+
+class _RecordingChatNamespace:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class RecordingOpenRouterClient:
+    """
+    openai.OpenAI / AsyncOpenAI wrapper that records completions to a cassette.
+
+    Args:
+        client: Live OpenAI-compatible client
+        cassette: Cassette to write
+        is_async: The wrapped client is an AsyncOpenAI
+    """
+    def __init__(self, client, cassette: Cassette, is_async: bool = False):
+        self.client = client
+        self.cassette = cassette
+        completions_cls = _RecordingAsyncCompletions if is_async else _RecordingCompletions
+        self.chat = _RecordingChatNamespace(completions_cls(client.chat.completions, cassette))
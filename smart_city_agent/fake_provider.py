@@ -0,0 +1,429 @@
+"""
+Scriptable stand-in LLM clients for Addis-Sync.
+
+FakeGeminiClient and FakeOpenRouterClient expose the same surface that
+AdkApp uses on the real google-genai and openai clients (chats / aio.chats,
+chat.completions), so the runner can be exercised and benchmarked without
+API keys or network access.
+
+A script describes one user turn as a list of steps:
+- a list of (tool_name, args) tuples -> the model asks for those tool calls
+- a string -> the model answers with that final text
+- a FromToolResult string -> the final text, formatted with the latest tool
+  result (e.g. FromToolResult("Ticket {ticket_number} created."))
+
+A script may also be a callable prompt -> steps, or a ConversationScript
+whose function also gets the conversation's earlier user messages (used by
+cassette replay, where the same prompt can occur in different conversations).
+"""
+
+import time
+import json
+import asyncio
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from google.genai import types
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionChunk,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
+)
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+Step = Union[str, List[tuple]]
+
+
+class FromToolResult(str):
+    """Final-text step filled in from the fields of the most recent tool result."""
+
+
+class _Fields(dict):
+    def __missing__(self, key):
+        return "?"
+
+
+def render_step(step: Step, tool_result: Any) -> Step:
+    """Format a FromToolResult step; other steps are returned unchanged."""
+    if isinstance(step, FromToolResult):
+        return str(step).format_map(_Fields(tool_result if isinstance(tool_result, dict) else {}))
+    return step
+
+
+class ConversationScript:
+    """
+    Script resolved per turn from the prompt and the user messages before it.
+
+    Args:
+        func: (prompt, earlier user messages) -> steps
+    """
+    def __init__(self, func: Callable[[str, List[str]], List[Step]]):
+        self.func = func
+
+
+Script = Union[List[Step], Callable[[str], List[Step]], ConversationScript]
+
+DEFAULT_SCRIPT: List[Step] = ["Hello! How can I help you with city services today?"]
+
+_call_ids = itertools.count(1)
+
+
+def _steps_for(script: Script, prompt: str, earlier: List[str]) -> List[Step]:
+    """Resolve a static, prompt-dependent or conversation-dependent script."""
+    if isinstance(script, ConversationScript):
+        return script.func(prompt, earlier)
+    return script(prompt) if callable(script) else script
+
+
+def _step_at(steps: List[Step], index: int) -> Step:
+    """Return the step for this round trip, repeating the last one if the model is asked again."""
+    return steps[min(index, len(steps) - 1)]
+
+
+def gemini_turn_position(history: list) -> tuple[str, int]:
+    """
+    (prompt, step) of the next model reply in a Gemini history ending with a user content.
+
+    The step is the number of model replies since the last user text message.
+    """
+    index = 0
+    for content in reversed(history):
+        if content.role == "model":
+            index += 1
+        elif any(p.text for p in content.parts or []):
+            return "".join(p.text for p in content.parts if p.text), index
+    return "", index
+
+
+def gemini_earlier_prompts(history: list) -> List[str]:
+    """User text messages before the one the turn answers (tool responses excluded)."""
+    prompts = [
+        "".join(p.text for p in content.parts if p.text)
+        for content in history
+        if content.role != "model" and any(p.text for p in content.parts or [])
+    ]
+    return prompts[:-1]
+
+
+def openai_turn_position(messages: list) -> tuple[str, int]:
+    """(prompt, step) of the next completion: assistant replies since the last user message."""
+    index = 0
+    for message in reversed(messages):
+        role = _role(message)
+        if role == "user":
+            return (message["content"] if isinstance(message, dict) else message.content), index
+        if role == "assistant":
+            index += 1
+    return "", index
+
+
+def openai_earlier_prompts(messages: list) -> List[str]:
+    """User messages before the one the turn answers."""
+    prompts = [
+        message["content"] if isinstance(message, dict) else message.content
+        for message in messages
+        if _role(message) == "user"
+    ]
+    return prompts[:-1]
+
+
+def _latest_gemini_tool_result(history: list) -> Any:
+    for content in reversed(history):
+        for part in reversed(content.parts or []):
+            if part.function_response:
+                # AdkApp sends {"result": ...} or {"error": ...}
+                return (part.function_response.response or {}).get("result")
+    return None
+
+
+def _latest_openai_tool_result(messages: list) -> Any:
+    for message in reversed(messages):
+        if _role(message) == "tool":
+            content = message["content"] if isinstance(message, dict) else message.content
+            try:
+                return json.loads(content)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def _step_tokens(step: Step) -> int:
+    return _tokens(step if isinstance(step, str) else json.dumps(step))
+
+
+def gemini_response(step: Step, input_tokens: Optional[int] = None) -> "types.GenerateContentResponse":
+    """Build a real GenerateContentResponse for a script step (with usage if input_tokens is given)."""
+    if isinstance(step, str):
+        parts = [types.Part.from_text(text=step)]
+    else:
+        parts = [
+            types.Part(function_call=types.FunctionCall(name=name, args=args))
+            for name, args in step
+        ]
+    usage = None
+    if input_tokens is not None:
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=input_tokens,
+            candidates_token_count=_step_tokens(step),
+        )
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage,
+    )
+
+
+def openai_completion(step: Step, model: str, input_tokens: int = 0) -> ChatCompletion:
+    """Build a real ChatCompletion for a script step."""
+    if isinstance(step, str):
+        message = ChatCompletionMessage(role="assistant", content=step)
+        finish_reason = "stop"
+    else:
+        message = ChatCompletionMessage(
+            role="assistant",
+            content=None,
+            tool_calls=[
+                ChatCompletionMessageToolCall(
+                    id=f"call_{next(_call_ids)}",
+                    type="function",
+                    function=Function(name=name, arguments=json.dumps(args))
+                )
+                for name, args in step
+            ]
+        )
+        finish_reason = "tool_calls"
+    return ChatCompletion(
+        id=f"fake-{next(_call_ids)}",
+        choices=[{"index": 0, "finish_reason": finish_reason, "message": message}],
+        created=int(time.time()),
+        model=model,
+        object="chat.completion",
+        usage={
+            "prompt_tokens": input_tokens,
+            "completion_tokens": _step_tokens(step),
+            "total_tokens": input_tokens + _step_tokens(step),
+        },
+    )
+
+
+def _text_chunks(text: str) -> List[str]:
+    """Split text into word-sized deltas for streaming."""
+    words = text.split(" ")
+    return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+
+def openai_chunks(completion: ChatCompletion) -> List[ChatCompletionChunk]:
+    """Split a ChatCompletion into stream=True chunks."""
+    message = completion.choices[0].message
+    deltas = [{"content": c} for c in _text_chunks(message.content)] if message.content else []
+    for i, tool_call in enumerate(message.tool_calls or []):
+        deltas.append({"tool_calls": [{
+            "index": i,
+            "id": tool_call.id,
+            "type": "function",
+            "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+        }]})
+    return [
+        ChatCompletionChunk(
+            id=completion.id,
+            choices=[{"index": 0, "delta": delta, "finish_reason": None}],
+            created=completion.created,
+            model=completion.model,
+            object="chat.completion.chunk",
+        )
+        for delta in deltas
+    ]
+
+
+class _FakeClientBase:
+    """Latency, outage simulation and call accounting shared by both fakes."""
+    def __init__(
+        self,
+        script: Optional[Script],
+        latency: Union[float, Dict[str, float]],
+        failing_models: Optional[set],
+    ):
+        self.script = script or DEFAULT_SCRIPT
+        self.latency = latency
+        self.failing_models = set(failing_models or ())
+        self.calls = 0
+        self.models_called: List[str] = []
+
+    def latency_for(self, model: str) -> float:
+        if isinstance(self.latency, dict):
+            return self.latency.get(model, 0.0)
+        return self.latency
+
+    def check_model(self, model: str) -> None:
+        self.models_called.append(model)
+        if model in self.failing_models:
+            raise RuntimeError(f"Simulated outage for {model}")
+
+
+# --- Gemini ---
+
+def _user_content(message: Any) -> "types.Content":
+    if isinstance(message, str):
+        return types.Content(role="user", parts=[types.Part.from_text(text=message)])
+    parts = message if isinstance(message, list) else [message]
+    return types.Content(role="user", parts=parts)
+
+
+class FakeChat:
+    """
+    Mimics google.genai.chats.Chat for a scripted conversation.
+
+    Like the real Chat it keeps the full history, so the script step is
+    derived from the model turns since the last user text message.
+    """
+    def __init__(self, client: "FakeGeminiClient", model: str, history: Optional[list] = None):
+        self.client = client
+        self.model = model
+        self._history = list(history or [])
+
+    def get_history(self, curated: bool = False) -> list:
+        return list(self._history)
+
+    def _next_response(self, message: Any) -> "types.GenerateContentResponse":
+        self.client.check_model(self.model)
+        self.client.calls += 1
+        self._history.append(_user_content(message))
+        prompt, index = gemini_turn_position(self._history)
+        input_tokens = sum(_tokens(str(c.parts)) for c in self._history)
+        steps = _steps_for(self.client.script, prompt, gemini_earlier_prompts(self._history))
+        step = _step_at(steps, index)
+        response = gemini_response(render_step(step, _latest_gemini_tool_result(self._history)), input_tokens)
+        self._history.append(response.candidates[0].content)
+        return response
+
+    def send_message(self, message: Any, config: Any = None):
+        latency = self.client.latency_for(self.model)
+        if latency:
+            time.sleep(latency)
+        return self._next_response(message)
+
+    def send_message_stream(self, message: Any, config: Any = None):
+        latency = self.client.latency_for(self.model)
+        if latency:
+            time.sleep(latency)
+        response = self._next_response(message)
+        parts = response.candidates[0].content.parts
+        if parts[0].text is None:
+            yield response
+            return
+        for chunk in _text_chunks(parts[0].text):
+            yield gemini_response(chunk)
+
+
+class FakeAsyncChat(FakeChat):
+    """Mimics google.genai.chats.AsyncChat."""
+    async def send_message(self, message: Any, config: Any = None):
+        latency = self.client.latency_for(self.model)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._next_response(message)
+
+
+class _FakeChats:
+    def __init__(self, client: "FakeGeminiClient", chat_cls: type):
+        self.client = client
+        self.chat_cls = chat_cls
+
+    def create(self, model: str, config: Any = None, history: Optional[list] = None):
+        self.client.last_config = config
+        self.client.last_history = list(history or [])
+        return self.chat_cls(self.client, model, history)
+
+
+class _FakeAio:
+    def __init__(self, client: "FakeGeminiClient"):
+        self.chats = _FakeChats(client, FakeAsyncChat)
+
+
+class FakeGeminiClient(_FakeClientBase):
+    """
+    Stand-in for genai.Client.
+
+    Args:
+        script: Steps for each user turn, or a callable prompt -> steps
+        latency: Simulated seconds per model round trip, or a dict of model -> seconds
+        failing_models: Models whose calls raise (simulated outage)
+    """
+    def __init__(
+        self,
+        script: Optional[Script] = None,
+        latency: Union[float, Dict[str, float]] = 0.0,
+        failing_models: Optional[set] = None,
+    ):
+        super().__init__(script, latency, failing_models)
+        self.last_config = None
+        self.last_history: list = []
+        self.chats = _FakeChats(self, FakeChat)
+        self.aio = _FakeAio(self)
+
+
+# --- OpenRouter (OpenAI-compatible) ---
+
+def _role(message: Any) -> str:
+    return message["role"] if isinstance(message, dict) else message.role
+
+
+class _FakeCompletions:
+    def __init__(self, client: "FakeOpenRouterClient"):
+        self.client = client
+
+    def _next_completion(self, model: str, messages: list) -> ChatCompletion:
+        self.client.calls += 1
+        prompt, index = openai_turn_position(messages)
+        steps = _steps_for(self.client.script, prompt, openai_earlier_prompts(messages))
+        input_tokens = sum(_tokens(str(m)) for m in messages)
+        step = render_step(_step_at(steps, index), _latest_openai_tool_result(messages))
+        return openai_completion(step, model, input_tokens)
+
+    def create(self, model: str, messages: list, tools: Any = None, tool_choice: Any = None, stream: bool = False, **kwargs):
+        latency = self.client.latency_for(model)
+        if latency:
+            time.sleep(latency)
+        self.client.check_model(model)
+        completion = self._next_completion(model, messages)
+        return iter(openai_chunks(completion)) if stream else completion
+
+
+class _FakeAsyncCompletions(_FakeCompletions):
+    async def create(self, model: str, messages: list, tools: Any = None, tool_choice: Any = None, **kwargs):
+        latency = self.client.latency_for(model)
+        if latency:
+            await asyncio.sleep(latency)
+        self.client.check_model(model)
+        return self._next_completion(model, messages)
+
+
+class _FakeChatNamespace:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class FakeOpenRouterClient(_FakeClientBase):
+    """
+    Stand-in for openai.OpenAI / openai.AsyncOpenAI pointed at OpenRouter.
+
+    Args:
+        script: Steps for each user turn, or a callable prompt -> steps
+        latency: Simulated seconds per completion, or a dict of model -> seconds
+        is_async: Return coroutines from chat.completions.create
+        failing_models: Models whose completions raise (simulated outage)
+    """
+    def __init__(
+        self,
+        script: Optional[Script] = None,
+        latency: Union[float, Dict[str, float]] = 0.0,
+        is_async: bool = False,
+        failing_models: Optional[set] = None,
+    ):
+        super().__init__(script, latency, failing_models)
+        completions = _FakeAsyncCompletions(self) if is_async else _FakeCompletions(self)
+        self.chat = _FakeChatNamespace(completions)
@@ -0,0 +1,118 @@
+"""
+LLM-free fast path for ticket status checks.
+
+Ticket numbers carry their service domain in the prefix (EMER-, POWR-,
+SANI-, INFR-, UTIL-), so "status of POWR-AB12CD34" or "any update on my
+ticket?" can be answered by calling the matching get_*_ticket_status tool
+directly and rendering a template, without a Gemini/OpenRouter round trip.
+
+Only pure status queries take the fast path: a bare ticket number, or a
+message made up entirely of status wording ("any update on my ticket?").
+Anything else in the message (new details, another request such as cancel
+or escalate, a question about the office) goes to the LLM, so nothing the
+citizen said is dropped for a canned reply.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+# Ticket prefix -> (service, status tool) as created by the MCP servers
+TICKET_STATUS_TOOLS = {
+    "EMER": ("Emergency", "get_emergency_ticket_status"),
+    "POWR": ("Power", "get_power_ticket_status"),
+    "SANI": ("Sanitation", "get_sanitation_ticket_status"),
+    "INFR": ("Infrastructure", "get_infrastructure_ticket_status"),
+    "UTIL": ("Utility", "get_ticket_status"),
+}
+
+TICKET_RE = re.compile(r"\b(" + "|".join(TICKET_STATUS_TOOLS) + r")-([0-9A-F]{8})\b", re.IGNORECASE)
+STATUS_INTENT_RE = re.compile(
+    r"\b(status|check|track|tracking|update|updates|progress|follow[- ]?up|where|happened|happening|news)\b",
+    re.IGNORECASE,
+)
+MY_TICKET_RE = re.compile(r"\b(my|the|last) (ticket|report|request|complaint)\b", re.IGNORECASE)
+# "update my ticket ..." asks to change the ticket, not for its status
+UPDATE_REQUEST_RE = re.compile(r"\bupdate (my|the|this|that|it)\b", re.IGNORECASE)
+WORD_RE = re.compile(r"[^\W_]+(?:'[a-z]+)?", re.IGNORECASE)
+
+# Words a pure status query may consist of; any other word sends the message to the LLM
+STATUS_WORDS = frozenset("""
+    status check track tracking update updates progress follow up followup where happened happening news
+    a about an any are can could current did do does for give has have hello hey hi how i is it
+    its it's kindly know last latest me my now number of on please pls regarding report request
+    complaint see show so tell thank thanks the there this ticket to want what what's whats with
+    you
+""".split())
+
+
+class StatusRequest:
+    """A status check that can be served without the LLM."""
+    def __init__(self, ticket_number: str, service: str, tool_name: str):
+        self.ticket_number = ticket_number
+        self.service = service
+        self.tool_name = tool_name
+
+
+def match_status_request(prompt: str, state: Dict[str, Any]) -> Optional[StatusRequest]:
+    """
+    Detect a ticket status check in a user message.
+
+    Args:
+        prompt: User message
+        state: Session state (used for "my ticket" via last_ticket_number)
+
+    Returns:
+        StatusRequest, or None if the message needs the LLM
+    """
+    match = TICKET_RE.search(prompt)
+    if match:
+        if len(TICKET_RE.findall(prompt)) > 1:
+            return None
+        ticket_number = f"{match.group(1)}-{match.group(2)}".upper()
+        # A bare ticket number is a status check too
+        rest = TICKET_RE.sub("", prompt)
+        if not WORD_RE.search(rest) or is_pure_status_query(rest):
+            return _request_for(ticket_number)
+        return None
+
+    last_ticket = state.get('last_ticket_number')
+    if last_ticket and MY_TICKET_RE.search(prompt) and is_pure_status_query(prompt):
+        return _request_for(str(last_ticket).upper())
+    return None
+
+
+def is_pure_status_query(text: str) -> bool:
+    """True if `text` asks for a status and says nothing else."""
+    if not STATUS_INTENT_RE.search(text) or UPDATE_REQUEST_RE.search(text):
+        return False
+    return all(word.lower() in STATUS_WORDS for word in WORD_RE.findall(text))
+
+
+def _request_for(ticket_number: str) -> Optional[StatusRequest]:
+    service, tool_name = TICKET_STATUS_TOOLS.get(ticket_number.split("-", 1)[0], (None, None))
+    if tool_name is None:
+        return None
+    return StatusRequest(ticket_number, service, tool_name)
+
+
+def render_status(request: StatusRequest, result: Dict[str, Any]) -> str:
+    """Render a status tool result in the agents' response style."""
+    if not result or "error" in result:
+        return (
+            f"I couldn't find {request.service.lower()} ticket {request.ticket_number}. "
+            "Please double-check the ticket number and try again."
+        )
+
+    lines = [f"🎫 Ticket {result.get('ticket_number', request.ticket_number)} ({request.service})"]
+    if result.get('emergency_type'):
+        lines.append(f"🚨 Type: {result['emergency_type']}")
+    if result.get('woreda'):
+        lines.append(f"📍 Woreda: {result['woreda']}")
+    lines.append(f"📌 Current status: {result.get('status', 'UNKNOWN')}")
+    if result.get('created_at'):
+        lines.append(f"🕒 Reported: {result['created_at']}")
+    if result.get('updated_at'):
+        lines.append(f"🔄 Last updated: {result['updated_at']}")
+    lines.append("")
+    lines.append("The responsible woreda office is handling your request. Please keep this number for follow-up.")
+    return "\n".join(lines)
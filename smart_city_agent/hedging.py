@@ -0,0 +1,187 @@
+"""
+Hedged LLM requests for Addis-Sync.
+
+When the primary model has not answered within a percentile deadline (taken
+from its recent latencies in the provider health registry), the same request
+is launched on the next-best model and whichever answers first wins. The
+loser is cancelled (async) or abandoned (threads cannot be interrupted).
+
+Only the LLM completion step is ever raced: tools requested by the winning
+response run once, after the race is decided.
+"""
+
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_PERCENTILE = 0.9
+DEFAULT_DELAY = 3.0             # deadline while a model has too few samples
+MIN_DELAY = 0.5
+MAX_DELAY = 10.0
+MIN_SAMPLES = 5
+GEMINI_BACKUP_MODEL = "gemini-2.5-flash"
+
+
+class HedgeConfig:
+    """
+    Opt-in hedging settings for AdkApp.
+
+    Args:
+        percentile: Latency percentile of the primary model used as the hedge deadline
+        min_delay: Lower bound for the deadline in seconds
+        max_delay: Upper bound for the deadline in seconds
+        default_delay: Deadline used until the model has min_samples successes
+        min_samples: Successful calls needed before the percentile is trusted
+        gemini_backup_model: Gemini model raced against the primary (None disables Gemini hedging)
+    """
+    def __init__(
+        self,
+        percentile: float = DEFAULT_PERCENTILE,
+        min_delay: float = MIN_DELAY,
+        max_delay: float = MAX_DELAY,
+        default_delay: float = DEFAULT_DELAY,
+        min_samples: int = MIN_SAMPLES,
+        gemini_backup_model: Optional[str] = GEMINI_BACKUP_MODEL,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.gemini_backup_model = gemini_backup_model
+
+    def deadline(self, latencies: List[float]) -> float:
+        """Seconds to wait for the primary before hedging (nearest-rank percentile)."""
+        if len(latencies) < self.min_samples:
+            delay = self.default_delay
+        else:
+            ranked = sorted(latencies)
+            index = min(len(ranked) - 1, max(0, int(round(self.percentile * len(ranked))) - 1))
+            delay = ranked[index]
+        return min(max(delay, self.min_delay), self.max_delay)
+
+
+class HedgeStats:
+    """Thread-safe counters for hedge rate and which side won."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.primary_wins = 0       # hedged, but the primary still answered first
+        self.backup_wins = 0
+        self.failures = 0           # hedged and both sides failed
+
+    def record(self, hedged: bool, backup_won: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            if not hedged:
+                return
+            self.hedged += 1
+            if failed:
+                self.failures += 1
+            elif backup_won:
+                self.backup_wins += 1
+            else:
+                self.primary_wins += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else 0.0,
+                "primary_wins": self.primary_wins,
+                "backup_wins": self.backup_wins,
+                "backup_win_rate": round(self.backup_wins / self.hedged, 3) if self.hedged else 0.0,
+                "failures": self.failures,
+            }
+
+
+def hedged_call(
+    executor: Executor,
+    delay: float,
+    primary: Callable[[], Any],
+    backup: Optional[Callable[[], Any]],
+    stats: HedgeStats,
+) -> Tuple[Any, bool]:
+    """
+    Run primary; if it is still pending after delay, race it against backup.
+
+    Args:
+        executor: Pool the two legs run on
+        delay: Hedge deadline in seconds
+        primary: Zero-argument call to the primary model
+        backup: Zero-argument call to the next-best model (None: no hedge)
+        stats: Where the hedge outcome is counted
+
+    Returns:
+        (result, backup_won)
+    """
+    if backup is None:
+        result = primary()
+        stats.record(hedged=False)
+        return result, False
+
+    primary_future = executor.submit(contextvars.copy_context().run, primary)
+    done, _ = wait([primary_future], timeout=delay)
+    if done:
+        stats.record(hedged=False)
+        return primary_future.result(), False
+
+    print(f"⏱️ Primary model slower than {delay:.2f}s, hedging...")
+    backup_future = executor.submit(contextvars.copy_context().run, backup)
+    pending = {primary_future, backup_future}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # The loser keeps running in its thread; its result is discarded
+                for loser in pending:
+                    loser.cancel()
+                backup_won = future is backup_future
+                stats.record(hedged=True, backup_won=backup_won)
+                return future.result(), backup_won
+            if error is None or future is primary_future:
+                error = future.exception()
+    stats.record(hedged=True, failed=True)
+    raise error
+
+
+async def hedged_call_async(
+    delay: float,
+    primary: Callable[[], Awaitable[Any]],
+    backup: Optional[Callable[[], Awaitable[Any]]],
+    stats: HedgeStats,
+) -> Tuple[Any, bool]:
+    """Async twin of hedged_call; the losing task is cancelled."""
+    if backup is None:
+        result = await primary()
+        stats.record(hedged=False)
+        return result, False
+
+    primary_task = asyncio.ensure_future(primary())
+    done, _ = await asyncio.wait([primary_task], timeout=delay)
+    if done:
+        stats.record(hedged=False)
+        return primary_task.result(), False
+
+    print(f"⏱️ Primary model slower than {delay:.2f}s, hedging...")
+    backup_task = asyncio.ensure_future(backup())
+    pending = {primary_task, backup_task}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                backup_won = task is backup_task
+                stats.record(hedged=True, backup_won=backup_won)
+                return task.result(), backup_won
+            if error is None or task is primary_task:
+                error = task.exception()
+    stats.record(hedged=True, failed=True)
+    raise error
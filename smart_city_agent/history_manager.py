@@ -0,0 +1,176 @@
+"""
+Token-budgeted History Window for Addis-Sync.
+
+Session.history (a Transcript) keeps every exchange, but replaying all of it on
+every turn makes latency and cost grow with the conversation. The history
+manager sends the model a bounded window instead:
+
+- the most recent turns, newest first, until the token budget is spent
+- pinned turns (the latest few that created or quoted a ticket number) at any age
+- a rolling summary of everything older, built incrementally and capped
+
+The summary is extractive (no extra LLM round trip) and always keeps the
+ticket numbers that were mentioned.
+"""
+
+import os
+from typing import Iterable, List, Optional
+
+from .fast_path import TICKET_RE
+from .prompt_compiler import estimate_tokens
+from .transcript import gemini_pair, openai_pair
+
+HISTORY_TOKEN_BUDGET = int(os.environ.get("ADK_HISTORY_TOKENS", "1500"))
+SUMMARY_TOKEN_BUDGET = 300
+MIN_RECENT_TURNS = 1            # the last exchange is always sent verbatim
+MAX_PINNED_TURNS = 5            # older pinned turns fall back to the summary's ticket list
+SUMMARY_SNIPPET_CHARS = 120
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+SUMMARY_ACK = "Understood, I will keep that context in mind."
+
+
+def content_text(content) -> str:
+    """Plain text of a google.genai Content (function calls/responses are skipped)."""
+    return " ".join(p.text for p in content.parts or [] if p.text)
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_SNIPPET_CHARS:
+        return text
+    return text[:SUMMARY_SNIPPET_CHARS - 1].rstrip() + "…"
+
+
+class HistoryWindow:
+    """Per-session bookkeeping: pinned turns and the rolling summary."""
+    def __init__(self):
+        self.pinned = set()         # turn indexes sent verbatim at any age
+        self.summary_lines: List[str] = []
+        self.tickets: List[str] = []
+        self.summarized_turns = 0   # turns [0, summarized_turns) are covered by the summary
+
+    def summary_text(self) -> str:
+        if not self.summary_lines and not self.tickets:
+            return ""
+        lines = [SUMMARY_HEADER]
+        if self.tickets:
+            lines.append(f"Tickets mentioned: {', '.join(self.tickets)}")
+        lines.extend(self.summary_lines)
+        return "\n".join(lines)
+
+
+class HistoryManager:
+    """
+    Builds the history sent to the providers from Session.history (Gemini
+    Content via build(), OpenAI messages via build_messages()).
+
+    Args:
+        budget: Token budget for the verbatim turns (None sends the full history)
+        summary_budget: Token cap of the rolling summary
+    """
+    def __init__(self, budget: Optional[int] = HISTORY_TOKEN_BUDGET, summary_budget: int = SUMMARY_TOKEN_BUDGET):
+        self.budget = budget
+        self.summary_budget = summary_budget
+
+    @staticmethod
+    def window_for(session) -> HistoryWindow:
+        if session.history_window is None:
+            session.history_window = HistoryWindow()
+        return session.history_window
+
+    def record_turn(self, session, prompt: str, final_text: str, tools: Iterable = ()) -> None:
+        """Append one exchange (and the tools it used) to the session transcript, pinning ticket turns."""
+        turn = len(session.history.turns)
+        session.history.record(prompt, final_text, tools)
+        if TICKET_RE.search(prompt) or TICKET_RE.search(final_text):
+            pinned = self.window_for(session).pinned
+            pinned.add(turn)
+            if len(pinned) > MAX_PINNED_TURNS:
+                pinned.discard(min(pinned))
+
+    def select(self, session) -> tuple[str, List[int]]:
+        """
+        Turns to replay this turn.
+
+        Returns:
+            (rolling summary text or "", indexes of the pinned + recent turns in chronological order)
+        """
+        turns = session.history.turns
+        if self.budget is None or not turns:
+            return "", list(range(len(turns)))
+
+        window = self.window_for(session)
+
+        # Newest turns first until the budget is spent
+        spent = 0
+        cutoff = len(turns)
+        for index in range(len(turns) - 1, -1, -1):
+            cost = turns[index].tokens
+            if index in window.pinned:
+                spent += cost
+                continue
+            if spent + cost > self.budget and len(turns) - index > MIN_RECENT_TURNS:
+                break
+            spent += cost
+            cutoff = index
+
+        self._fold(window, turns, max(cutoff, window.summarized_turns))
+        selected = [
+            index for index in range(len(turns))
+            if index in window.pinned or index >= window.summarized_turns
+        ]
+        return window.summary_text(), selected
+
+    def build(self, session) -> list:
+        """
+        History to replay for this turn (Gemini Content list).
+
+        Returns:
+            [summary exchange] + pinned turns + recent turns, in chronological order
+        """
+        summary, selected = self.select(session)
+        contents = list(gemini_pair(summary, SUMMARY_ACK)) if summary else []
+        for index in selected:
+            contents.extend(session.history.gemini_turn(index))
+        return contents
+
+    def build_messages(self, session) -> List[dict]:
+        """The same window as build(), as OpenAI user/assistant messages."""
+        summary, selected = self.select(session)
+        messages = list(openai_pair(summary, SUMMARY_ACK)) if summary else []
+        for index in selected:
+            messages.extend(session.history.openai_turn(index))
+        return messages
+
+    def _fold(self, window: HistoryWindow, turns: list, cutoff: int) -> None:
+        """Fold unpinned turns older than cutoff into the rolling summary."""
+        for index in range(window.summarized_turns, cutoff):
+            turn = turns[index]
+            for match in TICKET_RE.finditer(f"{turn.prompt} {turn.reply}"):
+                ticket = f"{match.group(1)}-{match.group(2)}".upper()
+                if ticket not in window.tickets:
+                    window.tickets.append(ticket)
+            if index in window.pinned:
+                continue
+            window.summary_lines.append(f"- Citizen: {_snippet(turn.prompt)} | Assistant: {_snippet(turn.reply)}")
+        window.summarized_turns = max(window.summarized_turns, cutoff)
+
+        # Keep the summary itself bounded: drop the oldest lines first
+        while window.summary_lines and estimate_tokens(window.summary_text()) > self.summary_budget:
+            window.summary_lines.pop(0)
+
+    def report(self, session) -> dict:
+        """Token counts of the full history versus the window sent to the model."""
+        turns = session.history.turns
+        summary, selected = self.select(session)
+        sent = sum(turns[index].tokens for index in selected)
+        if summary:
+            sent += estimate_tokens(summary) + estimate_tokens(SUMMARY_ACK)
+        window = self.window_for(session)
+        return {
+            "turns": len(turns),
+            "full_tokens": sum(turn.tokens for turn in turns),
+            "window_tokens": sent,
+            "pinned_turns": sorted(window.pinned),
+            "summarized_turns": window.summarized_turns,
+        }
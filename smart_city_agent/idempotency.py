@@ -0,0 +1,212 @@
+"""
+Idempotent Ticket Creation for Addis-Sync.
+
+A turn can call a create_*_ticket tool more than once: Gemini creates the
+ticket, the loop fails afterwards and the whole turn is redone with an
+OpenRouter model, or a model repeats the same function call. Each repeat
+used to write a new ticket with a new uuid-based number.
+
+Every turn runs inside a turn scope (session id + a fresh turn id). Calls to
+an @idempotent tool are keyed by the turn scope, the tool name and the
+normalized identifying arguments; a repeat within the same turn (and within
+the TTL) returns the original ticket without touching the database. The
+ticket tools identify a ticket by woreda (and emergency type), not by the
+free-text issue_description: a fallback model rephrases the description, and
+that must not file a second ticket. Concurrent
+duplicates wait for the first call instead of racing it. Failed calls are not
+remembered, so a retry after an error really retries.
+
+Calls outside a turn (admin app, scripts) are never deduplicated.
+"""
+
+import os
+import json
+import time
+import uuid
+import inspect
+import hashlib
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from .tracing import Tracer
+
+IDEMPOTENCY_TTL = float(os.environ.get("ADK_IDEMPOTENCY_TTL", "600"))
+MAX_ENTRIES = 10000
+WAIT_TIMEOUT = 30.0
+
+_turn_scope: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("adk_turn_scope", default=None)
+
+
+@contextmanager
+def turn_scope(session_id: str, turn_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Mark the calls made inside the block as belonging to one turn.
+
+    Provider fallback and retries inside the block share the scope; tool
+    threads see it as long as they run in a copy of the caller's context.
+    """
+    scope = f"{session_id}:{turn_id or uuid.uuid4().hex[:12]}"
+    token = _turn_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        try:
+            _turn_scope.reset(token)
+        except ValueError:
+            # Generator scopes may be closed from another context
+            _turn_scope.set(None)
+
+
+def current_turn_scope() -> Optional[str]:
+    return _turn_scope.get()
+
+
+def _normalize(value: Any) -> Any:
+    """Case/whitespace-insensitive form of tool arguments ("Bole " == "bole")."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def idempotency_key(scope: str, tool_name: str, args: Dict[str, Any]) -> str:
+    """Stable key for one tool call within a turn (`args`: the identifying arguments)."""
+    payload = json.dumps(_normalize(args), sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+    return f"{scope}:{tool_name}:{digest}"
+
+
+class IdempotencyCache:
+    """
+    Short-lived results of idempotent calls, keyed by idempotency_key.
+
+    Args:
+        ttl: Seconds a result is replayed for
+        max_entries: Oldest entries are dropped beyond this
+    """
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, key: str, func: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Return the remembered result for `key`, or call `func` and remember it.
+
+        Returns:
+            (result, replayed)
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                future, owner = entry[1], False
+            else:
+                self.misses += 1
+                future, owner = Future(), True
+                # Entries share one TTL, so insertion order is expiry order
+                self._entries[key] = (time.monotonic() + self.ttl, future)
+
+        if not owner:
+            # A duplicate still in flight is waited for, not raced
+            return future.result(timeout=WAIT_TIMEOUT), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                self._entries.pop(key, None)
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result, False
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            expires_at, _ = next(iter(self._entries.values()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_s": self.ttl,
+            }
+
+
+_cache: Optional[IdempotencyCache] = None
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    """Process-wide cache shared by every idempotent tool."""
+    global _cache
+    if _cache is None:
+        _cache = IdempotencyCache()
+    return _cache
+
+
+def idempotent(func: Optional[Callable] = None, *, identity: Optional[Sequence[str]] = None) -> Callable:
+    """
+    Make a tool return its first result when repeated within the same turn.
+
+    Apply below @server.tool() so the registry holds the wrapped function.
+
+    Args:
+        identity: Arguments that identify the call (default: all of them);
+            free text such as issue_description should be left out
+
+    Usage:
+        @idempotent(identity=("woreda",))
+        def create_power_ticket(woreda: str, issue_description: str) -> dict: ...
+    """
+    if func is None:
+        return functools.partial(idempotent, identity=identity)
+
+    signature = inspect.signature(func)
+    unknown = set(identity or ()) - set(signature.parameters)
+    if unknown:
+        raise ValueError(f"{func.__name__} has no arguments {sorted(unknown)}")
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        scope = current_turn_scope()
+        if scope is None:
+            return func(*args, **kwargs)
+        # Defaults are filled in so omitted and explicit default arguments match
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        if identity is not None:
+            arguments = {name: arguments[name] for name in identity}
+        key = idempotency_key(scope, func.__name__, arguments)
+        result, replayed = get_idempotency_cache().run(key, lambda: func(*args, **kwargs))
+        if replayed:
+            print(f"♻️ Idempotent replay: {func.__name__} -> {str(result)[:60]}")
+            span = Tracer.current_span()
+            if span is not None:
+                span.set(idempotent_replay=True)
+        return result
+
+    return wrapper
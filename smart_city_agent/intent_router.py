@@ -0,0 +1,183 @@
+"""
+Local Intent Router for Addis-Sync.
+
+Picks the target specialist agent in-process before the LLM call, so a
+confident turn only carries that specialist's instruction and tools instead
+of the root prompt, all five specialist prompts and all 15 tools.
+
+The classifier is trained from the agents themselves:
+- keywords and routing examples in the root agent's SERVICE DOMAINS section
+- each specialist's description, RESPONSIBILITIES bullets and tool names
+It combines keyword hits with character n-gram (TF-IDF cosine) similarity.
+When unsure it returns no route and the caller falls back to the full prompt.
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Minimum share of the total score the best agent needs to be routed
+DEFAULT_THRESHOLD = 0.6
+# Minimum raw score of the best agent ("Hello" should not be routed anywhere)
+MIN_SCORE = 0.25
+# A keyword hit outweighs any n-gram similarity (cosine is in [0, 1])
+KEYWORD_WEIGHT = 1.0
+NGRAM_SIZES = (3, 4)
+# Short follow-ups ("Bole", "0911...") with no signal stay with the previous route
+STICKY_MAX_WORDS = 3
+
+_DOMAIN_RE = re.compile(r"^####.*→\s*(.+?)\s*$")
+_KEYWORDS_RE = re.compile(r"^\*\*Keywords:\*\*\s*(.+)$")
+_EXAMPLE_RE = re.compile(r'^User:\s*"(.+)"\s*$')
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _ngrams(text: str) -> Counter:
+    grams = Counter()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                grams[padded[i:i + n]] += 1
+    return grams
+
+
+class RouteDecision:
+    """Result of classifying one user message."""
+    def __init__(self, agent_name: Optional[str], confidence: float, scores: Dict[str, float]):
+        self.agent_name = agent_name
+        self.confidence = confidence
+        self.scores = scores
+
+    def __repr__(self) -> str:
+        return f"RouteDecision(agent_name={self.agent_name!r}, confidence={self.confidence:.2f})"
+
+
+class IntentRouter:
+    """
+    Keyword + character n-gram intent classifier over specialist agents.
+
+    Args:
+        profiles: agent name -> training texts
+        keywords: agent name -> keywords/phrases (matched on word boundaries)
+        threshold: Minimum confidence needed to route
+    """
+    def __init__(
+        self,
+        profiles: Dict[str, List[str]],
+        keywords: Dict[str, List[str]],
+        threshold: float = DEFAULT_THRESHOLD,
+    ):
+        self.threshold = threshold
+        self.agent_names = list(profiles)
+        self._keyword_patterns = {
+            name: [re.compile(rf"\b{re.escape(kw.lower())}") for kw in keywords.get(name, [])]
+            for name in self.agent_names
+        }
+
+        # TF-IDF weighted n-gram centroid per agent
+        counts = {name: _ngrams(" ".join(texts)) for name, texts in profiles.items()}
+        doc_freq = Counter()
+        for grams in counts.values():
+            doc_freq.update(grams.keys())
+        total = len(counts)
+        self._idf = {g: math.log((1 + total) / (1 + df)) + 1.0 for g, df in doc_freq.items()}
+        self._vectors = {}
+        for name, grams in counts.items():
+            vec = {g: c * self._idf[g] for g, c in grams.items()}
+            norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+            self._vectors[name] = {g: v / norm for g, v in vec.items()}
+
+    @classmethod
+    def from_agent(cls, root_agent, threshold: float = DEFAULT_THRESHOLD) -> "IntentRouter":
+        """Train a router from a root agent and its sub-agents."""
+        by_label = {sub.name.replace("_", " ").lower(): sub.name for sub in root_agent.sub_agents}
+        profiles = {sub.name: [sub.description] for sub in root_agent.sub_agents}
+        keywords: Dict[str, List[str]] = {sub.name: [] for sub in root_agent.sub_agents}
+
+        # Root SERVICE DOMAINS: "#### ... → Power Agent", keywords, bullets, examples
+        current = None
+        for line in root_agent.instruction.splitlines():
+            line = line.strip()
+            domain = _DOMAIN_RE.match(line)
+            if domain:
+                current = by_label.get(domain.group(1).lower())
+                continue
+            if line.startswith("### "):
+                current = None
+                continue
+            if current is None:
+                continue
+            kw = _KEYWORDS_RE.match(line)
+            example = _EXAMPLE_RE.match(line)
+            if kw:
+                keywords[current].extend(k.strip() for k in kw.group(1).split(",") if k.strip())
+            elif example:
+                profiles[current].append(example.group(1))
+            elif line.startswith("- "):
+                profiles[current].append(line[2:])
+
+        # Specialist RESPONSIBILITIES bullets and tool names
+        for sub in root_agent.sub_agents:
+            in_responsibilities = False
+            for line in sub.instruction.splitlines():
+                if line.startswith("### "):
+                    in_responsibilities = line[4:].strip() == "RESPONSIBILITIES"
+                elif in_responsibilities and line.startswith("- "):
+                    profiles[sub.name].append(line[2:])
+            profiles[sub.name].extend(t.__name__.replace("_", " ") for t in sub.tools)
+
+        return cls(profiles, keywords, threshold=threshold)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Raw per-agent scores (keyword hits + n-gram cosine)."""
+        lowered = text.lower()
+        grams = _ngrams(text)
+        vec = {g: c * self._idf[g] for g, c in grams.items() if g in self._idf}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+
+        result = {}
+        for name in self.agent_names:
+            hits = sum(1 for p in self._keyword_patterns[name] if p.search(lowered))
+            profile = self._vectors[name]
+            cosine = sum(v * profile.get(g, 0.0) for g, v in vec.items()) / norm
+            result[name] = KEYWORD_WEIGHT * hits + cosine
+        return result
+
+    def classify(self, text: str) -> RouteDecision:
+        """
+        Classify a user message.
+
+        Returns:
+            RouteDecision with agent_name None when below the threshold
+        """
+        scores = self.scores(text)
+        total = sum(scores.values())
+        if not scores or total <= 0:
+            return RouteDecision(None, 0.0, scores)
+        best = max(scores, key=scores.get)
+        confidence = scores[best] / total
+        if confidence < self.threshold or scores[best] < MIN_SCORE:
+            return RouteDecision(None, confidence, scores)
+        return RouteDecision(best, confidence, scores)
+
+    def route(self, text: str, previous: Optional[str] = None) -> Optional[str]:
+        """
+        Pick the specialist for this turn, or None to use the full prompt.
+
+        Args:
+            text: User message
+            previous: Specialist the previous turn was routed to, if any
+
+        Returns:
+            Sub-agent name or None
+        """
+        decision = self.classify(text)
+        if decision.agent_name:
+            return decision.agent_name
+        # Keep answering a clarification ("Which woreda?") with the same specialist
+        has_keyword = any(p.search(text.lower()) for ps in self._keyword_patterns.values() for p in ps)
+        if previous in self._vectors and not has_keyword and len(_WORD_RE.findall(text.lower())) <= STICKY_MAX_WORDS:
+            return previous
+        return None
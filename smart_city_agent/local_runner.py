@@ -7,13 +7,35 @@ Now supports OpenRouter Fallback!
 import os
 import sys
 import uuid
-import inspect
 import json
+import time
+import asyncio
+import functools
+import threading
+import contextvars
 import traceback
-from typing import List, Dict, Any, Callable
+from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Iterator
 from dotenv import load_dotenv
 from pathlib import Path
 
+from .prompt_compiler import compile_instruction
+from .intent_router import IntentRouter
+from .fast_path import match_status_request, render_status
+from .provider_health import ProviderHealthRegistry, get_provider_health
+from .history_manager import HistoryManager
+from .transcript import Transcript, ToolExchange, tool_message_content
+from .tracing import Tracer, get_tracer
+from .idempotency import turn_scope
+from .tool_cache import TTL, cached_tool, cache_metrics
+from .tool_registry import ToolRegistry, ToolArgumentError
+from .providers import Providers, load_providers
+from .session_store import SessionStore, open_session_store
+from .session_eviction import SessionEvictor
+from .turn_locks import TurnLocks, get_turn_locks
+from .hedging import HedgeConfig, HedgeStats, hedged_call, hedged_call_async
+
 # Load env vars from project root (3 levels up from this file: smart_city_agent/local_runner.py)
 env_path = Path(__file__).resolve().parent.parent.parent / '.env'
 if env_path.exists():
@@ -37,8 +59,11 @@ except ImportError:
     openai = None
     print("WARNING: openai library not found. OpenRouter fallback will be disabled.")
 
-# Global Tool Registry
-TOOL_REGISTRY: Dict[str, Callable] = {}
+# Global Tool Registry (schemas and argument validators compiled at registration)
+TOOL_REGISTRY: ToolRegistry = ToolRegistry()
+
+# Worker threads used to run blocking tools (psycopg2) off the event loop
+TOOL_WORKERS = int(os.environ.get("ADK_TOOL_WORKERS", "32"))
 
 # User-requested Free Models
 OPENROUTER_MODELS = [
@@ -54,8 +79,17 @@ class MCPServer:
     def __init__(self, name: str):
         self.name = name
 
-    def tool(self):
+    def tool(self, cache: Optional[TTL] = None, key: Optional[Callable] = None):
+        """
+        Register a tool.
+
+        Args:
+            cache: Optional TTL policy; results are then served from a bounded LRU
+            key: Cache key from the tool's arguments (default: normalized arguments)
+        """
         def decorator(func):
+            if cache is not None:
+                func = cached_tool(func, cache, key)
             # Register the real function by name
             print(f"DEBUG: Registering tool {func.__name__} in {self.name}")
             TOOL_REGISTRY[func.__name__] = func
@@ -67,8 +101,10 @@ class Session:
     """Simple in-memory session state."""
     def __init__(self, session_id: str):
         self.id = session_id
-        self.history = []
+        self.history = Transcript() # Provider-neutral turns (reads as a list of Gemini Content)
+        self.history_window = None # Pinned turns + rolling summary (HistoryManager)
         self.state = {} # Arbitrary key-value storage for agents
+        self.version = 0 # Stored row version (SessionStore compare-and-set)
 
 class InMemorySessionService:
     """Mock implementation of Google ADK session service."""
@@ -80,10 +116,46 @@ class InMemorySessionService:
 
 SESSION_STORE: Dict[str, Session] = {}
 
+# Durable backend (ADK_SESSION_BACKEND); SESSION_STORE is then its hot cache
+_DURABLE_SESSIONS: Optional[SessionStore] = open_session_store(Session, hot=SESSION_STORE)
+
+def evict_session(session_id: str) -> None:
+    """Drop a session from memory (a durable store still writes and can reload it)."""
+    if _DURABLE_SESSIONS is not None:
+        _DURABLE_SESSIONS.evict(session_id)
+    else:
+        SESSION_STORE.pop(session_id, None)
+
+# TTL + count/memory caps over resident sessions (ADK_SESSION_TTL, _MAX, _MAX_MB)
+SESSION_EVICTOR = SessionEvictor(remove=evict_session)
+
+def use_session_store(store: Optional[SessionStore]) -> Optional[SessionStore]:
+    """Route get_session through a SessionStore (None = in-memory only); returns the previous one."""
+    global _DURABLE_SESSIONS
+    previous, _DURABLE_SESSIONS = _DURABLE_SESSIONS, store
+    if store is not None:
+        store.on_evict = SESSION_EVICTOR.forget
+    return previous
+
+if _DURABLE_SESSIONS is not None:
+    _DURABLE_SESSIONS.on_evict = SESSION_EVICTOR.forget
+
+def save_session(session: Session) -> None:
+    """End of a turn: re-measure the session and schedule its write-behind."""
+    SESSION_EVICTOR.resize(session)
+    if _DURABLE_SESSIONS is not None:
+        _DURABLE_SESSIONS.mark_dirty(session)
+
 def get_session(session_id: str) -> Session:
-    if session_id not in SESSION_STORE:
-        SESSION_STORE[session_id] = Session(session_id)
-    return SESSION_STORE[session_id]
+    if _DURABLE_SESSIONS is not None:
+        session = _DURABLE_SESSIONS.get(session_id)
+    else:
+        session = SESSION_STORE.get(session_id)
+        if session is None:
+            # setdefault is atomic, so concurrent first turns share one Session
+            session = SESSION_STORE.setdefault(session_id, Session(session_id))
+    SESSION_EVICTOR.touch(session)
+    return session
 
 class Agent:
     """Agent definition compatible with google.adk.agents.Agent."""
@@ -105,71 +177,147 @@ class Agent:
         self.sub_agents = sub_agents or []
 
 def get_function_schema(func: Callable) -> dict:
-    """Convert a Python function to OpenAI Tool Schema."""
-    sig = inspect.signature(func)
-    doc = inspect.getdoc(func) or "No description provided."
-    
-    properties = {}
-    required = []
-    
-    type_map = {
-        str: "string",
-        int: "integer",
-        float: "number",
-        bool: "boolean",
-        type(None): "null"
-    }
-
-    for name, param in sig.parameters.items():
-        param_type = type_map.get(param.annotation, "string") # Default to string
-        properties[name] = {
-            "type": param_type,
-            "description": f"Parameter: {name}" 
-        }
-        if param.default == inspect.Parameter.empty:
-            required.append(name)
-            
-    return {
-        "type": "function",
-        "function": {
-            "name": func.__name__,
-            "description": doc,
-            "parameters": {
-                "type": "object",
-                "properties": properties,
-                "required": required
-            }
-        }
-    }
+    """Convert a Python function to OpenAI Tool Schema (precompiled for registered tools)."""
+    return TOOL_REGISTRY.spec_for(func).openai_schema
+
+# Tool exchanges of the turn being answered (recorded with it in the transcript)
+_TURN_TOOLS: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("adk_turn_tools", default=None)
+# Session whose turn is being answered (looked up once per turn; post-tool hooks update its state)
+_TURN_SESSION: contextvars.ContextVar[Optional[Session]] = contextvars.ContextVar("adk_turn_session", default=None)
+
+# Post-tool hook: (session, tool name, arguments, result) -> None, called after a successful tool call
+ToolHook = Callable[[Session, str, dict, Any], None]
+
+
+@contextmanager
+def _turn_context(session_id: str, session: Optional[Session] = None) -> Iterator[Session]:
+    """
+    Resolve a turn's Session once and collect the ToolExchanges run for it (tool threads share the list).
+
+    The session is pinned for the block, so the evictor's caps and TTL sweep
+    never drop it mid-turn and every step of the turn works on one object.
+    """
+    SESSION_EVICTOR.pin(session_id)
+    try:
+        if session is None:
+            session = get_session(session_id)
+        tools_token = _TURN_TOOLS.set([])
+        session_token = _TURN_SESSION.set(session)
+        try:
+            yield session
+        finally:
+            try:
+                _TURN_SESSION.reset(session_token)
+                _TURN_TOOLS.reset(tools_token)
+            except ValueError:
+                # Generator turns may be closed from another context
+                _TURN_SESSION.set(None)
+                _TURN_TOOLS.set(None)
+    finally:
+        SESSION_EVICTOR.unpin(session_id)
+
+
+@asynccontextmanager
+async def _turn_context_async(session_id: str) -> AsyncIterator[Session]:
+    """Async twin of _turn_context: the lookup (a backend load on a miss) runs off the event loop."""
+    SESSION_EVICTOR.pin(session_id)
+    try:
+        session = await asyncio.to_thread(get_session, session_id)
+        with _turn_context(session_id, session):
+            yield session
+    finally:
+        SESSION_EVICTOR.unpin(session_id)
+
+
+def _session_for_turn(session_id: str) -> Session:
+    """The Session of the running turn (no second lookup), else get_session()."""
+    session = _TURN_SESSION.get()
+    if session is not None and session.id == session_id:
+        return session
+    return get_session(session_id)
+
+
+class StreamEvent:
+    """
+    Incremental output of AdkApp.run_stream.
+
+    kind is "text" (a text delta), "tool_call" (name + args in data) or
+    "tool_result" (name + {"result"/"error"} outcome in data).
+    """
+    def __init__(self, kind: str, text: str = "", name: str = "", data: Any = None):
+        self.kind = kind
+        self.text = text
+        self.name = name
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"StreamEvent(kind={self.kind!r}, text={self.text!r}, name={self.name!r})"
+
 
 class AdkApp:
     """
     Local Runner implementation that mimics AdkApp interface.
     Supports Dual-Mode: Gemini (Primary) -> OpenRouter (Fallback).
     """
-    def __init__(self, agent: Agent):
+    def __init__(
+        self,
+        agent: Agent,
+        use_intent_router: bool = True,
+        health: Optional[ProviderHealthRegistry] = None,
+        hedging: Optional[HedgeConfig] = None,
+        history_manager: Optional[HistoryManager] = None,
+        tracer: Optional[Tracer] = None,
+        providers: Optional[Providers] = None,
+        turn_locks: Optional[TurnLocks] = None,
+        tool_hooks: Optional[List[ToolHook]] = None
+    ):
         self.root_agent = agent
+
+        # Post-tool hooks (default: remember the citizen's woreda and last ticket in Session.state)
+        if tool_hooks is None:
+            from .session_manager import SESSION_STATE_HOOKS
+            tool_hooks = SESSION_STATE_HOOKS
+        self.tool_hooks: List[ToolHook] = list(tool_hooks)
+
+        # One turn at a time per session (per-session locks, shared process-wide by default)
+        self.turn_locks = turn_locks or get_turn_locks()
+
+        # Per-turn spans for provider, tool and SQL calls (shared process-wide by default)
+        self.tracer = tracer or get_tracer()
+
+        # Token-budgeted history window (recent + pinned turns, rolling summary)
+        self.history_manager = history_manager or HistoryManager()
+
+        # Rolling provider/model health with circuit breakers (shared process-wide by default)
+        self.health = health or get_provider_health()
+        self._gemini_key = ProviderHealthRegistry.key("gemini", agent.model)
+
+        # Local intent router: confident turns only carry one specialist's prompt and tools
+        self.intent_router = None
+        if use_intent_router and agent.sub_agents:
+            self.intent_router = IntentRouter.from_agent(agent)
         
-        # Load Gemini Client
-        self.gemini_key = os.environ.get("GOOGLE_API_KEY")
-        self.gemini_client = None
-        if self.gemini_key and genai:
-            self.gemini_client = genai.Client(api_key=self.gemini_key)
-            print(f"DEBUG: Gemini Client Initialized (Key: {self.gemini_key[:4]}***)")
-        else:
-            print(f"DEBUG: Gemini Client MISSING (Key: {bool(self.gemini_key)}, Lib: {bool(genai)})")
-            
-        # Load OpenRouter Client
-        self.openrouter_key = os.environ.get("OPENROUTER_API_KEY")
-        self.openrouter_client = None
-        if self.openrouter_key and openai:
-            self.openrouter_client = openai.OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=self.openrouter_key,
+        # LLM clients: live, recording, replaying or fake (ADK_PROVIDER)
+        self.providers = providers or load_providers()
+        self.gemini_client = self.providers.gemini
+        self.openrouter_client = self.providers.openrouter
+        self.openrouter_async_client = self.providers.openrouter_async
+
+        # Shared pool for running sync tools from the async path
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=TOOL_WORKERS,
+            thread_name_prefix="adk-tool"
+        )
+
+        # Opt-in hedging: race a slow LLM completion against the next-best model
+        self.hedging = hedging
+        self.hedge_stats = HedgeStats()
+        self._hedge_executor = None
+        if hedging:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=TOOL_WORKERS,
+                thread_name_prefix="adk-hedge"
             )
-            print(f"DEBUG: OpenRouter Client Initialized (Key: {self.openrouter_key[:4]}***)")
-        else:
-            print(f"DEBUG: OpenRouter Client MISSING (Key: {bool(self.openrouter_key)}, Lib: {bool(openai)})")
 
         # Pre-load MCP servers
         try:
@@ -190,76 +338,674 @@ class AdkApp:
 
     def run(self, user_id: str, session_id: str, prompt: str) -> str:
         """Main execution entry point."""
+        with self.tracer.span("turn", kind="turn", session_id=session_id, user_id=user_id), \
+                self._serialize_turn(session_id), turn_scope(session_id), _turn_context(session_id):
+        
+            # Ticket status checks are answered without the LLM
+            status_request = self._match_fast_path(session_id, prompt)
+            if status_request:
+                outcome = self._invoke_tool(status_request.tool_name, {"ticket_number": status_request.ticket_number})
+                reply = self._finish_fast_path(session_id, prompt, status_request, outcome)
+                if reply is not None:
+                    return reply
+        
+            # Try Gemini First (unless its circuit is open)
+            if self.gemini_client and self.health.allow(self._gemini_key):
+                try:
+                    print("🔵 Attempting execution with Gemini...")
+                    return self.run_with_gemini(user_id, session_id, prompt)
+                except Exception as e:
+                    print(f"⚠️ Gemini execution failed: {e}")
+                    print("🔄 Switching to OpenRouter Fallback...")
+        
+            # Fallback to OpenRouter
+            if self.openrouter_client:
+                try:
+                    return self.run_with_openrouter(user_id, session_id, prompt)
+                except Exception as e:
+                    return f"❌ All providers failed. OpenRouter error: {e}"
+            else:
+                return "❌ Configuration Error: Neither Gemini (failed) nor OpenRouter (missing key) are available."
+
+    async def run_async(self, user_id: str, session_id: str, prompt: str) -> str:
+        """
+        Asyncio entry point with the same Gemini -> OpenRouter fallback as run().
+
+        Provider calls go through the async clients and tools run on the
+        tool thread pool, so one event loop can multiplex many citizens.
+        """
+        with self.tracer.span("turn", kind="turn", session_id=session_id, user_id=user_id, mode="async"), \
+                turn_scope(session_id):
+            async with self._serialize_turn_async(session_id), _turn_context_async(session_id):
+        
+                # Ticket status checks are answered without the LLM
+                status_request = self._match_fast_path(session_id, prompt)
+                if status_request:
+                    outcomes = await self._run_tool_calls_async(
+                        [(status_request.tool_name, {"ticket_number": status_request.ticket_number})]
+                    )
+                    reply = self._finish_fast_path(session_id, prompt, status_request, outcomes[0])
+                    if reply is not None:
+                        return reply
+        
+                # Try Gemini First (unless its circuit is open)
+                if self.gemini_client and self.health.allow(self._gemini_key):
+                    try:
+                        print("🔵 Attempting async execution with Gemini...")
+                        return await self.run_with_gemini_async(user_id, session_id, prompt)
+                    except Exception as e:
+                        print(f"⚠️ Gemini execution failed: {e}")
+                        print("🔄 Switching to OpenRouter Fallback...")
+        
+                # Fallback to OpenRouter
+                if self.openrouter_async_client:
+                    try:
+                        return await self.run_with_openrouter_async(user_id, session_id, prompt)
+                    except Exception as e:
+                        return f"❌ All providers failed. OpenRouter error: {e}"
+                else:
+                    return "❌ Configuration Error: Neither Gemini (failed) nor OpenRouter (missing key) are available."
+
+    def run_stream(self, user_id: str, session_id: str, prompt: str) -> Iterator[StreamEvent]:
+        """
+        Streaming entry point: yields text deltas and tool progress events.
+
+        Falls back from Gemini to OpenRouter (and across OpenRouter models)
+        only while nothing has been shown to the user yet. Streamed calls are
+        not hedged: a half-shown answer cannot be swapped for the backup's.
+        """
+        with self.tracer.span("turn", kind="turn", session_id=session_id, user_id=user_id, mode="stream"), \
+                self._serialize_turn(session_id), turn_scope(session_id), _turn_context(session_id):
+        
+            # Ticket status checks are answered without the LLM
+            status_request = self._match_fast_path(session_id, prompt)
+            if status_request:
+                outcome = self._invoke_tool(status_request.tool_name, {"ticket_number": status_request.ticket_number})
+                reply = self._finish_fast_path(session_id, prompt, status_request, outcome)
+                if reply is not None:
+                    yield StreamEvent("text", reply)
+                    return
+        
+            # Try Gemini First (unless its circuit is open)
+            if self.gemini_client and self.health.allow(self._gemini_key):
+                emitted = False
+                try:
+                    print("🔵 Attempting streaming execution with Gemini...")
+                    for event in self._stream_with_gemini(session_id, prompt):
+                        emitted = emitted or event.kind == "text"
+                        yield event
+                    return
+                except Exception as e:
+                    print(f"⚠️ Gemini execution failed: {e}")
+                    if emitted:
+                        yield StreamEvent("text", f"\n\n❌ Response interrupted: {e}")
+                        return
+                    print("🔄 Switching to OpenRouter Fallback...")
+        
+            # Fallback to OpenRouter
+            if self.openrouter_client:
+                try:
+                    yield from self._stream_with_openrouter(session_id, prompt)
+                except Exception as e:
+                    yield StreamEvent("text", f"❌ All providers failed. OpenRouter error: {e}")
+            else:
+                yield StreamEvent("text", "❌ Configuration Error: Neither Gemini (failed) nor OpenRouter (missing key) are available.")
+
+    def _tool_events(self, calls: list[tuple[str, dict]]) -> Iterator[StreamEvent]:
+        """Run one batch of tool calls, yielding progress events; returns the outcomes."""
+        for fn_name, fn_args in calls:
+            yield StreamEvent("tool_call", name=fn_name, data=fn_args)
+        outcomes = self._run_tool_calls(calls)
+        for (fn_name, _), outcome in zip(calls, outcomes):
+            yield StreamEvent("tool_result", name=fn_name, data=outcome)
+        return outcomes
+
+    def _stream_with_gemini(self, session_id: str, prompt: str) -> Iterator[StreamEvent]:
+        session = _session_for_turn(session_id)
+        instruction, tools = self._prepare_context(session, prompt)
         
-        # Try Gemini First
-        if self.gemini_client:
+        chat = self.gemini_client.chats.create(
+            model=self.root_agent.model,
+            config=self._gemini_config(instruction, tools),
+            history=self.history_manager.build(session)
+        )
+        
+        # Gemini Agentic Loop (streamed)
+        final_text = ""
+        message = prompt
+        for _ in range(10):
+            function_calls = []
+            with self._observe(self._gemini_key) as span:
+                for chunk in chat.send_message_stream(message):
+                    self._record_usage(span, chunk)
+                    if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+                        continue
+                    for part in chunk.candidates[0].content.parts:
+                        if part.function_call:
+                            function_calls.append(part.function_call)
+                        elif part.text:
+                            final_text += part.text
+                            yield StreamEvent("text", part.text)
+            
+            if not function_calls:
+                break
+            
+            calls = [(fc.name, dict(fc.args or {})) for fc in function_calls]
+            for fn_name, _ in calls:
+                print(f"🤖 (Gemini) calling tool: {fn_name}")
+            outcomes = yield from self._tool_events(calls)
+            message = [
+                types.Part.from_function_response(name=fn_name, response=outcome)
+                for (fn_name, _), outcome in zip(calls, outcomes)
+            ]
+        
+        if not final_text:
+            final_text = "I processed that, but have no text response."
+            yield StreamEvent("text", final_text)
+        
+        self._record_turn(session, prompt, final_text)
+
+    def _stream_with_openrouter(self, session_id: str, prompt: str) -> Iterator[StreamEvent]:
+        session = _session_for_turn(session_id)
+        instruction, tools = self._prepare_context(session, prompt)
+        openai_tools = TOOL_REGISTRY.openai_tools(tools)
+        messages = self._openai_messages(session, instruction, prompt)
+        
+        # Try models in health order until one works (only before any text was streamed)
+        for model in self._openrouter_candidates():
+            if not self.health.allow(ProviderHealthRegistry.key("openrouter", model)):
+                continue
+            emitted = False
             try:
-                print("🔵 Attempting execution with Gemini...")
-                return self.run_with_gemini(user_id, session_id, prompt)
+                print(f"🟠 (OpenRouter) Streaming with model: {model}")
+                for event in self._stream_openai_loop(list(messages), openai_tools, model, session, prompt):
+                    emitted = emitted or event.kind == "text"
+                    yield event
+                return
             except Exception as e:
-                print(f"⚠️ Gemini execution failed: {e}")
-                print("🔄 Switching to OpenRouter Fallback...")
+                print(f"⚠️ Model {model} failed: {e}")
+                if emitted:
+                    raise
+                continue
+                
+        raise RuntimeError("All OpenRouter fallback models failed.")
+
+    def _stream_openai_loop(self, messages, tools, model, session, original_prompt) -> Iterator[StreamEvent]:
+        """OpenAI ReAct Loop with stream=True (tool call deltas are reassembled)."""
+        final_text = ""
+        for _ in range(10):
+            content = ""
+            tool_calls: Dict[int, dict] = {}
+            with self._observe(ProviderHealthRegistry.key("openrouter", model)) as span:
+                stream = self.openrouter_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="auto" if tools else None,
+                    stream=True
+                )
+                for chunk in stream:
+                    self._record_usage(span, chunk)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content += delta.content
+                        yield StreamEvent("text", delta.content)
+                    for tc in delta.tool_calls or []:
+                        slot = tool_calls.setdefault(tc.index, {
+                            "id": "", "type": "function", "function": {"name": "", "arguments": ""}
+                        })
+                        if tc.id:
+                            slot["id"] = tc.id
+                        if tc.function and tc.function.name:
+                            slot["function"]["name"] += tc.function.name
+                        if tc.function and tc.function.arguments:
+                            slot["function"]["arguments"] += tc.function.arguments
+            
+            final_text += content
+            assistant = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                assistant["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+            messages.append(assistant)
+            
+            if not tool_calls:
+                break
+            
+            calls = []
+            for tool_call in assistant["tool_calls"]:
+                fn_name = tool_call["function"]["name"]
+                print(f"🤖 (OpenRouter) calling tool: {fn_name}")
+                calls.append((fn_name, json.loads(tool_call["function"]["arguments"] or "{}")))
+            outcomes = yield from self._tool_events(calls)
+            for tool_call, outcome in zip(assistant["tool_calls"], outcomes):
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "content": self._tool_message_content(outcome)
+                })
+        
+        if not final_text:
+            yield StreamEvent("text", "No response generated.")
         
-        # Fallback to OpenRouter
-        if self.openrouter_client:
+        self._record_turn(session, original_prompt, final_text)
+
+    def _match_fast_path(self, session_id: str, prompt: str):
+        """Return a StatusRequest if this turn can skip the LLM."""
+        status_request = match_status_request(prompt, _session_for_turn(session_id).state)
+        if status_request and status_request.tool_name in TOOL_REGISTRY:
+            return status_request
+        return None
+
+    def _finish_fast_path(self, session_id: str, prompt: str, status_request, outcome: dict) -> Optional[str]:
+        """
+        Render a fast-path status reply, or None to fall back to the LLM.
+
+        Tool exceptions (e.g. database unavailable) fall back; a ticket that
+        does not exist is a normal templated answer.
+        """
+        if "error" in outcome:
+            print(f"⚠️ Fast path failed for {status_request.ticket_number}: {outcome['error']}")
+            return None
+        print(f"⚡ Fast path: {status_request.tool_name}({status_request.ticket_number})")
+        self._annotate_turn(fast_path=True)
+        reply = render_status(status_request, outcome["result"])
+        self._record_turn(_session_for_turn(session_id), prompt, reply)
+        return reply
+
+    @contextmanager
+    def _serialize_turn(self, session_id: str):
+        """Hold the session's turn lock for the block; a wait is recorded on the turn span."""
+        with self.turn_locks.hold(session_id) as waited:
+            if waited:
+                self._annotate_turn(lock_wait_ms=round(waited * 1000, 3))
+            yield
+
+    @asynccontextmanager
+    async def _serialize_turn_async(self, session_id: str):
+        """Async twin of _serialize_turn (the wait does not block the event loop)."""
+        async with self.turn_locks.hold_async(session_id) as waited:
+            if waited:
+                self._annotate_turn(lock_wait_ms=round(waited * 1000, 3))
+            yield
+
+    def _annotate_turn(self, **attributes) -> None:
+        """Attach attributes to the current turn span, if any."""
+        span = self.tracer.current_span()
+        if span is not None:
+            span.set(**attributes)
+
+    def _select_route(self, session: Session, prompt: str) -> Optional[str]:
+        """Ask the intent router for a specialist; None means use the full prompt."""
+        if not self.intent_router:
+            return None
+        issue_type = session.state.get('current_issue_type')
+        previous = f"{issue_type}_agent" if issue_type else None
+        route = self.intent_router.route(prompt, previous=previous)
+        self._annotate_turn(route=route or "full")
+        if route:
+            session.state['current_issue_type'] = route.removesuffix("_agent")
+            print(f"🧭 Intent router: {route}")
+        else:
+            print("🧭 Intent router: not confident, using full prompt")
+        return route
+
+    def _prepare_context(self, session: Session, prompt: Optional[str] = None) -> tuple[str, list[Callable]]:
+        """
+        Common context preparation helper.
+
+        The static instruction (root + specialists) is compiled once per root
+        agent; only the SESSION STATE block is rendered per turn, at the end.
+        When the intent router is confident about the prompt, only that
+        specialist's instruction and tools are used.
+        """
+        focus = self._select_route(session, prompt) if prompt is not None else None
+        compiled = compile_instruction(self.root_agent, TOOL_REGISTRY, focus=focus)
+        return compiled.render(session.state), compiled.tools
+
+    def history_report(self, session_id: str) -> dict:
+        """Full vs windowed history tokens for a session."""
+        return self.history_manager.report(get_session(session_id))
+
+    def prompt_report(self, session_id: str) -> list[dict]:
+        """Per-section byte/token counts of the system instruction for a session."""
+        compiled = compile_instruction(self.root_agent, TOOL_REGISTRY)
+        return compiled.report(get_session(session_id).state)
+
+    def _gemini_config(self, instruction: str, tools: list[Callable]):
+        """Build the GenerateContentConfig shared by the sync and async Gemini paths."""
+        return types.GenerateContentConfig(
+            tools=TOOL_REGISTRY.gemini_tools(tools),
+            system_instruction=instruction,
+            temperature=0.0,
+            # Tools are dispatched by our own loop, never by the SDK
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+        )
+
+    def _openai_messages(self, session: Session, instruction: str, prompt: str) -> list[dict]:
+        """Build OpenAI-style messages (Instruction + windowed transcript + prompt)."""
+        messages = [{"role": "system", "content": instruction}]
+        messages.extend(self.history_manager.build_messages(session))
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _record_turn(self, session: Session, prompt: str, final_text: str) -> None:
+        """Append the finished exchange, with the tools it ran, to the session transcript."""
+        self.history_manager.record_turn(session, prompt, final_text, _TURN_TOOLS.get() or ())
+        save_session(session)
+
+    def chat_messages(self, session_id: str) -> list[dict]:
+        """The conversation as UI chat messages (role user/assistant, content, tools)."""
+        return get_session(session_id).history.ui_messages()
+
+    @contextmanager
+    def _observe(self, key: str):
+        """
+        Record one provider call: latency/outcome in the health registry and an 'llm' span.
+
+        Yields the span so callers can attach token usage.
+        """
+        provider, model = key.split(":", 1)
+        with self.tracer.span(f"llm:{key}", kind="llm", provider=provider, model=model) as span:
+            start = time.perf_counter()
+            try:
+                yield span
+            except Exception:
+                self.health.record(key, False, time.perf_counter() - start)
+                raise
+            self.health.record(key, True, time.perf_counter() - start)
+
+    @staticmethod
+    def _record_usage(span, response) -> None:
+        """Copy token usage from a Gemini response or OpenAI completion/chunk onto a span."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            span.set(input_tokens=usage.prompt_token_count, output_tokens=usage.candidates_token_count)
+            return
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            span.set(input_tokens=usage.prompt_tokens, output_tokens=usage.completion_tokens)
+
+    def _openrouter_candidates(self) -> list[str]:
+        """OpenRouter models ordered by current health, skipping open circuits."""
+        keys = [ProviderHealthRegistry.key("openrouter", m) for m in OPENROUTER_MODELS]
+        ordered = self.health.order(keys)
+        return [k.split(":", 1)[1] for k in ordered]
+
+    def health_report(self) -> list[dict]:
+        """Snapshot of provider/model health and circuit states."""
+        return self.health.snapshot()
+
+    def trace_report(self) -> dict:
+        """p50/p95/p99 latency per span name (turn, llm:*, tool:*, sql:*)."""
+        return self.tracer.latency_report()
+
+    def hedge_report(self) -> dict:
+        """Hedge rate and win counts since this app was created."""
+        return self.hedge_stats.snapshot()
+
+    def cache_report(self) -> list[dict]:
+        """Hit/miss counts of the cached tools (office lookups, ticket status)."""
+        return cache_metrics()
+
+    def lock_report(self) -> dict:
+        """Turn-lock acquisitions, contention and wait percentiles (seconds)."""
+        return self.turn_locks.metrics()
+
+    def session_report(self) -> dict:
+        """Resident sessions, estimated bytes and evictions (plus the durable store, if any)."""
+        report = SESSION_EVICTOR.metrics()
+        if _DURABLE_SESSIONS is not None:
+            report["store"] = _DURABLE_SESSIONS.metrics()
+        return report
+
+    def _hedge_delay(self, key: str) -> float:
+        return self.hedging.deadline(self.health.latencies(key))
+
+    def _gemini_backup_model(self, model: str) -> Optional[str]:
+        """The other Gemini model (primary <-> backup) to hedge against, if healthy."""
+        if not self.hedging or not self.hedging.gemini_backup_model:
+            return None
+        models = [self.root_agent.model, self.hedging.gemini_backup_model]
+        other = next((m for m in models if m != model), None)
+        if other is None or not self.health.available(ProviderHealthRegistry.key("gemini", other)):
+            return None
+        return other
+
+    def _claim(self, key: str) -> None:
+        """Claim a hedge backup's call slot when the leg actually fires (its probe may be gone by then)."""
+        if not self.health.allow(key):
+            raise RuntimeError(f"Circuit open for {key}")
+
+    def _gemini_send(self, chat, model: str, message, config):
+        """
+        Send one message on a Gemini chat, hedged against the backup model if enabled.
+
+        The backup leg replays the same message on a fresh chat seeded with a
+        snapshot of the primary's history; whichever chat wins carries on.
+
+        Returns:
+            (response, chat that produced it, its model)
+        """
+        def send(target, target_model):
+            with self._observe(ProviderHealthRegistry.key("gemini", target_model)) as span:
+                response = target.send_message(message)
+                self._record_usage(span, response)
+                return response, target, target_model
+
+        if not self.hedging:
+            return send(chat, model)
+
+        backup_model = self._gemini_backup_model(model)
+        backup = None
+        if backup_model:
+            history = chat.get_history(curated=False)
+
+            def backup():
+                self._claim(ProviderHealthRegistry.key("gemini", backup_model))
+                backup_chat = self.gemini_client.chats.create(model=backup_model, config=config, history=history)
+                return send(backup_chat, backup_model)
+
+        result, _ = hedged_call(
+            self._hedge_executor,
+            self._hedge_delay(ProviderHealthRegistry.key("gemini", model)),
+            lambda: send(chat, model),
+            backup,
+            self.hedge_stats,
+        )
+        return result
+
+    async def _gemini_send_async(self, chat, model: str, message, config):
+        """Async twin of _gemini_send (the losing call is cancelled)."""
+        async def send(target, target_model):
+            with self._observe(ProviderHealthRegistry.key("gemini", target_model)) as span:
+                response = await target.send_message(message)
+                self._record_usage(span, response)
+                return response, target, target_model
+
+        if not self.hedging:
+            return await send(chat, model)
+
+        backup_model = self._gemini_backup_model(model)
+        backup = None
+        if backup_model:
+            history = chat.get_history(curated=False)
+
+            async def backup():
+                self._claim(ProviderHealthRegistry.key("gemini", backup_model))
+                backup_chat = self.gemini_client.aio.chats.create(model=backup_model, config=config, history=history)
+                return await send(backup_chat, backup_model)
+
+        result, _ = await hedged_call_async(
+            self._hedge_delay(ProviderHealthRegistry.key("gemini", model)),
+            lambda: send(chat, model),
+            backup,
+            self.hedge_stats,
+        )
+        return result
+
+    def _openrouter_backup(self, model: str) -> Optional[str]:
+        """Next-best healthy OpenRouter model to hedge against."""
+        return next((m for m in self._openrouter_candidates() if m != model), None)
+
+    def _openai_complete(self, model: str, messages: list, tools):
+        """One OpenRouter completion step, hedged against the next-best model if enabled."""
+        def complete(target, claim=False):
+            if claim:
+                self._claim(ProviderHealthRegistry.key("openrouter", target))
+            with self._observe(ProviderHealthRegistry.key("openrouter", target)) as span:
+                completion = self.openrouter_client.chat.completions.create(
+                    model=target,
+                    messages=list(messages),
+                    tools=tools,
+                    tool_choice="auto" if tools else None
+                )
+                self._record_usage(span, completion)
+                return completion
+
+        if not self.hedging:
+            return complete(model)
+        backup_model = self._openrouter_backup(model)
+        completion, _ = hedged_call(
+            self._hedge_executor,
+            self._hedge_delay(ProviderHealthRegistry.key("openrouter", model)),
+            lambda: complete(model),
+            (lambda: complete(backup_model, claim=True)) if backup_model else None,
+            self.hedge_stats,
+        )
+        return completion
+
+    async def _openai_complete_async(self, model: str, messages: list, tools):
+        """Async twin of _openai_complete."""
+        async def complete(target, claim=False):
+            if claim:
+                self._claim(ProviderHealthRegistry.key("openrouter", target))
+            with self._observe(ProviderHealthRegistry.key("openrouter", target)) as span:
+                completion = await self.openrouter_async_client.chat.completions.create(
+                    model=target,
+                    messages=list(messages),
+                    tools=tools,
+                    tool_choice="auto" if tools else None
+                )
+                self._record_usage(span, completion)
+                return completion
+
+        if not self.hedging:
+            return await complete(model)
+        backup_model = self._openrouter_backup(model)
+        completion, _ = await hedged_call_async(
+            self._hedge_delay(ProviderHealthRegistry.key("openrouter", model)),
+            lambda: complete(model),
+            (lambda: complete(backup_model, claim=True)) if backup_model else None,
+            self.hedge_stats,
+        )
+        return completion
+
+    def _invoke_tool(self, fn_name: str, fn_args: dict) -> dict:
+        """
+        Run one registered tool and wrap the outcome.
+
+        The exchange is kept for the turn's transcript entry.
+
+        Returns:
+            {"result": ...} on success, {"error": "..."} otherwise
+        """
+        outcome = self._call_tool(fn_name, fn_args)
+        tools = _TURN_TOOLS.get()
+        if tools is not None:
+            tools.append(ToolExchange(fn_name, fn_args, outcome))
+        self._run_tool_hooks(fn_name, fn_args, outcome)
+        return outcome
+
+    def add_tool_hook(self, hook: ToolHook) -> None:
+        """Register a post-tool hook (called with the session, tool name, arguments and result)."""
+        self.tool_hooks.append(hook)
+
+    def _run_tool_hooks(self, fn_name: str, fn_args: dict, outcome: dict) -> None:
+        """Let the post-tool hooks update the turn's session from a successful call."""
+        session = _TURN_SESSION.get()
+        if not self.tool_hooks or session is None or "result" not in outcome:
+            return
+        result = outcome["result"]
+        if isinstance(result, dict) and "error" in result:
+            # e.g. {"error": "No power office found for woreda: ..."}
+            return
+        for hook in self.tool_hooks:
             try:
-                return self.run_with_openrouter(user_id, session_id, prompt)
+                hook(session, fn_name, fn_args, result)
             except Exception as e:
-                return f"❌ All providers failed. OpenRouter error: {e}"
-        else:
-            return "❌ Configuration Error: Neither Gemini (failed) nor OpenRouter (missing key) are available."
-
-    def _prepare_context(self, session: Session) -> tuple[str, list[Callable]]:
-        """Common context preparation helper."""
-        # 1. State Context
-        state_context = "SESSION STATE:\n"
-        for k, v in session.state.items():
-            state_context += f"{k}: {v}\n"
-            
-        full_system_instruction = f"{self.root_agent.instruction}\n\n{state_context}"
-        
-        # 2. Sub-Agent Instructions
-        full_system_instruction += "\n\n### SPECIALIST AGENT CAPABILITIES:\n"
-        def collect_instructions(agt):
-            instructions = ""
-            for sub in agt.sub_agents:
-                instructions += f"\n--- {sub.name.upper()} ---\n{sub.instruction}\n"
-                instructions += collect_instructions(sub)
-            return instructions
-        full_system_instruction += collect_instructions(self.root_agent)
-        
-        # 3. Collect Tools
-        active_tools = []
-        def collect_tools(agt):
-            for t in agt.tools:
-                if t.__name__ in TOOL_REGISTRY:
-                    active_tools.append(TOOL_REGISTRY[t.__name__])
-            for sub in agt.sub_agents:
-                collect_tools(sub)
-        collect_tools(self.root_agent)
-        
-        return full_system_instruction, active_tools
+                print(f"⚠️ Tool hook {getattr(hook, '__name__', hook)} failed for {fn_name}: {e}")
+
+    def _call_tool(self, fn_name: str, fn_args: dict) -> dict:
+        with self.tracer.span(f"tool:{fn_name}", kind="tool", tool=fn_name) as span:
+            if fn_name not in TOOL_REGISTRY:
+                span.status = "error"
+                return {"error": "Function not found"}
+            try:
+                fn_args = TOOL_REGISTRY.validate(fn_name, fn_args)
+            except ToolArgumentError as e:
+                print(f"❌ Tool Error: {e}")
+                span.status = "error"
+                span.set(error=str(e)[:300])
+                return {"error": str(e)}
+            try:
+                result = TOOL_REGISTRY[fn_name](**fn_args)
+                print(f"🔧 Tool Result: {str(result)[:100]}...")
+                return {"result": result}
+            except Exception as e:
+                print(f"❌ Tool Error: {e}")
+                span.status = "error"
+                span.set(error=str(e)[:300])
+                return {"error": str(e)}
+
+    def _run_tool_calls(self, calls: list[tuple[str, dict]]) -> list[dict]:
+        """
+        Execute every function call from one model response.
+
+        Independent calls (e.g. office lookup + ticket creation) run in
+        parallel on the tool thread pool; outcomes keep the call order.
+        """
+        if len(calls) == 1:
+            return [self._invoke_tool(*calls[0])]
+        # Each call runs in a copy of this context so its span joins the turn's trace
+        futures = [
+            self._tool_executor.submit(contextvars.copy_context().run, self._invoke_tool, fn_name, fn_args)
+            for fn_name, fn_args in calls
+        ]
+        return [f.result() for f in futures]
+
+    async def _run_tool_calls_async(self, calls: list[tuple[str, dict]]) -> list[dict]:
+        """Async twin of _run_tool_calls; blocking tools stay off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(
+                self._tool_executor,
+                functools.partial(contextvars.copy_context().run, self._invoke_tool, fn_name, fn_args)
+            )
+            for fn_name, fn_args in calls
+        ))
+
+    @staticmethod
+    def _tool_message_content(outcome: dict) -> str:
+        """Serialize a tool outcome for an OpenAI `tool` message."""
+        return tool_message_content(outcome)
 
     def run_with_gemini(self, user_id: str, session_id: str, prompt: str) -> str:
-        session = get_session(session_id)
+        session = _session_for_turn(session_id)
         if not self.gemini_client:
             raise ValueError("Gemini client not initialized")
 
-        instruction, tools = self._prepare_context(session)
-        
-        config = types.GenerateContentConfig(
-            tools=tools if tools else None,
-            system_instruction=instruction,
-            temperature=0.0
-        )
+        instruction, tools = self._prepare_context(session, prompt)
+        config = self._gemini_config(instruction, tools)
         
         chat = self.gemini_client.chats.create(
             model=self.root_agent.model,
             config=config,
-            history=session.history
+            history=self.history_manager.build(session)
         )
         
-        response = chat.send_message(prompt)
+        model = self.root_agent.model
+        response, chat, model = self._gemini_send(chat, model, prompt, config)
         
         # Gemini Agentic Loop
         final_text = ""
@@ -271,36 +1017,78 @@ class AdkApp:
             if not response.candidates or not response.candidates[0].content.parts:
                 break
                 
-            has_tool_call = False
-            for part in response.candidates[0].content.parts:
-                if part.function_call:
-                    has_tool_call = True
-                    fn_name = part.function_call.name
-                    fn_args = part.function_call.args
+            # Collect every function call in this response and answer them together
+            function_calls = [
+                part.function_call
+                for part in response.candidates[0].content.parts
+                if part.function_call
+            ]
+            if function_calls:
+                calls = [(fc.name, dict(fc.args or {})) for fc in function_calls]
+                for fn_name, _ in calls:
                     print(f"🤖 (Gemini) calling tool: {fn_name}")
-                    
-                    if fn_name in TOOL_REGISTRY:
-                        try:
-                            result = TOOL_REGISTRY[fn_name](**fn_args)
-                            print(f"🔧 Tool Result: {str(result)[:100]}...")
-                            response = chat.send_message(
-                                types.Part.from_function_response(
-                                    name=fn_name,
-                                    response={"result": result}
-                                )
-                            )
-                            break
-                        except Exception as e:
-                            print(f"❌ Tool Error: {e}")
-                            response = chat.send_message(
-                                types.Part.from_function_response(
-                                    name=fn_name,
-                                    response={"error": str(e)}
-                                )
-                            )
-                            break
+                outcomes = self._run_tool_calls(calls)
+                response, chat, model = self._gemini_send(chat, model, [
+                    types.Part.from_function_response(name=fn_name, response=outcome)
+                    for (fn_name, _), outcome in zip(calls, outcomes)
+                ], config)
+                continue
             
-            if has_tool_call:
+            for part in response.candidates[0].content.parts:
+                if part.text:
+                    final_text += part.text
+            break
+            
+        if not final_text:
+            final_text = "I processed that, but have no text response."
+
+        self._record_turn(session, prompt, final_text)
+        
+        return final_text
+
+    async def run_with_gemini_async(self, user_id: str, session_id: str, prompt: str) -> str:
+        """Async twin of run_with_gemini using the client's `aio` surface."""
+        session = _session_for_turn(session_id)
+        if not self.gemini_client:
+            raise ValueError("Gemini client not initialized")
+
+        instruction, tools = self._prepare_context(session, prompt)
+        config = self._gemini_config(instruction, tools)
+        
+        chat = self.gemini_client.aio.chats.create(
+            model=self.root_agent.model,
+            config=config,
+            history=self.history_manager.build(session)
+        )
+        
+        model = self.root_agent.model
+        response, chat, model = await self._gemini_send_async(chat, model, prompt, config)
+        
+        # Gemini Agentic Loop
+        final_text = ""
+        max_turns = 10
+        turn_count = 0
+        
+        while turn_count < max_turns:
+            turn_count += 1
+            if not response.candidates or not response.candidates[0].content.parts:
+                break
+                
+            # Collect every function call in this response and answer them together
+            function_calls = [
+                part.function_call
+                for part in response.candidates[0].content.parts
+                if part.function_call
+            ]
+            if function_calls:
+                calls = [(fc.name, dict(fc.args or {})) for fc in function_calls]
+                for fn_name, _ in calls:
+                    print(f"🤖 (Gemini) calling tool: {fn_name}")
+                outcomes = await self._run_tool_calls_async(calls)
+                response, chat, model = await self._gemini_send_async(chat, model, [
+                    types.Part.from_function_response(name=fn_name, response=outcome)
+                    for (fn_name, _), outcome in zip(calls, outcomes)
+                ], config)
                 continue
             
             for part in response.candidates[0].content.parts:
@@ -311,37 +1099,51 @@ class AdkApp:
         if not final_text:
             final_text = "I processed that, but have no text response."
 
-        # Update Session history (Google Format)
-        session.history.append(types.Content(role="user", parts=[types.Part.from_text(text=prompt)]))
-        session.history.append(types.Content(role="model", parts=[types.Part.from_text(text=final_text)]))
+        self._record_turn(session, prompt, final_text)
         
         return final_text
 
     def run_with_openrouter(self, user_id: str, session_id: str, prompt: str) -> str:
-        session = get_session(session_id)
-        instruction, tools = self._prepare_context(session)
+        session = _session_for_turn(session_id)
+        instruction, tools = self._prepare_context(session, prompt)
         
         # Convert Tools to OpenAI Format
-        openai_tools = [get_function_schema(t) for t in tools] if tools else None
+        openai_tools = TOOL_REGISTRY.openai_tools(tools)
         
-        # Build Messages (Context + Instruction + History Conversion)
-        messages = [{"role": "system", "content": instruction}]
+        messages = self._openai_messages(session, instruction, prompt)
         
-        # Convert existing Google History to OpenAI
-        # This is a lossy conversion (simple text only) for fallback
-        for content in session.history:
-            parts = content.parts
-            text = " ".join([p.text for p in parts if p.text])
-            messages.append({"role": content.role, "content": text})
-            
-        messages.append({"role": "user", "content": prompt})
+        # Fallback Loop
+        # Try models in health order (open circuits skipped) until one works
+        for model in self._openrouter_candidates():
+            if not self.health.allow(ProviderHealthRegistry.key("openrouter", model)):
+                continue
+            try:
+                print(f"🟠 (OpenRouter) Trying model: {model}")
+                return self._execute_openai_loop(list(messages), openai_tools, model, session, prompt)
+            except Exception as e:
+                print(f"⚠️ Model {model} failed: {e}")
+                continue
+                
+        raise RuntimeError("All OpenRouter fallback models failed.")
+
+    async def run_with_openrouter_async(self, user_id: str, session_id: str, prompt: str) -> str:
+        """Async twin of run_with_openrouter using openai.AsyncOpenAI."""
+        session = _session_for_turn(session_id)
+        instruction, tools = self._prepare_context(session, prompt)
+        
+        # Convert Tools to OpenAI Format
+        openai_tools = TOOL_REGISTRY.openai_tools(tools)
+        
+        messages = self._openai_messages(session, instruction, prompt)
         
         # Fallback Loop
-        # Try models in order until one works
-        for model in OPENROUTER_MODELS:
+        # Try models in health order (open circuits skipped) until one works
+        for model in self._openrouter_candidates():
+            if not self.health.allow(ProviderHealthRegistry.key("openrouter", model)):
+                continue
             try:
                 print(f"🟠 (OpenRouter) Trying model: {model}")
-                return self._execute_openai_loop(messages, openai_tools, model, session, prompt)
+                return await self._execute_openai_loop_async(list(messages), openai_tools, model, session, prompt)
             except Exception as e:
                 print(f"⚠️ Model {model} failed: {e}")
                 continue
@@ -357,37 +1159,25 @@ class AdkApp:
         while turn_count < max_turns:
             turn_count += 1
             
-            completion = self.openrouter_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                tools=tools,
-                tool_choice="auto" if tools else None
-            )
+            completion = self._openai_complete(model, messages, tools)
             
             msg = completion.choices[0].message
             messages.append(msg)
             
             if msg.tool_calls:
+                calls = []
                 for tool_call in msg.tool_calls:
                     fn_name = tool_call.function.name
                     fn_args = json.loads(tool_call.function.arguments)
                     print(f"🤖 (OpenRouter) calling tool: {fn_name}")
-                    
-                    result_str = ""
-                    if fn_name in TOOL_REGISTRY:
-                        try:
-                            result = TOOL_REGISTRY[fn_name](**fn_args)
-                            result_str = json.dumps(result)
-                            print(f"🔧 Tool Result: {result_str[:100]}...")
-                        except Exception as e:
-                            result_str = json.dumps({"error": str(e)})
-                    else:
-                        result_str = json.dumps({"error": "Function not found"})
-                        
+                    calls.append((fn_name, fn_args))
+                
+                outcomes = self._run_tool_calls(calls)
+                for tool_call, outcome in zip(msg.tool_calls, outcomes):
                     messages.append({
                         "role": "tool",
                         "tool_call_id": tool_call.id,
-                        "content": result_str
+                        "content": self._tool_message_content(outcome)
                     })
                 # Loop continues to send tool results back to model
             else:
@@ -396,8 +1186,66 @@ class AdkApp:
                 
         # Update Session History (Back-convert to Google Format for continuity)
         # Note: We append the simplified interaction
-        if genai:
-             session.history.append(types.Content(role="user", parts=[types.Part.from_text(text=original_prompt)]))
-             session.history.append(types.Content(role="model", parts=[types.Part.from_text(text=final_text or "")]))
+        self._record_turn(session, original_prompt, final_text or "")
         
         return final_text or "No response generated."
+
+    async def _execute_openai_loop_async(self, messages, tools, model, session, original_prompt):
+        """Async OpenAI ReAct Loop (tools run on the tool thread pool)."""
+        final_text = ""
+        max_turns = 10
+        turn_count = 0
+        
+        while turn_count < max_turns:
+            turn_count += 1
+            
+            completion = await self._openai_complete_async(model, messages, tools)
+            
+            msg = completion.choices[0].message
+            messages.append(msg)
+            
+            if msg.tool_calls:
+                calls = []
+                for tool_call in msg.tool_calls:
+                    fn_name = tool_call.function.name
+                    fn_args = json.loads(tool_call.function.arguments)
+                    print(f"🤖 (OpenRouter) calling tool: {fn_name}")
+                    calls.append((fn_name, fn_args))
+                
+                outcomes = await self._run_tool_calls_async(calls)
+                for tool_call, outcome in zip(msg.tool_calls, outcomes):
+                    messages.append({
+                        "role": "tool",
+                        "tool_call_id": tool_call.id,
+                        "content": self._tool_message_content(outcome)
+                    })
+                # Loop continues to send tool results back to model
+            else:
+                final_text = msg.content
+                break
+                
+        # Update Session History (Back-convert to Google Format for continuity)
+        self._record_turn(session, original_prompt, final_text or "")
+        
+        return final_text or "No response generated."
+
+
+# Process-wide runners: one AdkApp (HTTP clients, tool pools, caches) per root agent
+_SHARED_APPS: Dict[str, AdkApp] = {}
+_SHARED_APPS_LOCK = threading.Lock()
+
+def get_shared_app(agent: Agent) -> AdkApp:
+    """
+    Get or create the process-wide AdkApp for a root agent.
+
+    AdkApp keeps no per-turn state on the instance, so every UI session can
+    share it; conversations are isolated by session_id alone.
+    """
+    app = _SHARED_APPS.get(agent.name)
+    if app is None:
+        with _SHARED_APPS_LOCK:
+            app = _SHARED_APPS.get(agent.name)
+            if app is None:
+                app = AdkApp(agent=agent)
+                _SHARED_APPS[agent.name] = app
+    return app
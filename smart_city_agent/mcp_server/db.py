@@ -1,7 +1,15 @@
 import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
 import psycopg2
+from psycopg2 import extensions, sql
 from psycopg2.extras import RealDictCursor
 
+from ..tracing import get_tracer
+from .pool import ConnectionPool, CONNECTION_ERRORS
+
 # Cloud Connection String (Populated from Env)
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
@@ -49,19 +57,158 @@ UTILITY_DB = get_db_config("utility", "utility_db")
 UTILITY_LEDGER_DB = get_db_config("utility", "utility_ledger_db")
 
 
-def get_conn(cfg):
-    """Create database connection with RealDictCursor for dict results"""
+class TracedCursor(RealDictCursor):
+    """RealDictCursor that records every statement as a 'sql' tracing span."""
+
+    def execute(self, query, vars=None):
+        query = self._routed(query, vars)
+        with self._span(query) as span:
+            result = super().execute(query, vars)
+            span.set(rows=self.rowcount)
+            return result
+
+    def executemany(self, query, vars_list):
+        # executemany repeats the query per row, so the routing goes first on its own
+        prefix = self._route_sql()
+        if prefix:
+            super().execute(prefix)
+        with self._span(query) as span:
+            result = super().executemany(query, vars_list)
+            span.set(rows=self.rowcount)
+            return result
+
+    def _route_sql(self):
+        route_sql = getattr(self.connection, "route_sql", None)
+        return route_sql() if route_sql else None
+
+    def _routed(self, query, vars):
+        """Send a transaction's SET LOCAL search_path in the same round trip as its first statement."""
+        prefix = self._route_sql()
+        if not prefix:
+            return query
+        if isinstance(query, sql.Composable):
+            query = query.as_string(self)
+        elif isinstance(query, bytes):
+            query = query.decode()
+        if vars is not None:
+            prefix = prefix.replace("%", "%%")
+        return f"{prefix}; {query}"
+
+    def _span(self, query):
+        statement = query.decode() if isinstance(query, bytes) else str(query)
+        target = getattr(self.connection, "trace_target", "db")
+        return get_tracer().span(
+            f"sql:{target}",
+            kind="sql",
+            db=target,
+            statement=" ".join(statement.split())[:200],
+        )
+
+
+class RoutedConnection(extensions.connection):
+    """
+    Connection whose transactions are routed to `schema` (cloud mode).
+
+    The statement that opens each transaction is sent as "SET LOCAL
+    search_path ...; <statement>" (see TracedCursor), so routing costs no extra
+    round trip and the setting lasts exactly one transaction: a pooled
+    connection can serve any agent, and it also works behind transaction-mode
+    poolers (PgBouncer, Supabase pooler) where session-level settings are not kept.
+    """
+    schema = None
+    trace_target = "db"
+
+    def route_sql(self):
+        """SET LOCAL search_path for a statement that opens a transaction (cloud mode), else None."""
+        if self.schema and self.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE:
+            # PostGIS lives in public, so keep it on the path after the agent schema
+            return sql.SQL("SET LOCAL search_path TO {}, public").format(sql.Identifier(self.schema)).as_string(self)
+        return None
+
+
+def connect(cfg):
+    """Open a new database connection with RealDictCursor (traced) for dict results"""
     
     if cfg["type"] == "cloud":
         # Cloud Connection (Supabase/Neon)
-        # We inject the 'search_path' to route queries to the correct agent schema
+        # One shared pool for every agent: the schema is routed per checkout (see get_conn)
         return psycopg2.connect(
             DATABASE_URL, 
-            cursor_factory=RealDictCursor,
-            options=f"-c search_path={cfg['schema']}"
+            connection_factory=RoutedConnection,
+            cursor_factory=TracedCursor
         )
     else:
         # Local Connection
         # Use provided credentials, ignore 'type' and 'schema' keys
         db_args = {k: v for k, v in cfg.items() if k not in ["type", "schema"]}
-        return psycopg2.connect(**db_args, cursor_factory=RealDictCursor)
+        conn = psycopg2.connect(**db_args, connection_factory=RoutedConnection, cursor_factory=TracedCursor)
+        conn.trace_target = cfg['dbname']
+        return conn
+
+
+# Local mode: one pool per database (EMERGENCY_DB, POWER_DB, ...)
+# Cloud mode: a single pool for DATABASE_URL shared by all five agents
+_POOLS: Dict[tuple, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool_key(cfg) -> tuple:
+    if cfg["type"] == "cloud":
+        return ("cloud",)
+    return tuple(sorted(cfg.items()))
+
+
+def get_pool(cfg) -> ConnectionPool:
+    """Get or create the connection pool for a DB config."""
+    key = _pool_key(cfg)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                name = "cloud" if cfg["type"] == "cloud" else cfg["dbname"]
+                pool = ConnectionPool(name, lambda: connect(cfg))
+                _POOLS[key] = pool
+    return pool
+
+
+@contextmanager
+def get_conn(cfg):
+    """
+    Borrow a pooled connection for a `with` block.
+
+    Like psycopg2's `with conn:` the transaction is committed on success and
+    rolled back on error; the connection then goes back to the pool (or is
+    discarded if it broke mid-query). In cloud mode every transaction on the
+    borrowed connection runs with search_path set to the config's schema.
+    """
+    pool = get_pool(cfg)
+    conn = pool.getconn()
+    if cfg["type"] == "cloud":
+        conn.schema = conn.trace_target = cfg["schema"]
+    discard = False
+    try:
+        yield conn
+        if not conn.closed:
+            conn.commit()
+    except CONNECTION_ERRORS:
+        discard = True
+        raise
+    except Exception:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except CONNECTION_ERRORS:
+                discard = True
+        raise
+    finally:
+        if cfg["type"] == "cloud":
+            conn.schema = None
+        pool.putconn(conn, discard=discard)
+
+
+def pool_metrics() -> List[Dict]:
+    """Metrics of every pool created so far (in-use, waiters, wait time, ...)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return [pool.metrics() for pool in pools]
@@ -1,11 +1,15 @@
 from ..local_runner import MCPServer
+from ..idempotency import idempotent
+from ..tool_cache import TTL, OFFICE_TTL
+from .statements import execute_prepared
+from .ticket_writer import get_ticket_writer
 from .db import get_conn, EMERGENCY_DB
 import uuid
 
 server = MCPServer(name="emergency_mcp_server")
 
 
-@server.tool()
+@server.tool(cache=TTL(OFFICE_TTL, tags=("offices:emergency",)))
 def find_closest_emergency_office(woreda_name: str) -> dict:
     """
     Fetch emergency office contact info by woreda.
@@ -21,7 +25,7 @@ def find_closest_emergency_office(woreda_name: str) -> dict:
     
     with get_conn(EMERGENCY_DB) as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (woreda_name,))
+            execute_prepared(cur, sql, (woreda_name,))
             row = cur.fetchone()
     
     if not row:
@@ -31,6 +35,7 @@ def find_closest_emergency_office(woreda_name: str) -> dict:
 
 
 @server.tool()
+@idempotent(identity=("woreda", "emergency_type"))
 def create_emergency_ticket(
     woreda: str,
     emergency_type: str,
@@ -43,23 +48,16 @@ def create_emergency_ticket(
     """
     ticket_number = f"EMER-{uuid.uuid4().hex[:8].upper()}"
     
-    sql = """
-        INSERT INTO tickets
-        (ticket_number, woreda, emergency_type, issue_description, user_contact, location_details, status)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        RETURNING ticket_number, status, created_at;
-    """
-    
-    with get_conn(EMERGENCY_DB) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                sql,
-                (ticket_number, woreda, emergency_type, issue_description, user_contact, location_details, "RECEIVED")
-            )
-            result = cur.fetchone()
-            conn.commit()
-    
-    return dict(result)
+    # Batched with concurrent reports (group commit); see ticket_writer.py
+    return get_ticket_writer(EMERGENCY_DB).create({
+        "ticket_number": ticket_number,
+        "woreda": woreda,
+        "emergency_type": emergency_type,
+        "issue_description": issue_description,
+        "user_contact": user_contact,
+        "location_details": location_details,
+        "status": "RECEIVED",
+    })
 
 
 @server.tool()
@@ -75,7 +73,7 @@ def get_emergency_ticket_status(ticket_number: str) -> dict:
     
     with get_conn(EMERGENCY_DB) as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (ticket_number,))
+            execute_prepared(cur, sql, (ticket_number,))
             row = cur.fetchone()
     
     if not row:
@@ -0,0 +1,252 @@
+"""
+Database Connection Pool for the Addis-Sync MCP servers.
+
+A thread-safe pool of psycopg2 connections so tool calls reuse an open
+connection instead of paying a TCP/TLS handshake and authentication on every
+office lookup and ticket insert.
+
+- min/max size: min_size connections are opened on first use and kept idle
+- checkout timeout: callers wait up to `timeout` seconds for a free connection
+- liveness check: connections idle longer than `check_after` are pinged
+  (SELECT 1) on borrow; dead ones are replaced transparently
+- reconnect backoff: transient connect errors are retried with exponential
+  backoff; connections that fail mid-query are discarded, not reused
+- metrics: size, idle, in-use, waiters, wait time, timeouts, reconnects
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5.0"))
+POOL_CHECK_AFTER = float(os.environ.get("DB_POOL_CHECK_AFTER", "5.0"))
+CONNECT_RETRIES = 3
+BACKOFF_BASE = 0.1
+BACKOFF_MAX = 2.0
+
+# Errors that mean the connection itself is unusable
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of connections created by `connect`.
+
+    Args:
+        name: Pool name used in logs and metrics
+        connect: Zero-argument factory returning a new DB-API connection
+        min_size: Connections opened on first use and kept idle
+        max_size: Hard cap on open connections
+        timeout: Seconds a checkout may wait for a free connection
+        check_after: Idle seconds after which a borrowed connection is pinged (0 = always)
+    """
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Any],
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        timeout: float = POOL_TIMEOUT,
+        check_after: float = POOL_CHECK_AFTER,
+    ):
+        self.name = name
+        self._connect = connect
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()            # (conn, returned_at)
+        self._size = 0                  # open + being opened
+        self._warmed = False
+
+        # Metrics
+        self.waiters = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.reconnects = 0
+        self.connect_failures = 0
+        self.discarded = 0
+
+    # --- checkout / return ---
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Borrow a live connection.
+
+        Raises:
+            PoolTimeout: if none is free within the timeout
+            psycopg2.OperationalError: if a new connection cannot be opened
+        """
+        self._warm_up()
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+
+        while True:
+            conn, idle_since, create = self._reserve(deadline, start)
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    self._forget()
+                    raise
+                self._checked_out(start)
+                return conn
+            if self._is_alive(conn, idle_since):
+                self._checked_out(start)
+                return conn
+            # Dead idle connection: drop it and try again (usually opens a new one)
+            self.reconnects += 1
+            self._close(conn)
+            self._forget()
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return a connection; broken or discarded ones are closed."""
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection with an open transaction
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except CONNECTION_ERRORS:
+                discard = True
+        if discard or conn.closed:
+            self.discarded += 1
+            self._close(conn)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _reserve(self, deadline: float, start: float):
+        """Take an idle connection, or a slot to open a new one, waiting if the pool is full."""
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    return conn, idle_since, False
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None, True
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"Pool {self.name}: no connection free after {deadline - start:.1f}s "
+                        f"({self._size} open, {self.waiters} waiting)"
+                    )
+                self.waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self.waiters -= 1
+
+    def _forget(self) -> None:
+        """Release the slot of a connection that was closed or never opened."""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _checked_out(self, start: float) -> None:
+        waited = time.perf_counter() - start
+        with self._cond:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+    # --- connection lifecycle ---
+
+    def _open(self):
+        """Open a connection, retrying transient errors with exponential backoff."""
+        delay = BACKOFF_BASE
+        for attempt in range(CONNECT_RETRIES):
+            try:
+                return self._connect()
+            except CONNECTION_ERRORS as e:
+                self.connect_failures += 1
+                if attempt == CONNECT_RETRIES - 1:
+                    raise
+                print(f"⚠️ Pool {self.name}: connect failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, BACKOFF_MAX)
+
+    def _is_alive(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _warm_up(self) -> None:
+        """Open min_size connections the first time the pool is used."""
+        if self._warmed:
+            return
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                self.putconn(self._open())
+            except Exception as e:
+                print(f"⚠️ Pool {self.name}: warm-up connect failed: {e}")
+                self._forget()
+
+    def close(self) -> None:
+        """Close every idle connection (checked-out ones are closed when returned)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._warmed = False
+        for conn, _ in idle:
+            self._close(conn)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "pool": self.name,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "waiters": self.waiters,
+                "max_size": self.max_size,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_avg_ms": round(1000 * self.wait_time_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_time_max_ms": round(1000 * self.wait_time_max, 3),
+                "reconnects": self.reconnects,
+                "connect_failures": self.connect_failures,
+                "discarded": self.discarded,
+            }
@@ -0,0 +1,144 @@
+"""
+Server-side Prepared Statements for the MCP tool queries.
+
+Every MCP server runs the same few SQL texts (office lookup by woreda, ticket
+status). Instead of having Postgres parse and plan them on
+every call, each text is registered once and prepared once per pooled
+connection (and per schema in cloud mode); later calls only send
+EXECUTE name(params).
+
+Re-preparing is automatic:
+- new connections (after a reconnect) start with nothing prepared
+- if the server lost a statement (DISCARD ALL) or its plan became invalid
+  after a schema change, the transaction is rolled back, that one statement
+  is deallocated and the call is retried once. Only our own statement name
+  is dropped: DEALLOCATE ALL would also drop other clients' statements on a
+  shared backend.
+
+The ticket INSERT is no longer a prepared statement: create_*_ticket calls go
+through ticket_writer, whose multi-row INSERT varies with the batch size and
+is sent with plain cur.execute.
+
+SQL-level PREPARE/EXECUTE lives on one server backend, so it does not work
+behind a transaction-mode pooler (PgBouncer, Supavisor): each transaction
+may run on a different backend that other clients share. Those poolers
+only support protocol-level prepared statements, which psycopg2 does not
+send. DB_PREPARED_STATEMENTS therefore defaults to off in cloud mode
+(DATABASE_URL set) and on for the local databases; set it to 1 when
+DATABASE_URL is a direct or session-mode connection, or 0 to turn it off.
+"""
+
+import os
+import re
+import hashlib
+import threading
+from typing import Dict, Sequence
+
+from psycopg2 import errors
+
+# Cloud DATABASE_URLs usually sit behind a transaction-mode pooler
+PREPARED_STATEMENTS = os.environ.get(
+    "DB_PREPARED_STATEMENTS", "0" if os.environ.get("DATABASE_URL") else "1"
+) != "0"
+
+_PLACEHOLDER_RE = re.compile(r"%s")
+
+# Errors after which the connection's prepared statements can't be trusted
+REPREPARE_ERRORS = (
+    errors.InvalidSqlStatementName,     # 26000: prepared statement does not exist
+    errors.DuplicatePreparedStatement,  # 42P05: already exists (our bookkeeping was lost)
+)
+# 0A000 (FeatureNotSupported) covers many unrelated errors; only this one means a stale plan
+STALE_PLAN_MESSAGE = "cached plan must not change result type"
+
+
+def needs_reprepare(error: Exception) -> bool:
+    """True for errors that re-preparing the statement fixes (lost statement or stale plan)."""
+    if isinstance(error, REPREPARE_ERRORS):
+        return True
+    return isinstance(error, errors.FeatureNotSupported) and STALE_PLAN_MESSAGE in str(error)
+
+
+class Statement:
+    """A registered SQL text and its server-side PREPARE form."""
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.param_count = len(_PLACEHOLDER_RE.findall(sql))
+        counter = iter(range(1, self.param_count + 1))
+        self.body = _PLACEHOLDER_RE.sub(lambda _: f"${next(counter)}", sql.strip().rstrip(";"))
+
+    def server_name(self, schema) -> str:
+        """Prepared statement name on a connection (schema-specific in cloud mode)."""
+        return f"{self.name}_{schema}" if schema else self.name
+
+
+_REGISTRY: Dict[str, Statement] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_statement(sql: str) -> Statement:
+    """Register (once) and return the Statement for a SQL text."""
+    statement = _REGISTRY.get(sql)
+    if statement is None:
+        with _REGISTRY_LOCK:
+            statement = _REGISTRY.get(sql)
+            if statement is None:
+                digest = hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12]
+                statement = Statement(f"adk_{digest}", sql)
+                _REGISTRY[sql] = statement
+    return statement
+
+
+def _prepared_on(conn) -> set:
+    prepared = getattr(conn, "prepared_statements", None)
+    if prepared is None:
+        prepared = conn.prepared_statements = set()
+    return prepared
+
+
+def execute_prepared(cur, sql: str, params: Sequence = ()) -> None:
+    """
+    Run a registered query through EXECUTE, preparing it on first use.
+
+    Args:
+        cur: Cursor of a pooled connection (the query should open its transaction)
+        sql: Query text with %s placeholders
+        params: Query parameters
+    """
+    if not PREPARED_STATEMENTS:
+        cur.execute(sql, params)
+        return
+
+    statement = get_statement(sql)
+    conn = cur.connection
+    try:
+        _execute(cur, conn, statement, params)
+    except (*REPREPARE_ERRORS, errors.FeatureNotSupported) as e:
+        if not needs_reprepare(e):
+            raise
+        print(f"🔄 Re-preparing statements after: {e.pgcode} {str(e).strip()[:80]}")
+        conn.rollback()
+        name = statement.server_name(getattr(conn, "schema", None))
+        _prepared_on(conn).discard(name)
+        if not isinstance(e, errors.InvalidSqlStatementName):
+            # Still exists on the server (duplicate or stale plan): drop just ours
+            with conn.cursor() as reset:
+                reset.execute(f"DEALLOCATE {name}")
+            conn.rollback()
+        # The retry opens a new transaction, so it is routed to the schema again (see db.TracedCursor)
+        _execute(cur, conn, statement, params)
+
+
+def _execute(cur, conn, statement: Statement, params: Sequence) -> None:
+    prepared = _prepared_on(conn)
+    name = statement.server_name(getattr(conn, "schema", None))
+    placeholders = ", ".join(["%s"] * statement.param_count)
+    execute_sql = f"EXECUTE {name} ({placeholders})" if placeholders else f"EXECUTE {name}"
+    if name in prepared:
+        cur.execute(execute_sql, params)
+        return
+    # Prepare and execute in one round trip; the result is the EXECUTE's.
+    # Marked first: if the PREPARE was lost anyway, the next EXECUTE recovers.
+    prepared.add(name)
+    cur.execute(f"PREPARE {name} AS {statement.body}; {execute_sql}", params)
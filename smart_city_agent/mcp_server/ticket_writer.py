@@ -0,0 +1,256 @@
+"""
+Group-commit Ticket Writer for the create_*_ticket tools.
+
+During an outage burst hundreds of citizens report at once; one connection
+checkout, INSERT and fsync'd COMMIT per ticket makes the database the
+bottleneck. The writer collects concurrent inserts for a few milliseconds
+and commits them as one multi-row INSERT. Every caller gets its own future.
+
+Ticket numbers are generated client-side, so the durability guarantee can
+be chosen (TICKET_WRITER_DURABILITY):
+- "sync" (default): the tool returns after the batch is committed
+- "relaxed": same, but the batch commits with synchronous_commit = off
+  (no fsync wait; a crash can lose the last few hundred ms of tickets)
+- "async": the tool returns as soon as the ticket number is reserved and
+  queued; the row is written by the next batch (pending rows are flushed
+  at interpreter exit)
+
+If a batch fails (e.g. one row violates a constraint) its rows are retried
+one by one so a bad row only fails its own caller.
+
+A sync or relaxed caller that times out (pool exhausted, slow commit) is
+not told the insert failed: its row is still queued or in flight and will
+commit later, so raising would make the caller retry and file the ticket
+twice. It gets the reserved ticket number with status "PENDING" instead.
+"""
+
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import os
+import time
+import queue
+import atexit
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from .db import get_conn
+from .pool import POOL_TIMEOUT
+
+PENDING = "PENDING"
+
+SYNC = "sync"
+RELAXED = "relaxed"
+ASYNC = "async"
+DURABILITY = os.environ.get("TICKET_WRITER_DURABILITY", SYNC)
+MAX_DELAY = float(os.environ.get("TICKET_WRITER_MAX_DELAY_MS", "5")) / 1000
+MAX_BATCH = int(os.environ.get("TICKET_WRITER_MAX_BATCH", "100"))
+RESULT_TIMEOUT = POOL_TIMEOUT + 10.0
+
+RETURNING = "ticket_number, status, created_at"
+
+
+class _PendingTicket:
+    def __init__(self, row: Dict[str, Any]):
+        self.row = row
+        self.columns = tuple(row)
+        self.future: Future = Future()
+        self.abandoned = False   # the caller stopped waiting
+
+
+class TicketWriter:
+    """
+    Batches ticket INSERTs for one DB config (one agent's tickets table).
+
+    Args:
+        cfg: DB config (e.g. POWER_DB)
+        durability: "sync", "relaxed" or "async"
+        max_delay: Seconds to keep collecting after the first queued ticket
+        max_batch: Maximum rows per INSERT
+        table: Target table
+        connection: Context manager factory for a connection (defaults to the pool's get_conn)
+    """
+    def __init__(
+        self,
+        cfg: Dict[str, Any],
+        durability: str = DURABILITY,
+        max_delay: float = MAX_DELAY,
+        max_batch: int = MAX_BATCH,
+        table: str = "tickets",
+        connection=get_conn,
+    ):
+        if durability not in (SYNC, RELAXED, ASYNC):
+            raise ValueError(f"Unknown ticket writer durability: {durability}")
+        self.cfg = cfg
+        self.durability = durability
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.table = table
+        self._connection = connection
+        self.name = cfg.get("schema") or cfg.get("dbname")
+
+        # Metrics
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_seen = 0
+        self.failures = 0
+        self.timeouts = 0
+
+        self._queue: "queue.Queue[_PendingTicket]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"ticket-writer-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, row: Dict[str, Any]) -> _PendingTicket:
+        pending = _PendingTicket(row)
+        self._queue.put(pending)
+        return pending
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        """Queue one ticket row; the future resolves to the RETURNING row as a dict."""
+        return self._enqueue(row).future
+
+    def create(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one ticket with the configured durability and return its summary."""
+        pending = self._enqueue(row)
+        if self.durability == ASYNC:
+            # Acknowledge on reservation: the number is unique and the row is queued
+            pending.abandoned = True
+            return self._reserved(row, row.get("status", "RECEIVED"))
+        try:
+            return pending.future.result(timeout=RESULT_TIMEOUT)
+        except FutureTimeout:
+            # Still queued or in flight: it will commit, so this is not a failure to retry
+            pending.abandoned = True
+            self.timeouts += 1
+            print(f"⚠️ Ticket writer {self.name}: {row['ticket_number']} not committed after {RESULT_TIMEOUT}s, returning it as pending")
+            return self._reserved(row, PENDING)
+
+    @staticmethod
+    def _reserved(row: Dict[str, Any], status: str) -> Dict[str, Any]:
+        return {
+            "ticket_number": row["ticket_number"],
+            "status": status,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    def flush(self, timeout: float = RESULT_TIMEOUT) -> None:
+        """Wait until everything queued so far is written."""
+        marker = self.submit({})
+        try:
+            marker.result(timeout=timeout)
+        except Exception:
+            pass
+
+    # --- background batching ---
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[_PendingTicket]) -> None:
+        markers = [p for p in batch if not p.row]
+        tickets = [p for p in batch if p.row]
+        # Rows with the same columns go into one INSERT
+        groups: Dict[tuple, List[_PendingTicket]] = {}
+        for pending in tickets:
+            groups.setdefault(pending.columns, []).append(pending)
+        for group in groups.values():
+            try:
+                self._insert(group)
+            except Exception as e:
+                if len(group) == 1:
+                    self._fail(group[0], e)
+                    continue
+                print(f"⚠️ Ticket writer {self.name}: batch of {len(group)} failed ({e}), retrying rows individually")
+                for pending in group:
+                    try:
+                        self._insert([pending])
+                    except Exception as row_error:
+                        self._fail(pending, row_error)
+        for marker in markers:
+            marker.future.set_result(None)
+
+    def _insert(self, group: List[_PendingTicket]) -> None:
+        columns = group[0].columns
+        row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        sql = (
+            f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES "
+            + ", ".join([row_sql] * len(group))
+            + f" RETURNING {RETURNING};"
+        )
+        params = [p.row[c] for p in group for c in columns]
+        with self._connection(self.cfg) as conn:
+            with conn.cursor() as cur:
+                if self.durability == RELAXED:
+                    cur.execute("SET LOCAL synchronous_commit TO off")
+                cur.execute(sql, params)
+                returned = {r["ticket_number"]: dict(r) for r in cur.fetchall()}
+                conn.commit()
+
+        self.batches += 1
+        self.rows += len(group)
+        self.max_batch_seen = max(self.max_batch_seen, len(group))
+        for pending in group:
+            pending.future.set_result(returned.get(pending.row["ticket_number"]))
+
+    def _fail(self, pending: _PendingTicket, error: Exception) -> None:
+        self.failures += 1
+        if pending.abandoned:
+            # Nobody is waiting on the future any more
+            print(f"❌ Ticket writer {self.name}: lost ticket {pending.row.get('ticket_number')}: {error}")
+        pending.future.set_exception(error)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "writer": self.name,
+            "durability": self.durability,
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+        }
+
+
+_WRITERS: Dict[tuple, TicketWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_ticket_writer(cfg: Dict[str, Any]) -> TicketWriter:
+    """Get or create the ticket writer for a DB config."""
+    key = tuple(sorted(cfg.items()))
+    writer = _WRITERS.get(key)
+    if writer is None:
+        with _WRITERS_LOCK:
+            writer = _WRITERS.get(key)
+            if writer is None:
+                writer = TicketWriter(cfg)
+                _WRITERS[key] = writer
+    return writer
+
+
+def writer_metrics() -> List[Dict[str, Any]]:
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+    return [w.metrics() for w in writers]
+
+
+@atexit.register
+def _flush_writers() -> None:
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+    for writer in writers:
+        writer.flush(timeout=5.0)
@@ -1,11 +1,15 @@
 from ..local_runner import MCPServer
+from ..idempotency import idempotent
+from ..tool_cache import TTL, OFFICE_TTL
+from .statements import execute_prepared
+from .ticket_writer import get_ticket_writer
 from .db import get_conn, UTILITY_DB
 import uuid
 
 server = MCPServer(name="utility_mcp_server")
 
 
-@server.tool()
+@server.tool(cache=TTL(OFFICE_TTL, tags=("offices:utility",)))
 def get_utility_office_by_woreda(woreda_name: str) -> dict:
     """
     Fetch utility office contact info by woreda.
@@ -21,7 +25,7 @@ def get_utility_office_by_woreda(woreda_name: str) -> dict:
     
     with get_conn(UTILITY_DB) as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (woreda_name,))
+            execute_prepared(cur, sql, (woreda_name,))
             row = cur.fetchone()
     
     if not row:
@@ -31,6 +35,7 @@ def get_utility_office_by_woreda(woreda_name: str) -> dict:
 
 
 @server.tool()
+@idempotent(identity=("woreda",))
 def create_utility_ticket(
     woreda: str,
     issue_description: str,
@@ -41,23 +46,14 @@ def create_utility_ticket(
     """
     ticket_number = f"UTIL-{uuid.uuid4().hex[:8].upper()}"
     
-    sql = """
-        INSERT INTO tickets
-        (ticket_number, woreda, issue_description, user_contact, status)
-        VALUES (%s, %s, %s, %s, %s)
-        RETURNING ticket_number, status, created_at;
-    """
-    
-    with get_conn(UTILITY_DB) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                sql,
-                (ticket_number, woreda, issue_description, user_contact, "RECEIVED")
-            )
-            result = cur.fetchone()
-            conn.commit()
-    
-    return dict(result)
+    # Batched with concurrent reports (group commit); see ticket_writer.py
+    return get_ticket_writer(UTILITY_DB).create({
+        "ticket_number": ticket_number,
+        "woreda": woreda,
+        "issue_description": issue_description,
+        "user_contact": user_contact,
+        "status": "RECEIVED",
+    })
 
 
 @server.tool()
@@ -73,7 +69,7 @@ def get_ticket_status(ticket_number: str) -> dict:
     
     with get_conn(UTILITY_DB) as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (ticket_number,))
+            execute_prepared(cur, sql, (ticket_number,))
             row = cur.fetchone()
     
     if not row:
@@ -49,3 +49,34 @@ def process_message_with_agent(runner, user_id, session_id, prompt):
     
     except Exception as e:
         raise Exception(f"ADK Runner error: {str(e)}")
+
+
+def stream_message_with_agent(runner, user_id, session_id, prompt, on_tool_event=None):
+    """
+    Stream a user message through the runner, yielding text deltas.
+    
+    Suitable for st.write_stream. Tool progress events are passed to
+    on_tool_event instead of being yielded as text.
+    
+    Args:
+        runner: AdkApp instance
+        user_id: User identifier
+        session_id: Session identifier
+        prompt: User's message
+        on_tool_event: Optional callback receiving tool_call/tool_result events
+    
+    Yields:
+        str: Response text deltas
+    """
+    if not hasattr(runner, 'run_stream'):
+        yield process_message_with_agent(runner, user_id, session_id, prompt)
+        return
+    
+    try:
+        for event in runner.run_stream(user_id=user_id, session_id=session_id, prompt=prompt):
+            if event.kind == "text":
+                yield event.text
+            elif on_tool_event:
+                on_tool_event(event)
+    except Exception as e:
+        raise Exception(f"ADK Runner error: {str(e)}")
@@ -0,0 +1,170 @@
+"""
+Instruction Compiler for Addis-Sync.
+
+Builds the static part of the system instruction (root agent + specialist
+agents) once per root Agent instead of on every turn, and keeps the
+per-session SESSION STATE block at the very end so the long static prefix
+is byte-identical across turns and sessions (provider-side prefix caching).
+
+Specialist prompts are kept verbatim: their rules only make sense inside
+their own sections, and the repeated boilerplate is a few hundred bytes.
+"""
+
+import weakref
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 UTF-8 bytes per token) for sizing prompts."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+class PromptSection:
+    """A named chunk of the compiled system instruction."""
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.bytes = len(text.encode("utf-8"))
+        self.tokens = estimate_tokens(text)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"section": self.name, "bytes": self.bytes, "tokens": self.tokens}
+
+
+class CompiledInstruction:
+    """
+    Static system instruction for one root agent, plus its resolved tools.
+
+    render() appends the dynamic session state after the static prefix.
+    """
+    def __init__(self, sections: List[PromptSection], tools: List[Callable]):
+        self.sections = sections
+        self.tools = tools
+        self.static_text = "".join(s.text for s in sections)
+
+    @staticmethod
+    def render_state(state: Dict[str, Any]) -> str:
+        """Render the per-session state block (always placed last)."""
+        state_context = "\n\nSESSION STATE:\n"
+        for k, v in state.items():
+            state_context += f"{k}: {v}\n"
+        return state_context
+
+    def render(self, state: Dict[str, Any]) -> str:
+        return self.static_text + self.render_state(state)
+
+    @property
+    def static_bytes(self) -> int:
+        return sum(s.bytes for s in self.sections)
+
+    def report(self, state: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Per-section byte and token counts.
+
+        Args:
+            state: Optional session state to include the dynamic section
+
+        Returns:
+            List of {"section", "bytes", "tokens"} dicts in prompt order
+        """
+        rows = [s.as_dict() for s in self.sections]
+        if state is not None:
+            rows.append(PromptSection("session_state", self.render_state(state)).as_dict())
+        return rows
+
+
+def _find_agent(agent, name: str):
+    if agent.name == name:
+        return agent
+    for sub in agent.sub_agents:
+        found = _find_agent(sub, name)
+        if found is not None:
+            return found
+    return None
+
+
+def _resolve_tools(agent, registry: Dict[str, Callable]) -> List[Callable]:
+    """Resolve an agent tree's tool stubs against the registry (registered MCP implementations)."""
+    tools = []
+    def collect_tools(agt):
+        for t in agt.tools:
+            if t.__name__ in registry:
+                tools.append(registry[t.__name__])
+        for sub in agt.sub_agents:
+            collect_tools(sub)
+    collect_tools(agent)
+    return tools
+
+
+def _compile_focused(specialist, registry: Dict[str, Callable]) -> CompiledInstruction:
+    """Single-specialist instruction and tools, used when the intent router is confident."""
+    section = PromptSection(specialist.name, specialist.instruction)
+    return CompiledInstruction([section], _resolve_tools(specialist, registry))
+
+
+def _compile(agent, registry: Dict[str, Callable]) -> CompiledInstruction:
+    sections = [PromptSection(agent.name, agent.instruction)]
+
+    # Flatten the sub-agent tree in the same order as the old recursive walk
+    specialists = []
+    def collect(agt):
+        for sub in agt.sub_agents:
+            specialists.append(sub)
+            collect(sub)
+    collect(agent)
+
+    sections.append(PromptSection("specialist_header", "\n\n### SPECIALIST AGENT CAPABILITIES:\n"))
+    for sub in specialists:
+        sections.append(PromptSection(sub.name, f"\n--- {sub.name.upper()} ---\n{sub.instruction}\n"))
+
+    return CompiledInstruction(sections, _resolve_tools(agent, registry))
+
+
+_COMPILED: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_COMPILE_LOCK = threading.Lock()
+
+
+def _registry_version(registry: Dict[str, Callable]) -> Any:
+    """Changes whenever a tool is (re-)registered; plain dicts fall back to their items."""
+    version = getattr(registry, "version", None)
+    return version if version is not None else tuple(registry.items())
+
+
+def compile_instruction(agent, registry: Dict[str, Callable], focus: Optional[str] = None) -> CompiledInstruction:
+    """
+    Get the compiled instruction for a root agent, building it on first use.
+
+    The cache entry is rebuilt if tools were registered or replaced after compilation.
+
+    Args:
+        agent: Root Agent
+        registry: Tool registry used to resolve the agent's tool stubs
+        focus: Optional sub-agent name to compile only that specialist
+
+    Returns:
+        CompiledInstruction
+    """
+    version = _registry_version(registry)
+    entry = _COMPILED.get(agent, {}).get(focus)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    with _COMPILE_LOCK:
+        per_agent = _COMPILED.setdefault(agent, {})
+        entry = per_agent.get(focus)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        if focus is None:
+            compiled = _compile(agent, registry)
+        else:
+            specialist = _find_agent(agent, focus)
+            if specialist is None:
+                raise ValueError(f"Unknown sub-agent: {focus}")
+            compiled = _compile_focused(specialist, registry)
+        per_agent[focus] = (version, compiled)
+        print(
+            f"📐 Compiled instruction for {focus or agent.name}: {len(compiled.sections)} sections, "
+            f"{compiled.static_bytes} bytes (~{estimate_tokens(compiled.static_text)} tokens)"
+        )
+        return compiled
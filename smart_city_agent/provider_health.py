@@ -0,0 +1,214 @@
+"""
+Provider Health Registry for Addis-Sync.
+
+Tracks a rolling error rate and latency for every LLM provider/model the
+runner can use (Gemini primary, OpenRouter fallbacks) and wraps each one in a
+circuit breaker:
+
+- CLOSED: calls allowed; trips OPEN after consecutive failures or a high
+  error rate over the rolling window
+- OPEN: calls skipped until the cooldown expires (cooldown doubles on each
+  failed probe, up to a cap)
+- HALF_OPEN: a single probe call is allowed; success closes the circuit,
+  failure re-opens it
+
+Candidates are ordered by a health score so a dead model stops costing a
+timeout on every citizen message.
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+WINDOW_SIZE = 20
+FAILURE_THRESHOLD = 3           # consecutive failures that trip the breaker
+ERROR_RATE_THRESHOLD = 0.5      # ...or this error rate over the window
+MIN_SAMPLES = 5                 # samples needed before the error rate counts
+BASE_COOLDOWN = 30.0            # seconds before the first half-open probe
+MAX_COOLDOWN = 600.0
+ERROR_PENALTY = 10.0            # score seconds added per unit of error rate
+UNKNOWN_LATENCY = 3.0           # assumed latency for models without samples
+EWMA_ALPHA = 0.3
+
+
+class ModelHealth:
+    """Rolling health and circuit-breaker state for one provider/model."""
+    def __init__(self, key: str):
+        self.key = key
+        self.samples = deque(maxlen=WINDOW_SIZE)  # (ok, latency)
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = BASE_COOLDOWN
+        self.probe_started: Optional[float] = None
+        self.trips = 0
+        self.skipped = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def latencies(self) -> List[float]:
+        """Latencies of the successful calls in the rolling window."""
+        return [latency for ok, latency in self.samples if ok]
+
+    @property
+    def score(self) -> float:
+        """Lower is healthier: expected latency plus an error-rate penalty."""
+        latency = self.latency_ewma if self.latency_ewma is not None else UNKNOWN_LATENCY
+        return latency + ERROR_PENALTY * self.error_rate
+
+    def available(self, now: float) -> bool:
+        """Whether allow() would let a call through now (no state change, no probe claimed)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now - self.opened_at >= self.cooldown
+        return self.probe_started is None or now - self.probe_started >= self.cooldown
+
+    def allow(self, now: float) -> bool:
+        """Claim a call: moves OPEN to HALF_OPEN after the cooldown and takes the probe slot."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.cooldown:
+                self.skipped += 1
+                return False
+            self.state = HALF_OPEN
+            self.probe_started = None
+        # HALF_OPEN: one probe at a time (a lost probe is retried after the cooldown)
+        if self.probe_started is None or now - self.probe_started >= self.cooldown:
+            self.probe_started = now
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, ok: bool, latency: float, now: float) -> None:
+        self.samples.append((ok, latency))
+        if ok:
+            self.consecutive_failures = 0
+            self.latency_ewma = latency if self.latency_ewma is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency_ewma
+            )
+            if self.state != CLOSED:
+                print(f"🟢 Circuit closed for {self.key}")
+            self.state = CLOSED
+            self.cooldown = BASE_COOLDOWN
+            self.probe_started = None
+            return
+
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._trip(now, min(self.cooldown * 2, MAX_COOLDOWN))
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= FAILURE_THRESHOLD
+            or (len(self.samples) >= MIN_SAMPLES and self.error_rate >= ERROR_RATE_THRESHOLD)
+        ):
+            self._trip(now, self.cooldown)
+
+    def _trip(self, now: float, cooldown: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.cooldown = cooldown
+        self.probe_started = None
+        self.trips += 1
+        print(f"🔴 Circuit open for {self.key} (retry in {cooldown:.0f}s)")
+
+    def snapshot(self) -> Dict:
+        return {
+            "key": self.key,
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "samples": len(self.samples),
+            "trips": self.trips,
+            "skipped": self.skipped,
+            "score": round(self.score, 3),
+        }
+
+
+class ProviderHealthRegistry:
+    """Thread-safe registry of ModelHealth entries keyed by 'provider:model'."""
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._models: Dict[str, ModelHealth] = {}
+
+    @staticmethod
+    def key(provider: str, model: str) -> str:
+        return f"{provider}:{model}"
+
+    def get(self, key: str) -> ModelHealth:
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> ModelHealth:
+        if key not in self._models:
+            self._models[key] = ModelHealth(key)
+        return self._models[key]
+
+    def available(self, key: str) -> bool:
+        """Whether a call to this model could be attempted now (claims nothing)."""
+        with self._lock:
+            return self._get(key).available(self._clock())
+
+    def allow(self, key: str) -> bool:
+        """
+        Whether a call to this model may be attempted now (claims the half-open probe).
+
+        Call it only right before the model is actually called.
+        """
+        with self._lock:
+            return self._get(key).allow(self._clock())
+
+    def record(self, key: str, ok: bool, latency: float) -> None:
+        with self._lock:
+            self._get(key).record(ok, latency, self._clock())
+
+    def latencies(self, key: str) -> List[float]:
+        with self._lock:
+            return self._get(key).latencies()
+
+    def order(self, keys: List[str]) -> List[str]:
+        """
+        Order candidates by health and drop those whose circuit is open.
+
+        Ranking has no side effects (no probe is claimed); callers allow()
+        each candidate just before attempting it. Ties keep the configured
+        order, so a fresh registry behaves like the old fixed fallback chain.
+        """
+        with self._lock:
+            ranked = sorted(keys, key=lambda k: self._get(k).score)
+            now = self._clock()
+            return [k for k in ranked if self._get(k).available(now)]
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [m.snapshot() for m in self._models.values()]
+
+
+# Global registry shared by every AdkApp in the process
+_provider_health: Optional[ProviderHealthRegistry] = None
+
+
+def get_provider_health() -> ProviderHealthRegistry:
+    """
+    Get or create the global provider health registry.
+    
+    Returns:
+        ProviderHealthRegistry instance
+    """
+    global _provider_health
+    
+    if _provider_health is None:
+        _provider_health = ProviderHealthRegistry()
+    
+    return _provider_health
@@ -0,0 +1,134 @@
+"""
+Pluggable LLM Providers for Addis-Sync.
+
+AdkApp talks to three clients: Gemini (genai.Client), OpenRouter (sync
+openai.OpenAI) and OpenRouter async (openai.AsyncOpenAI). A Providers
+bundle supplies them, so the runner can be driven by live APIs or fully
+offline:
+
+- "live": real clients from GOOGLE_API_KEY / OPENROUTER_API_KEY (default)
+- "record": live clients wrapped by cassette recorders (ADK_CASSETTE)
+- "replay": answers from a recorded cassette, with the recorded latency or
+  ADK_REPLAY_LATENCY seconds per round trip
+- "fake": the scriptable fake provider (default greeting script)
+
+Select with ADK_PROVIDER, or pass providers= to AdkApp.
+"""
+
+import os
+from typing import Any, Optional
+
+ADK_PROVIDER = os.environ.get("ADK_PROVIDER", "live")
+ADK_CASSETTE = os.environ.get("ADK_CASSETTE", "provider_cassette.jsonl")
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+class Providers:
+    """
+    The LLM clients behind one AdkApp.
+
+    Args:
+        gemini: genai.Client-compatible client, or None
+        openrouter: openai.OpenAI-compatible client, or None
+        openrouter_async: openai.AsyncOpenAI-compatible client, or None
+        name: Label used in logs
+    """
+    def __init__(self, gemini: Any = None, openrouter: Any = None, openrouter_async: Any = None, name: str = "custom"):
+        self.gemini = gemini
+        self.openrouter = openrouter
+        self.openrouter_async = openrouter_async
+        self.name = name
+
+
+def live_providers() -> Providers:
+    """Real clients for whichever API keys (and libraries) are available."""
+    try:
+        from google import genai
+    except ImportError:
+        genai = None
+    try:
+        import openai
+    except ImportError:
+        openai = None
+
+    gemini_key = os.environ.get("GOOGLE_API_KEY")
+    gemini = None
+    if gemini_key and genai:
+        gemini = genai.Client(api_key=gemini_key)
+        print(f"DEBUG: Gemini Client Initialized (Key: {gemini_key[:4]}***)")
+    else:
+        print(f"DEBUG: Gemini Client MISSING (Key: {bool(gemini_key)}, Lib: {bool(genai)})")
+
+    openrouter_key = os.environ.get("OPENROUTER_API_KEY")
+    openrouter = openrouter_async = None
+    if openrouter_key and openai:
+        openrouter = openai.OpenAI(base_url=OPENROUTER_BASE_URL, api_key=openrouter_key)
+        openrouter_async = openai.AsyncOpenAI(base_url=OPENROUTER_BASE_URL, api_key=openrouter_key)
+        print(f"DEBUG: OpenRouter Client Initialized (Key: {openrouter_key[:4]}***)")
+    else:
+        print(f"DEBUG: OpenRouter Client MISSING (Key: {bool(openrouter_key)}, Lib: {bool(openai)})")
+
+    return Providers(gemini, openrouter, openrouter_async, name="live")
+
+
+def recording_providers(path: str = ADK_CASSETTE) -> Providers:
+    """Live clients whose replies are recorded to a cassette file."""
+    from .cassette import Cassette, RecordingGeminiClient, RecordingOpenRouterClient
+
+    live = live_providers()
+    cassette = Cassette(path)
+    print(f"📼 Recording provider replies to {path}")
+    return Providers(
+        RecordingGeminiClient(live.gemini, cassette) if live.gemini else None,
+        RecordingOpenRouterClient(live.openrouter, cassette) if live.openrouter else None,
+        RecordingOpenRouterClient(live.openrouter_async, cassette, is_async=True) if live.openrouter_async else None,
+        name="record",
+    )
+
+
+def replay_providers(path: str = ADK_CASSETTE, latency: Optional[float] = None) -> Providers:
+    """
+    Offline clients answering from a cassette.
+
+    Args:
+        path: Cassette file
+        latency: Seconds per simulated round trip (None = recorded mean per model)
+    """
+    from .cassette import Cassette, replay_gemini_client, replay_openrouter_client
+
+    cassette = Cassette(path)
+    print(f"📼 Replaying {len(cassette)} recorded replies from {path}")
+    return Providers(
+        replay_gemini_client(cassette, latency),
+        replay_openrouter_client(cassette, latency),
+        replay_openrouter_client(cassette, latency, is_async=True),
+        name="replay",
+    )
+
+
+def fake_providers(script=None, latency: float = 0.0) -> Providers:
+    """Scriptable fake clients (see fake_provider.py)."""
+    from .fake_provider import FakeGeminiClient, FakeOpenRouterClient
+
+    return Providers(
+        FakeGeminiClient(script=script, latency=latency),
+        FakeOpenRouterClient(script=script, latency=latency),
+        FakeOpenRouterClient(script=script, latency=latency, is_async=True),
+        name="fake",
+    )
+
+
+def load_providers(mode: Optional[str] = None) -> Providers:
+    """Build the providers selected by ADK_PROVIDER (or `mode`)."""
+    mode = mode or ADK_PROVIDER
+    if mode == "live":
+        return live_providers()
+    if mode == "record":
+        return recording_providers()
+    if mode == "replay":
+        latency = os.environ.get("ADK_REPLAY_LATENCY")
+        return replay_providers(latency=float(latency) if latency else None)
+    if mode == "fake":
+        return fake_providers()
+    raise ValueError(f"Unknown ADK_PROVIDER: {mode} (expected live, record, replay or fake)")
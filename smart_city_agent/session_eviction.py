@@ -0,0 +1,252 @@
+"""
+Session Eviction for Addis-Sync.
+
+Every conversation stays in SESSION_STORE until something removes it, so a
+long-running process grows without bound. The evictor keeps resident
+sessions within limits:
+
+- TTL: sessions idle longer than ADK_SESSION_TTL seconds are evicted
+- count cap: at most ADK_SESSION_MAX resident sessions
+- memory cap: at most ADK_SESSION_MAX_MB of (estimated) session data
+
+Sessions are tracked in one access-ordered list (OrderedDict). Every session
+shares the same TTL, so least-recently-used order is also expiry order: the
+sweeper pops expired sessions from the head and stops at the first live one,
+and the caps evict from the same head. Touching a session is O(1) and a
+sweep costs O(evicted), never a scan of all sessions.
+
+Caps are enforced inline when a session is touched or grows; TTL expiry is
+swept by a background thread every ADK_SESSION_SWEEP_S seconds. Sessions
+pinned by a running turn are never evicted: the caps skip them and the
+sweeper treats them as just used. With a durable session store an evicted
+session is only dropped from memory (its write-behind still completes) and
+is lazy-loaded again on its next turn; the evictor is the only owner of
+residency, the store's hot cache has no cap of its own.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+SESSION_TTL = float(os.environ.get("ADK_SESSION_TTL", "7200"))
+SESSION_MAX = int(os.environ.get("ADK_SESSION_MAX", "10000"))
+SESSION_MAX_BYTES = int(float(os.environ.get("ADK_SESSION_MAX_MB", "512")) * 1024 * 1024)
+SWEEP_INTERVAL = float(os.environ.get("ADK_SESSION_SWEEP_S", "30"))
+
+# Rough cost of a Session object and its containers (measured with tracemalloc)
+SESSION_OVERHEAD_BYTES = 1024
+
+TTL_REASON = "ttl"
+COUNT_REASON = "count"
+MEMORY_REASON = "memory"
+
+
+def estimate_session_bytes(session) -> int:
+    """Approximate memory held by a Session (transcript records and state)."""
+    size = SESSION_OVERHEAD_BYTES + session.history.nbytes()
+    if session.state:
+        size += len(json.dumps(session.state, default=str))
+    return size
+
+
+class SessionEvictor:
+    """
+    TTL + count/memory-capped LRU over resident sessions.
+
+    Args:
+        remove: Drops a session from memory by id (e.g. SESSION_STORE.pop);
+            called with the evictor's lock held, so it must not call back into the evictor
+        ttl: Idle seconds before a session expires (None = no TTL)
+        max_sessions: Resident session cap (None = unbounded)
+        max_bytes: Estimated resident bytes cap (None = unbounded)
+        sweep_interval: Seconds between background TTL sweeps
+        size: Byte estimator for a Session
+        clock: Time source (monotonic seconds)
+    """
+    def __init__(
+        self,
+        remove: Callable[[str], Any],
+        ttl: Optional[float] = SESSION_TTL,
+        max_sessions: Optional[int] = SESSION_MAX,
+        max_bytes: Optional[int] = SESSION_MAX_BYTES,
+        sweep_interval: float = SWEEP_INTERVAL,
+        size: Callable[[Any], int] = estimate_session_bytes,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.remove = remove
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.size = size
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        # session_id -> [last_access, bytes], least recently used first
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self.resident_bytes = 0
+        # session_id -> number of running turns holding it resident
+        self._pinned: Dict[str, int] = {}
+
+        # Metrics
+        self.evicted = {TTL_REASON: 0, COUNT_REASON: 0, MEMORY_REASON: 0}
+        self.sweeps = 0
+        self.last_sweep_ms = 0.0
+
+        self._sweeper: Optional[threading.Thread] = None
+
+    def touch(self, session) -> None:
+        """Mark a session as used now (new sessions are admitted, caps enforced)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(session.id)
+            if entry is None:
+                entry = [now, self.size(session)]
+                self._entries[session.id] = entry
+                self.resident_bytes += entry[1]
+            else:
+                entry[0] = now
+                self._entries.move_to_end(session.id)
+            self._remove(self._over_caps(keep=session.id))
+        self._start_sweeper()
+
+    def resize(self, session) -> None:
+        """Re-estimate a session's size after it grew (end of a turn)."""
+        with self._lock:
+            entry = self._entries.get(session.id)
+            if entry is None:
+                return
+            size = self.size(session)
+            self.resident_bytes += size - entry[1]
+            entry[1] = size
+            self._remove(self._over_caps(keep=session.id))
+
+    def pin(self, session_id: str) -> None:
+        """Keep a session resident until unpin() (for the duration of a turn)."""
+        with self._lock:
+            self._pinned[session_id] = self._pinned.get(session_id, 0) + 1
+
+    def unpin(self, session_id: str) -> None:
+        with self._lock:
+            count = self._pinned.get(session_id, 0) - 1
+            if count > 0:
+                self._pinned[session_id] = count
+            else:
+                self._pinned.pop(session_id, None)
+
+    def forget(self, session_id: str) -> None:
+        """Stop tracking a session that was dropped elsewhere."""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                self.resident_bytes -= entry[1]
+
+    def _pop(self, session_id: str, reason: str) -> str:
+        entry = self._entries.pop(session_id)
+        self.resident_bytes -= entry[1]
+        self.evicted[reason] += 1
+        return session_id
+
+    def _over_caps(self, keep: str) -> list:
+        """Pop LRU sessions (never `keep` or a pinned one) until both caps hold. Caller holds the lock."""
+        excess_count = len(self._entries) - self.max_sessions if self.max_sessions is not None else 0
+        excess_bytes = self.resident_bytes - self.max_bytes if self.max_bytes is not None else 0
+        if excess_count <= 0 and excess_bytes <= 0:
+            return []
+        chosen = []
+        for session_id, entry in self._entries.items():
+            if excess_count <= 0 and excess_bytes <= 0:
+                break
+            if session_id == keep or session_id in self._pinned:
+                continue
+            chosen.append((session_id, COUNT_REASON if excess_count > 0 else MEMORY_REASON))
+            excess_count -= 1
+            excess_bytes -= entry[1]
+        return [self._pop(session_id, reason) for session_id, reason in chosen]
+
+    def _remove(self, session_ids: list) -> None:
+        """
+        Drop the victims from memory. Caller holds the lock, so no touch() or
+        pin() can slip in between choosing a victim and removing it.
+        """
+        for session_id in session_ids:
+            self.remove(session_id)
+
+    def idle_for(self, session_id: str) -> Optional[float]:
+        """Seconds since the session was last used (0 mid-turn), None if not resident."""
+        with self._lock:
+            if session_id in self._pinned:
+                return 0.0
+            entry = self._entries.get(session_id)
+            return None if entry is None else self.clock() - entry[0]
+
+    def expire(self, session_id: str, idle: float) -> bool:
+        """
+        Evict one session if it has been idle for `idle` seconds and no turn pins it.
+
+        Returns:
+            True if the session was evicted
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or session_id in self._pinned or self.clock() - entry[0] < idle:
+                return False
+            self._remove([self._pop(session_id, TTL_REASON)])
+            return True
+
+    def sweep(self) -> int:
+        """Evict every expired session; returns how many were evicted."""
+        start = time.perf_counter()
+        victims = []
+        if self.ttl is not None:
+            now = self.clock()
+            deadline = now - self.ttl
+            with self._lock:
+                while self._entries:
+                    session_id, entry = next(iter(self._entries.items()))
+                    if entry[0] > deadline:
+                        break
+                    if session_id in self._pinned:
+                        # Mid-turn: in use right now
+                        entry[0] = now
+                        self._entries.move_to_end(session_id)
+                        continue
+                    victims.append(self._pop(session_id, TTL_REASON))
+                self._remove(victims)
+        self.sweeps += 1
+        self.last_sweep_ms = (time.perf_counter() - start) * 1000
+        if victims:
+            print(f"🧹 Session evictor: {len(victims)} idle sessions evicted, {len(self._entries)} resident")
+        return len(victims)
+
+    def _start_sweeper(self) -> None:
+        if self._sweeper is None and self.ttl is not None and self.sweep_interval > 0:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+                    self._sweeper.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Session evictor: sweep failed: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = len(self._entries)
+            pinned = len(self._pinned)
+        return {
+            "resident": resident,
+            "pinned": pinned,
+            "resident_bytes": self.resident_bytes,
+            "evicted": dict(self.evicted),
+            "evicted_total": sum(self.evicted.values()),
+            "sweeps": self.sweeps,
+            "last_sweep_ms": round(self.last_sweep_ms, 3),
+        }
@@ -5,10 +5,11 @@ Provides centralized session management using Google ADK's SessionService.
 Supports both in-memory (development) and database-backed (production) sessions.
 """
 
+import re
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any
-from .local_runner import Session, InMemorySessionService
+from .local_runner import Session, InMemorySessionService, SESSION_EVICTOR
 
 
 class AddisSessionService(InMemorySessionService):
@@ -107,18 +108,30 @@ class AddisSessionService(InMemorySessionService):
         """
         Remove expired sessions from memory.
         
+        AdkApp turns do not go through this service, so a session also counts
+        as accessed whenever SESSION_EVICTOR last saw it used; a session a turn
+        is running on is never expired. The Session object is evicted through
+        SESSION_EVICTOR (which also expires idle sessions in the background,
+        see session_eviction.py), and only once no other user's entry refers
+        to the same session_id.
+        
         Returns:
             Number of sessions cleaned up
         """
         expired_keys = []
+        now = datetime.now()
         
         for key, metadata in self._session_metadata.items():
-            if datetime.now() - metadata['last_accessed'] > self.session_timeout:
+            idle = SESSION_EVICTOR.idle_for(metadata['session_id'])
+            if idle is not None:
+                metadata['last_accessed'] = max(metadata['last_accessed'], now - timedelta(seconds=idle))
+            if now - metadata['last_accessed'] > self.session_timeout:
                 expired_keys.append(key)
         
         for key in expired_keys:
-            del self._session_metadata[key]
-            # Note: Parent class handles actual session cleanup
+            session_id = self._session_metadata.pop(key)['session_id']
+            if not any(m['session_id'] == session_id for m in self._session_metadata.values()):
+                SESSION_EVICTOR.expire(session_id, idle=self.session_timeout.total_seconds())
         
         return len(expired_keys)
     
@@ -211,6 +224,34 @@ class SessionStateHelper:
         })
 
 
+# --- Post-tool hooks (AdkApp.tool_hooks) ---
+# The agent prompts read user:woreda and last_ticket_number from the session
+# state; these hooks fill them from successful tool calls, so the citizen is
+# not asked for the woreda or ticket number again.
+
+TICKET_TOOL_RE = re.compile(r"^create_(\w+)_ticket$")
+OFFICE_TOOL_RE = re.compile(r"^(?:get_\w+_office_by_woreda|find_closest_\w+_office)$")
+
+
+def remember_ticket(session: Session, tool_name: str, args: Dict[str, Any], result: Any) -> None:
+    """A created ticket becomes the session's last ticket; its woreda is the user's woreda."""
+    match = TICKET_TOOL_RE.match(tool_name)
+    if not match or not isinstance(result, dict) or not result.get('ticket_number'):
+        return
+    SessionStateHelper.set_last_ticket(session, result['ticket_number'], match.group(1).capitalize())
+    if args.get('woreda'):
+        SessionStateHelper.set_user_woreda(session, args['woreda'])
+
+
+def remember_woreda(session: Session, tool_name: str, args: Dict[str, Any], result: Any) -> None:
+    """A successful office lookup confirms the user's woreda."""
+    if OFFICE_TOOL_RE.match(tool_name) and args.get('woreda_name'):
+        SessionStateHelper.set_user_woreda(session, args['woreda_name'])
+
+
+SESSION_STATE_HOOKS = [remember_ticket, remember_woreda]
+
+
 # Global session service instance
 _session_service: Optional[AddisSessionService] = None
 
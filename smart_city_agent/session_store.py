@@ -0,0 +1,528 @@
+"""
+Durable Session Store for Addis-Sync.
+
+By default sessions live only in the process (SESSION_STORE), so a restart or
+a second replica loses every conversation together with its state
+(user:woreda, last_ticket_number, ...) and citizens must repeat themselves.
+A SessionStore keeps them in a database instead:
+
+- hot cache: resident sessions stay in memory; which ones stay is decided
+  by the runner's SessionEvictor (TTL, count and memory caps), the single
+  owner of residency (max_sessions only bounds a standalone store)
+- lazy load: a session that is not resident is read from the backend on
+  first use, so a restarted or scaled-out process picks up where another left off
+- write-behind: a finished turn snapshots the session (still under its turn
+  lock) and marks it dirty; a background thread writes dirty snapshots in
+  batches (one multi-row upsert per batch) every ADK_SESSION_FLUSH_MS, so
+  the turn never waits for the database
+
+Sessions evicted from the hot cache, or being written, stay reachable until
+their write completes, so a reload never sees an older copy.
+
+Replicas share the backend, so every row carries a version. A write only
+lands if the row is still at the version this process loaded (compare-and-
+set); if another replica wrote the session first, the local copy is dropped
+and the next use reloads the newer one instead of overwriting it. A resident
+session is also revalidated against the stored version at most every
+ADK_SESSION_REVALIDATE_MS, so a turn served here sees what another replica
+wrote.
+
+Backends (ADK_SESSION_BACKEND):
+- "memory" (default): no persistence, the old behaviour
+- "sqlite": single-node file database (ADK_SESSION_SQLITE)
+- "postgres": the agents' Postgres (DATABASE_URL schema "sessions", or the
+  local sessions_db), table adk_sessions
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .history_manager import HistoryWindow
+from .transcript import Transcript
+
+SESSION_BACKEND = os.environ.get("ADK_SESSION_BACKEND", "memory")
+SESSION_SQLITE_PATH = os.environ.get("ADK_SESSION_SQLITE", "adk_sessions.db")
+SESSION_FLUSH_INTERVAL = float(os.environ.get("ADK_SESSION_FLUSH_MS", "200")) / 1000
+SESSION_MAX_BATCH = int(os.environ.get("ADK_SESSION_MAX_BATCH", "100"))
+SESSION_REVALIDATE = float(os.environ.get("ADK_SESSION_REVALIDATE_MS", "1000")) / 1000
+SESSION_TABLE = "adk_sessions"
+
+
+# --- Records ---
+
+def encode_session(session) -> Dict[str, Any]:
+    """
+    JSON-ready snapshot of a Session.
+
+    Returns:
+        {"session_id", "history": [turn records], "state": {...}, "history_window": {...} | None}
+        (the store adds the expected "version" when it writes the record)
+    """
+    window = session.history_window
+    return {
+        "session_id": session.id,
+        "history": json.loads(json.dumps(session.history.to_records(), default=str)),
+        "state": json.loads(json.dumps(dict(session.state), default=str)),
+        "history_window": None if window is None else {
+            "pinned": sorted(window.pinned),
+            "summary_lines": list(window.summary_lines),
+            "tickets": list(window.tickets),
+            "summarized_turns": window.summarized_turns,
+        },
+    }
+
+
+def decode_session(record: Dict[str, Any], factory: Callable[[str], Any]):
+    """Rebuild a Session (created by `factory`) from a stored record."""
+    session = factory(record["session_id"])
+    session.history = Transcript.from_records(record.get("history") or [])
+    session.state = dict(record.get("state") or {})
+    session.version = record.get("version", 0)
+    window = record.get("history_window")
+    if window:
+        session.history_window = HistoryWindow()
+        session.history_window.pinned = set(window["pinned"])
+        session.history_window.summary_lines = list(window["summary_lines"])
+        session.history_window.tickets = list(window["tickets"])
+        session.history_window.summarized_turns = window["summarized_turns"]
+    return session
+
+
+# --- Backends ---
+
+class SQLiteSessionBackend:
+    """
+    Sessions in a local SQLite file (single node).
+
+    Args:
+        path: Database file (":memory:" for tests)
+        table: Table name
+    """
+    def __init__(self, path: str = SESSION_SQLITE_PATH, table: str = SESSION_TABLE):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "session_id TEXT PRIMARY KEY, history TEXT NOT NULL, state TEXT NOT NULL, "
+                "history_window TEXT, updated_at REAL NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if "version" not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT history, state, history_window, version FROM {self.table} WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "session_id": session_id,
+            "history": json.loads(row[0]),
+            "state": json.loads(row[1]),
+            "history_window": json.loads(row[2]) if row[2] else None,
+            "version": row[3],
+        }
+
+    def version(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT version FROM {self.table} WHERE session_id = ?", (session_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def save(self, records: List[Dict[str, Any]]) -> List[str]:
+        """Write each record unless its row moved past the record's version; returns the conflicting ids."""
+        now = time.time()
+        rows = [
+            (r["session_id"], json.dumps(r["history"], ensure_ascii=False), json.dumps(r["state"], ensure_ascii=False),
+             json.dumps(r["history_window"]) if r["history_window"] else None, now, r["version"] + 1)
+            for r in records
+        ]
+        conflicts = []
+        with self._lock, self._conn:
+            for row in rows:
+                cur = self._conn.execute(
+                    f"INSERT INTO {self.table} (session_id, history, state, history_window, updated_at, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+                    "history = excluded.history, state = excluded.state, "
+                    "history_window = excluded.history_window, updated_at = excluded.updated_at, "
+                    f"version = excluded.version WHERE {self.table}.version = excluded.version - 1",
+                    row,
+                )
+                if cur.rowcount == 0:
+                    conflicts.append(row[0])
+        return conflicts
+
+    def delete(self, session_ids: Iterable[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE session_id = ?", [(s,) for s in session_ids])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PostgresSessionBackend:
+    """
+    Sessions in Postgres (JSONB columns), shared by every replica.
+
+    Args:
+        cfg: DB config (defaults to schema "sessions" / local sessions_db)
+        table: Table name
+        connection: Context manager factory for a connection (defaults to the pool's get_conn)
+    """
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None, table: str = SESSION_TABLE, connection=None):
+        if cfg is None or connection is None:
+            from .mcp_server.db import get_conn, get_db_config
+            cfg = cfg or get_db_config("sessions", "sessions_db")
+            connection = connection or get_conn
+        self.cfg = cfg
+        self.table = table
+        self._connection = connection
+        with self._connection(self.cfg) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "session_id TEXT PRIMARY KEY, history JSONB NOT NULL, state JSONB NOT NULL, "
+                    "history_window JSONB, updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(), "
+                    "version BIGINT NOT NULL DEFAULT 0);"
+                )
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;")
+            conn.commit()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection(self.cfg) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT session_id, history, state, history_window, version FROM {self.table} WHERE session_id = %s;",
+                    (session_id,),
+                )
+                row = cur.fetchone()
+        return dict(row) if row else None
+
+    def version(self, session_id: str) -> Optional[int]:
+        with self._connection(self.cfg) as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT version FROM {self.table} WHERE session_id = %s;", (session_id,))
+                row = cur.fetchone()
+        return None if row is None else row["version"]
+
+    def save(self, records: List[Dict[str, Any]]) -> List[str]:
+        """Write each record unless its row moved past the record's version; returns the conflicting ids."""
+        # One multi-row upsert per batch (a batch never repeats a session_id)
+        values = ", ".join(["(%s, %s::jsonb, %s::jsonb, %s::jsonb, NOW(), %s)"] * len(records))
+        params = []
+        for r in records:
+            params.extend([
+                r["session_id"],
+                json.dumps(r["history"], ensure_ascii=False),
+                json.dumps(r["state"], ensure_ascii=False),
+                json.dumps(r["history_window"]) if r["history_window"] else None,
+                r["version"] + 1,
+            ])
+        with self._connection(self.cfg) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"INSERT INTO {self.table} (session_id, history, state, history_window, updated_at, version) "
+                    f"VALUES {values} ON CONFLICT (session_id) DO UPDATE SET "
+                    "history = EXCLUDED.history, state = EXCLUDED.state, "
+                    "history_window = EXCLUDED.history_window, updated_at = EXCLUDED.updated_at, "
+                    f"version = EXCLUDED.version WHERE {self.table}.version = EXCLUDED.version - 1 "
+                    "RETURNING session_id;",
+                    params,
+                )
+                written = {row["session_id"] for row in cur.fetchall()}
+            conn.commit()
+        return [r["session_id"] for r in records if r["session_id"] not in written]
+
+    def delete(self, session_ids: Iterable[str]) -> None:
+        with self._connection(self.cfg) as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM {self.table} WHERE session_id = ANY(%s);", (list(session_ids),))
+            conn.commit()
+
+    def close(self) -> None:
+        pass
+
+
+# --- Store ---
+
+class SessionStore:
+    """
+    Hot cache of Sessions in front of a durable backend.
+
+    Args:
+        backend: SQLiteSessionBackend / PostgresSessionBackend (load, version, save, delete)
+        factory: Creates an empty Session for an id (local_runner.Session)
+        hot: Dict holding the resident sessions (e.g. SESSION_STORE), in LRU order
+        max_sessions: Resident sessions kept in memory (None = unbounded; the
+            runner's SessionEvictor evicts through evict() instead)
+        flush_interval: Seconds between write-behind flushes
+        max_batch: Sessions per upsert
+        revalidate_after: Seconds before a resident session is checked against
+            the stored version again (None = never, single replica)
+    """
+    def __init__(
+        self,
+        backend,
+        factory: Callable[[str], Any],
+        hot: Optional[Dict[str, Any]] = None,
+        max_sessions: Optional[int] = None,
+        flush_interval: float = SESSION_FLUSH_INTERVAL,
+        max_batch: int = SESSION_MAX_BATCH,
+        revalidate_after: Optional[float] = SESSION_REVALIDATE,
+    ):
+        self.backend = backend
+        self.factory = factory
+        self.hot = {} if hot is None else hot
+        self.max_sessions = max_sessions
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.revalidate_after = revalidate_after
+
+        self.on_evict: Optional[Callable[[str], Any]] = None   # told when the hot cache drops a session
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty: Dict[str, tuple] = {}     # session_id -> (Session, snapshot) awaiting write
+        self._writing: Dict[str, tuple] = {}   # session_id -> (Session, snapshot) in the current flush
+        self._validated: Dict[str, float] = {} # session_id -> when the resident copy was last checked
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.batches = 0
+        self.writes = 0
+        self.failures = 0
+        self.conflicts = 0
+        self.reloads = 0
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+        self._thread.start()
+
+    def get(self, session_id: str):
+        """Resident session (revalidated), else the unwritten or stored copy, else a new Session."""
+        pending = None
+        with self._lock:
+            session = self.hot.pop(session_id, None)
+            if session is not None:
+                self.hits += 1
+                self.hot[session_id] = session      # move to the MRU end
+                if not self._stale(session_id):
+                    return session
+            else:
+                self.misses += 1
+                pending = self._dirty.get(session_id) or self._writing.get(session_id)
+                if pending is not None:
+                    dropped = self._admit(pending[0])
+        if session is not None:
+            return self._revalidate(session)
+        if pending is not None:
+            self._notify(dropped)
+            return pending[0]
+        return self._load(session_id)
+
+    def _stale(self, session_id: str) -> bool:
+        """True if a clean resident session is due for a version check (caller holds the lock)."""
+        if self.revalidate_after is None or self._pending(session_id):
+            return False
+        return time.monotonic() - self._validated.get(session_id, 0.0) >= self.revalidate_after
+
+    def _pending(self, session_id: str) -> bool:
+        # An unwritten local change: its compare-and-set detects a newer stored version
+        return session_id in self._dirty or session_id in self._writing
+
+    def _revalidate(self, session):
+        """Reload a resident session if another replica wrote a newer version."""
+        try:
+            stored = self.backend.version(session.id)
+        except Exception as e:
+            # Backend unreachable: the resident copy is the best there is
+            print(f"⚠️ Session store: could not revalidate {session.id} ({e})")
+            return session
+        with self._lock:
+            self._validated[session.id] = time.monotonic()
+        if stored is None or stored == getattr(session, "version", 0):
+            return session
+        return self._load(session.id, replace=session)
+
+    def _load(self, session_id: str, replace=None):
+        record = self.backend.load(session_id)
+        loaded = decode_session(record, self.factory) if record else self.factory(session_id)
+        dropped = []
+        with self._lock:
+            # A concurrent first use may have won the race; keep its Session
+            session = self.hot.get(session_id)
+            if session is None or (session is replace and not self._pending(session_id)):
+                if record:
+                    self.loads += 1
+                if replace is not None:
+                    self.reloads += 1
+                session = loaded
+                dropped = self._admit(session)
+            self._validated[session_id] = time.monotonic()
+        self._notify(dropped)
+        return session
+
+    def _admit(self, session) -> list:
+        """Make a session resident; returns the ids dropped to stay under max_sessions."""
+        self.hot[session.id] = session
+        dropped = []
+        while self.max_sessions is not None and len(self.hot) > self.max_sessions:
+            oldest = next(iter(self.hot))
+            del self.hot[oldest]
+            self._validated.pop(oldest, None)
+            self.evictions += 1
+            dropped.append(oldest)
+        return dropped
+
+    def _notify(self, dropped: list) -> None:
+        # Outside self._lock: the evictor calls evict() while holding its own lock
+        if self.on_evict:
+            for session_id in dropped:
+                self.on_evict(session_id)
+
+    def evict(self, session_id: str) -> None:
+        """Drop a session from the hot cache; a pending write still completes."""
+        with self._lock:
+            self._validated.pop(session_id, None)
+            if self.hot.pop(session_id, None) is not None:
+                self.evictions += 1
+
+    def mark_dirty(self, session) -> None:
+        """
+        Schedule a session to be written by the next flush.
+
+        The snapshot is taken here, by the turn that changed the session (under
+        its turn lock), so the flush thread never reads a session mid-turn.
+        """
+        snapshot = encode_session(session)
+        with self._lock:
+            self._dirty[session.id] = (session, snapshot)
+            backlog = len(self._dirty)
+        if backlog >= self.max_batch:
+            self._wake.set()
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session in memory and in the backend."""
+        with self._lock:
+            self.hot.pop(session_id, None)
+            self._dirty.pop(session_id, None)
+            self._validated.pop(session_id, None)
+        self.backend.delete([session_id])
+
+    def flush(self) -> int:
+        """Write every dirty session now; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                self._writing, self._dirty = self._dirty, {}
+            pending = list(self._writing.values())
+            written = 0
+            conflicts = []
+            for start in range(0, len(pending), self.max_batch):
+                batch = pending[start:start + self.max_batch]
+                # Each write expects the row at the version this process last loaded or wrote
+                records = [dict(snapshot, version=getattr(session, "version", 0)) for session, snapshot in batch]
+                try:
+                    lost = set(self.backend.save(records))
+                except Exception as e:
+                    self.failures += 1
+                    print(f"⚠️ Session store: failed to write {len(batch)} sessions ({e}), retrying next flush")
+                    with self._lock:
+                        for entry in batch:
+                            self._dirty.setdefault(entry[0].id, entry)
+                    continue
+                self.batches += 1
+                for (session, _), record in zip(batch, records):
+                    if session.id in lost:
+                        conflicts.append(session)
+                    else:
+                        session.version = record["version"] + 1
+                        written += 1
+            self.writes += written
+            with self._lock:
+                self._writing = {}
+                dropped = [session.id for session in conflicts if self._discard(session)]
+            self._notify(dropped)
+            return written
+
+    def _discard(self, session) -> bool:
+        """
+        Another replica wrote this session first: drop the local copy so the
+        next use reloads the newer one (caller holds the lock).
+        """
+        self.conflicts += 1
+        print(f"⚠️ Session store: {session.id} was changed by another replica, reloading it")
+        if self.hot.get(session.id) is not session or session.id in self._dirty:
+            # Already replaced, or a newer local change will hit the same conflict
+            return False
+        del self.hot[session.id]
+        self._validated.pop(session.id, None)
+        return True
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._dirty:
+                self.flush()
+
+    def close(self) -> None:
+        """Stop the write-behind thread after a final flush."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self.backend.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "resident": len(self.hot),
+            "dirty": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "batches": self.batches,
+            "writes": self.writes,
+            "failures": self.failures,
+            "conflicts": self.conflicts,
+            "reloads": self.reloads,
+        }
+
+
+def open_session_store(factory: Callable[[str], Any], hot: Optional[Dict[str, Any]] = None,
+                       backend: str = SESSION_BACKEND) -> Optional[SessionStore]:
+    """
+    Build the store selected by ADK_SESSION_BACKEND (or `backend`).
+
+    Returns:
+        SessionStore, or None for "memory" (sessions stay process-local)
+    """
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        store = SessionStore(SQLiteSessionBackend(SESSION_SQLITE_PATH), factory, hot)
+    elif backend == "postgres":
+        store = SessionStore(PostgresSessionBackend(), factory, hot)
+    else:
+        raise ValueError(f"Unknown ADK_SESSION_BACKEND: {backend} (expected memory, sqlite or postgres)")
+    # Dirty sessions are written at interpreter exit
+    atexit.register(store.close)
+    print(f"💾 Session store: {backend} (flush every {store.flush_interval * 1000:.0f}ms)")
+    return store
@@ -0,0 +1,203 @@
+"""
+Tool Result Cache for Addis-Sync.
+
+Reference lookups (office by woreda) hit Postgres on every turn although
+office data almost never changes. Tools can declare a cache policy on
+registration:
+
+    @server.tool(cache=TTL(3600, tags=("offices:power",)))
+    def get_power_office_by_woreda(woreda_name: str) -> dict: ...
+
+Each cached tool gets a bounded LRU with a per-entry TTL and hit/miss
+metrics. In-process writes can invalidate by tag (optionally a single key):
+
+    invalidate("offices:power", key)
+
+Exceptions and {"error": ...} results (e.g. "ticket not found") are never
+cached, so a ticket created a moment later is found on the next call.
+Results are copied in and out, so a caller mutating a result cannot change
+what the next caller gets.
+
+Invalidation is in-process only, so only data no other process writes
+may be cached. Ticket status is changed by the admin dashboard (another
+process), so the get_*_ticket_status tools are never cached and a citizen
+always sees the current status.
+"""
+
+import os
+import copy
+import time
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+DEFAULT_MAX_ENTRIES = 256
+OFFICE_TTL = float(os.environ.get("ADK_OFFICE_CACHE_TTL", "3600"))
+
+
+class TTL:
+    """
+    Cache policy for a tool.
+
+    Args:
+        seconds: How long a result stays fresh
+        max_entries: LRU bound (least recently used entries are evicted)
+        tags: Invalidation tags; invalidate(tag) clears this tool's entries
+    """
+    def __init__(self, seconds: float, max_entries: int = DEFAULT_MAX_ENTRIES, tags: Iterable[str] = ()):
+        self.seconds = seconds
+        self.max_entries = max_entries
+        self.tags = tuple(tags)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+class ToolCache:
+    """
+    Bounded LRU + TTL cache for one tool's results.
+
+    Args:
+        name: Tool name (used in metrics)
+        policy: TTL policy
+        key: Builds the cache key from the tool's arguments (default: normalized arguments)
+    """
+    def __init__(self, name: str, policy: TTL, key: Optional[Callable[..., Hashable]] = None):
+        self.name = name
+        self.policy = policy
+        self.key = key
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, signature: inspect.Signature, args: tuple, kwargs: dict) -> Hashable:
+        if self.key is not None:
+            return self.key(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple((name, _normalize(value)) for name, value in bound.arguments.items())
+
+    def get(self, key: Hashable):
+        """Return (True, result) for a fresh entry, (False, None) otherwise."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, copy.deepcopy(result)
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, result: Any) -> None:
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.policy.seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.policy.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> int:
+        """Drop one key (or every entry); returns how many entries were dropped."""
+        with self._lock:
+            if key is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                dropped = 1 if self._entries.pop(key, None) is not None else 0
+            self.invalidations += dropped
+            return dropped
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "tool": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.policy.max_entries,
+                "ttl_s": self.policy.seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def ticket_key(ticket_number: str) -> str:
+    """Cache key for tools keyed by a ticket number (case- and whitespace-insensitive)."""
+    return ticket_number.strip().upper()
+
+
+_CACHES: Dict[str, ToolCache] = {}
+_TAGS: Dict[str, List[ToolCache]] = {}
+_LOCK = threading.Lock()
+
+
+def cached_tool(func: Callable, policy: TTL, key: Optional[Callable[..., Hashable]] = None) -> Callable:
+    """Wrap a tool so its results are served from a ToolCache."""
+    cache = ToolCache(func.__name__, policy, key)
+    signature = inspect.signature(func)
+    with _LOCK:
+        previous = _CACHES.get(func.__name__)
+        if previous is not None:
+            # Re-registered (module reload): the old cache must not keep receiving invalidations
+            for tagged in _TAGS.values():
+                if previous in tagged:
+                    tagged.remove(previous)
+        _CACHES[func.__name__] = cache
+        for tag in policy.tags:
+            _TAGS.setdefault(tag, []).append(cache)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache_key = cache.make_key(signature, args, kwargs)
+        hit, result = cache.get(cache_key)
+        if hit:
+            return result
+        result = func(*args, **kwargs)
+        if not (isinstance(result, dict) and "error" in result):
+            cache.put(cache_key, result)
+        return result
+
+    wrapper.cache = cache
+    return wrapper
+
+
+def invalidate(tag: str, key: Optional[Hashable] = None) -> int:
+    """
+    Invalidation hook for writes: clear the caches tagged `tag`.
+
+    Args:
+        tag: Tag declared in TTL(tags=...)
+        key: Only drop this cache key (e.g. a ticket number); None clears everything
+
+    Returns:
+        Number of entries dropped
+    """
+    with _LOCK:
+        caches = list(_TAGS.get(tag, ()))
+    return sum(cache.invalidate(key) for cache in caches)
+
+
+def cache_metrics() -> List[Dict[str, Any]]:
+    with _LOCK:
+        caches = list(_CACHES.values())
+    return [cache.metrics() for cache in caches]
@@ -0,0 +1,297 @@
+"""
+Typed Tool Registry for Addis-Sync.
+
+Tools used to be plain callables: every OpenRouter call rebuilt the OpenAI
+tool JSON with inspect.signature, and the Gemini path handed raw callables to
+GenerateContentConfig, so the SDK introspected them again each turn (and
+could run automatic function calling on top of our own loop).
+
+Now each tool is compiled once, when it is registered, into a ToolSpec:
+- the OpenAI tool schema
+- the Gemini FunctionDeclaration
+- one precompiled validator per parameter that coerces LLM-supplied values
+  ("3" -> 3, 42 -> "42", "true" -> True) and rejects missing or invalid ones
+
+`str | None` / Optional[str] parameters are nullable strings; parameters
+with a default are optional. Unknown arguments are dropped.
+
+TOOL_REGISTRY stays a name -> callable mapping, so existing lookups and
+monkeypatching keep working.
+"""
+
+import types as pytypes
+import inspect
+import typing
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    from google.genai import types
+except ImportError:
+    types = None
+
+JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    dict: "object",
+    list: "array",
+}
+
+_GEMINI_TYPES = {
+    "string": "STRING",
+    "integer": "INTEGER",
+    "number": "NUMBER",
+    "boolean": "BOOLEAN",
+    "object": "OBJECT",
+    "array": "ARRAY",
+}
+
+_MISSING = object()
+
+
+class ToolArgumentError(ValueError):
+    """LLM-supplied arguments do not match the tool's signature."""
+
+
+# --- coercers (value -> value, raising ValueError/TypeError) ---
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # e.g. a phone number sent as a JSON number
+        return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+    raise TypeError(f"expected a string, got {type(value).__name__}")
+
+
+def _to_integer(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError("expected an integer, got a boolean")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise TypeError(f"expected an integer, got {type(value).__name__}")
+
+
+def _to_number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError("expected a number, got a boolean")
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        return float(value.strip())
+    raise TypeError(f"expected a number, got {type(value).__name__}")
+
+
+def _to_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false", "yes", "no"):
+        return value.strip().lower() in ("true", "yes")
+    if value in (0, 1):
+        return bool(value)
+    raise TypeError(f"expected a boolean, got {value!r}")
+
+
+def _to_object(value: Any) -> dict:
+    if isinstance(value, dict):
+        return value
+    raise TypeError(f"expected an object, got {type(value).__name__}")
+
+
+def _to_array(value: Any) -> list:
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    raise TypeError(f"expected an array, got {type(value).__name__}")
+
+
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "string": _to_string,
+    "integer": _to_integer,
+    "number": _to_number,
+    "boolean": _to_boolean,
+    "object": _to_object,
+    "array": _to_array,
+}
+
+
+def _json_type(annotation: Any) -> tuple[str, bool]:
+    """Map an annotation to (JSON type, nullable). Unknown/missing types are strings."""
+    nullable = False
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, pytypes.UnionType):
+        members = [a for a in typing.get_args(annotation) if a is not type(None)]
+        nullable = len(members) < len(typing.get_args(annotation))
+        annotation = members[0] if len(members) == 1 else str
+        origin = typing.get_origin(annotation)
+    base = origin or annotation
+    return JSON_TYPES.get(base, "string"), nullable
+
+
+class ToolParam:
+    """One compiled tool parameter."""
+    def __init__(self, name: str, json_type: str, nullable: bool, default: Any):
+        self.name = name
+        self.json_type = json_type
+        self.nullable = nullable
+        self.default = default
+        self.required = default is _MISSING
+        self.coerce = _COERCERS[json_type]
+
+
+class ToolSpec:
+    """
+    A tool compiled once at registration.
+
+    Args:
+        name: Registered tool name
+        func: The callable (possibly wrapped by @idempotent / caching)
+    """
+    def __init__(self, name: str, func: Callable):
+        self.name = name
+        self.func = func
+        self.description = inspect.getdoc(func) or "No description provided."
+
+        try:
+            signature = inspect.signature(func, eval_str=True)
+        except (NameError, TypeError):
+            signature = inspect.signature(func)
+        self.params: List[ToolParam] = []
+        for param in signature.parameters.values():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            json_type, nullable = _json_type(param.annotation)
+            default = _MISSING if param.default is inspect.Parameter.empty else param.default
+            self.params.append(ToolParam(param.name, json_type, nullable, default))
+
+        self.openai_schema = self._compile_openai()
+        self.gemini_declaration = self._compile_gemini() if types else None
+
+    def _compile_openai(self) -> dict:
+        properties = {}
+        for p in self.params:
+            properties[p.name] = {
+                "type": [p.json_type, "null"] if p.nullable else p.json_type,
+                "description": f"Parameter: {p.name}",
+            }
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": [p.name for p in self.params if p.required],
+                },
+            },
+        }
+
+    def _compile_gemini(self):
+        properties = {
+            p.name: types.Schema(
+                type=_GEMINI_TYPES[p.json_type],
+                description=f"Parameter: {p.name}",
+                nullable=p.nullable or None,
+            )
+            for p in self.params
+        }
+        parameters = None
+        if properties:
+            parameters = types.Schema(
+                type="OBJECT",
+                properties=properties,
+                required=[p.name for p in self.params if p.required] or None,
+            )
+        return types.FunctionDeclaration(name=self.name, description=self.description, parameters=parameters)
+
+    def validate(self, args: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Coerce LLM-supplied arguments to the tool's parameter types.
+
+        Raises:
+            ToolArgumentError: on missing required or uncoercible arguments
+        """
+        args = args or {}
+        clean = {}
+        problems = []
+        for p in self.params:
+            value = args.get(p.name, _MISSING)
+            if value is None and not p.nullable:
+                # Models often send null for "not given"
+                value = _MISSING
+            if value is _MISSING:
+                if p.required:
+                    problems.append(f"missing required argument '{p.name}'")
+                continue
+            if value is None:
+                clean[p.name] = None
+                continue
+            try:
+                clean[p.name] = p.coerce(value)
+            except (TypeError, ValueError) as e:
+                problems.append(f"'{p.name}': {e}")
+        if problems:
+            raise ToolArgumentError(f"Invalid arguments for {self.name}: " + "; ".join(problems))
+        return clean
+
+
+class ToolRegistry(dict):
+    """
+    name -> callable mapping that compiles a ToolSpec for every entry.
+
+    Assigning an entry (registration, monkeypatching in tests) compiles it.
+    `version` counts changes, so caches built from the registry (compiled
+    instructions) notice a tool re-registered under the same name.
+    """
+    def __init__(self):
+        super().__init__()
+        self.specs: Dict[str, ToolSpec] = {}
+        self._gemini_tools: Dict[tuple, Any] = {}
+        self.version = 0
+
+    def __setitem__(self, name: str, func: Callable) -> None:
+        super().__setitem__(name, func)
+        self.specs[name] = ToolSpec(name, func)
+        self._gemini_tools.clear()
+        self.version += 1
+
+    def __delitem__(self, name: str) -> None:
+        super().__delitem__(name)
+        self.specs.pop(name, None)
+        self._gemini_tools.clear()
+        self.version += 1
+
+    def spec(self, name: str) -> ToolSpec:
+        return self.specs[name]
+
+    def spec_for(self, func: Callable) -> ToolSpec:
+        """Compiled spec for a tool callable (compiled on the fly if it was never registered)."""
+        spec = self.specs.get(func.__name__)
+        if spec is not None and spec.func is func:
+            return spec
+        return ToolSpec(func.__name__, func)
+
+    def openai_tools(self, funcs: Iterable[Callable]) -> Optional[List[dict]]:
+        """Precompiled OpenAI tool schemas for a tool list (None if empty)."""
+        schemas = [self.spec_for(f).openai_schema for f in funcs]
+        return schemas or None
+
+    def gemini_tools(self, funcs: Iterable[Callable]) -> Optional[list]:
+        """One Gemini Tool holding the precompiled declarations (None if empty)."""
+        funcs = list(funcs)
+        if not funcs or types is None:
+            return None
+        key = tuple(f.__name__ for f in funcs)
+        tool = self._gemini_tools.get(key)
+        if tool is None:
+            tool = types.Tool(function_declarations=[self.spec_for(f).gemini_declaration for f in funcs])
+            self._gemini_tools[key] = tool
+        return [tool]
+
+    def validate(self, name: str, args: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.specs[name].validate(args)
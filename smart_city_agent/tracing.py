@@ -0,0 +1,227 @@
+"""
+Per-turn Tracing for Addis-Sync.
+
+Every AdkApp turn opens a root span; provider calls, TOOL_REGISTRY
+invocations and SQL statements run through get_conn open child spans, so a
+slow turn can be attributed to the model, the fallback chain or Postgres.
+
+- Span durations feed in-process latency histograms (p50/p95/p99 per key,
+  e.g. "turn", "llm:gemini:gemini-2.5-flash-lite", "tool:create_power_ticket",
+  "sql:power")
+- Finished traces are appended to a local JSONL file (one trace per line)
+  when ADK_TRACE_FILE is set
+
+The current span lives in a contextvar; work handed to thread pools must be
+submitted with contextvars.copy_context().run to stay in the trace.
+"""
+
+import os
+import json
+import time
+import uuid
+import math
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_FILE = os.environ.get("ADK_TRACE_FILE", "")
+MAX_SPANS_PER_TRACE = 500       # runaway loops must not grow a trace without bound
+
+# Log-scale histogram buckets: 0.5ms .. ~2.5min, 10% apart
+BUCKET_START = 0.0005
+BUCKET_GROWTH = 1.1
+BUCKET_COUNT = 135
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("adk_current_span", default=None)
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucket histogram with approximate percentiles."""
+    def __init__(self):
+        self.buckets = [0] * (BUCKET_COUNT + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(seconds: float) -> int:
+        if seconds <= BUCKET_START:
+            return 0
+        index = int(math.log(seconds / BUCKET_START, BUCKET_GROWTH)) + 1
+        return min(index, BUCKET_COUNT)
+
+    def record(self, seconds: float) -> None:
+        self.buckets[self._bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKET_START * BUCKET_GROWTH ** index, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(0.50), 4),
+            "p95": round(self.percentile(0.95), 4),
+            "p99": round(self.percentile(0.99), 4),
+            "max": round(self.max, 4),
+        }
+
+
+class Span:
+    """One timed operation in a trace."""
+    def __init__(self, name: str, kind: str, trace: "Trace", parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.status = "ok"
+
+    def set(self, **attributes) -> None:
+        """Add attributes (tokens, model, row counts, ...) to the span."""
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start_time, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """All spans under one root span."""
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> bool:
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped += 1
+                return False
+            self.spans.append(span)
+            return True
+
+
+class Tracer:
+    """
+    Opens spans, keeps latency histograms and exports finished traces.
+
+    Args:
+        export_path: JSONL file finished traces are appended to ("" disables export)
+    """
+    def __init__(self, export_path: str = TRACE_FILE):
+        self.export_path = export_path
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._export_lock = threading.Lock()
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator[Span]:
+        """
+        Time a block as a span (a root span when no span is active).
+
+        Args:
+            name: Span name, also the histogram key
+            kind: turn | llm | tool | sql | internal
+            **attributes: Initial span attributes
+        """
+        parent = _current_span.get()
+        trace = parent.trace if parent else Trace()
+        span = Span(name, kind, trace, parent.span_id if parent else None, attributes)
+        trace.add(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except GeneratorExit:
+            # A streamed turn whose consumer stopped reading is not an error
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}"[:300])
+            raise
+        finally:
+            span.duration = time.perf_counter() - span._start
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Generator spans may be closed from another context
+                _current_span.set(parent)
+            self._record(name, span.duration)
+            if parent is None:
+                self._export(trace)
+
+    def _record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = LatencyHistogram()
+            self._histograms[key].record(seconds)
+
+    def _export(self, trace: Trace) -> None:
+        if not self.export_path:
+            return
+        record = {
+            "trace_id": trace.trace_id,
+            "spans": [s.as_dict() for s in trace.spans],
+            "dropped_spans": trace.dropped,
+        }
+        line = json.dumps(record, default=str)
+        try:
+            with self._export_lock:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            print(f"⚠️ Trace export failed: {e}")
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (seconds) per span name."""
+        with self._lock:
+            return {key: hist.snapshot() for key, hist in sorted(self._histograms.items())}
+
+
+# Global tracer shared by AdkApp and the MCP servers' database layer
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get or create the global tracer.
+
+    Returns:
+        Tracer instance
+    """
+    global _tracer
+
+    if _tracer is None:
+        _tracer = Tracer()
+
+    return _tracer
@@ -0,0 +1,257 @@
+"""
+Compact Conversation Transcript for Addis-Sync.
+
+Session.history used to be a list of google.genai Content objects (~1.4 KB
+of pydantic objects per message, text not included), re-converted to
+OpenAI messages on every OpenRouter turn, while the Streamlit UI kept its
+own copy of the same chat. The transcript stores each exchange once, in
+provider-neutral __slots__ records:
+
+- Turn: the citizen's prompt, the final reply and the tool exchanges
+- ToolExchange: tool name, arguments and {"result"/"error"} outcome
+
+Provider and UI formats are adapters built lazily from the records:
+Gemini Content, OpenAI messages and the chat list shown by app.py. The
+provider adapters replay a turn's tool exchanges too (Gemini function_call /
+function_response parts, OpenAI tool_calls + "tool" messages), so on later
+turns the model still sees the offices it looked up and the tickets it
+created, not just the prose of its replies. A recorded turn never changes,
+so its views are built once and kept: every later turn, the hedged backup, a
+fallback to OpenRouter and UI reruns reuse them, and recording a turn only
+invalidates the UI chat list.
+
+For backwards compatibility a Transcript still reads as the old history:
+len(), indexing and iteration yield the text-only Gemini Content (user,
+model per turn).
+"""
+
+import sys
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .prompt_compiler import estimate_tokens
+
+try:
+    from google.genai import types
+except ImportError:
+    types = None
+
+USER = "user"
+MODEL = "model"
+
+# Object overhead of the records themselves (CPython, 64-bit)
+TURN_BYTES = 96
+TOOL_BYTES = 72
+
+_NO_TOOLS: tuple = ()
+
+
+class ToolExchange:
+    """One tool call made while answering a turn and its outcome."""
+    __slots__ = ("name", "args", "outcome")
+
+    def __init__(self, name: str, args: Dict[str, Any], outcome: Dict[str, Any]):
+        self.name = name
+        self.args = args
+        self.outcome = outcome
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"name": self.name, "args": self.args, "outcome": self.outcome}
+
+
+class Turn:
+    """One citizen message and the assistant's final reply."""
+    __slots__ = ("prompt", "reply", "tools", "tokens", "size")
+
+    def __init__(self, prompt: str, reply: str, tools: Iterable[ToolExchange] = _NO_TOOLS):
+        self.prompt = prompt
+        self.reply = reply
+        self.tools = tuple(tools) or _NO_TOOLS
+        tool_json = [json.dumps(t.to_record(), default=str) for t in self.tools]
+        # Tool exchanges are replayed to the providers, so they count against the history budget
+        self.tokens = estimate_tokens(prompt) + estimate_tokens(reply) + sum(estimate_tokens(j) for j in tool_json)
+        self.size = TURN_BYTES + sys.getsizeof(prompt) + sys.getsizeof(reply) + sum(
+            TOOL_BYTES + len(j) for j in tool_json
+        )
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {"prompt": self.prompt, "reply": self.reply}
+        if self.tools:
+            record["tools"] = [t.to_record() for t in self.tools]
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Turn":
+        tools = [ToolExchange(t["name"], t.get("args") or {}, t.get("outcome") or {}) for t in record.get("tools") or []]
+        return cls(record["prompt"], record["reply"], tools)
+
+
+def gemini_pair(user_text: str, model_text: str) -> tuple:
+    """(user, model) Content for one exchange."""
+    return (
+        types.Content(role=USER, parts=[types.Part.from_text(text=user_text)]),
+        types.Content(role=MODEL, parts=[types.Part.from_text(text=model_text)]),
+    )
+
+
+def openai_pair(user_text: str, model_text: str) -> tuple:
+    """(user, assistant) OpenAI messages for one exchange."""
+    return {"role": "user", "content": user_text}, {"role": "assistant", "content": model_text}
+
+
+def _plain(value: Any) -> Any:
+    """JSON-safe copy (e.g. datetime results from psycopg2 become strings)."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def tool_message_content(outcome: Dict[str, Any]) -> str:
+    """Serialize a tool outcome for an OpenAI `tool` message (the result, or the error dict)."""
+    if "error" in outcome:
+        return json.dumps(outcome)
+    return json.dumps(outcome["result"], default=str)
+
+
+def gemini_tool_contents(tools: Iterable[ToolExchange]) -> tuple:
+    """(model function_call, user function_response) Content replaying a turn's tool exchanges."""
+    tools = list(tools)
+    return (
+        types.Content(role=MODEL, parts=[
+            types.Part.from_function_call(name=t.name, args=_plain(t.args)) for t in tools
+        ]),
+        types.Content(role=USER, parts=[
+            types.Part.from_function_response(name=t.name, response=_plain(t.outcome)) for t in tools
+        ]),
+    )
+
+
+def openai_tool_messages(tools: Iterable[ToolExchange], id_prefix: str) -> list:
+    """Assistant tool_calls message plus one `tool` message per exchange."""
+    tools = list(tools)
+    ids = [f"{id_prefix}_{i}" for i in range(len(tools))]
+    messages = [{
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": call_id, "type": "function",
+             "function": {"name": t.name, "arguments": json.dumps(t.args, default=str)}}
+            for call_id, t in zip(ids, tools)
+        ],
+    }]
+    messages.extend(
+        {"role": "tool", "tool_call_id": call_id, "content": tool_message_content(t.outcome)}
+        for call_id, t in zip(ids, tools)
+    )
+    return messages
+
+
+class Transcript:
+    """
+    The turns of one conversation (Session.history).
+
+    Args:
+        turns: Existing turns (e.g. loaded from the session store)
+    """
+    __slots__ = ("turns", "_views")
+
+    def __init__(self, turns: Optional[Iterable[Turn]] = None):
+        self.turns: List[Turn] = list(turns or [])
+        self._views: Optional[Dict[Any, Any]] = None
+
+    def record(self, prompt: str, reply: str, tools: Iterable[ToolExchange] = _NO_TOOLS) -> Turn:
+        """Append a finished turn (earlier turns' views stay cached)."""
+        turn = Turn(prompt, reply, tools)
+        self.turns.append(turn)
+        if self._views is not None:
+            self._views.pop("ui", None)
+        return turn
+
+    def _view(self, key: Any, build):
+        if self._views is None:
+            self._views = {}
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = build()
+        return view
+
+    # --- Adapters ---
+
+    def gemini_turn(self, index: int) -> tuple:
+        """google.genai Content of a turn: user, [function calls, function responses,] model."""
+        turn = self.turns[index]
+
+        def build():
+            user, model = gemini_pair(turn.prompt, turn.reply)
+            if not turn.tools:
+                return user, model
+            return (user, *gemini_tool_contents(turn.tools), model)
+        return self._view(("gemini", index), build)
+
+    def openai_turn(self, index: int) -> tuple:
+        """OpenAI messages of a turn: user, [assistant tool_calls, tool results,] assistant."""
+        turn = self.turns[index]
+
+        def build():
+            user, assistant = openai_pair(turn.prompt, turn.reply)
+            if not turn.tools:
+                return user, assistant
+            return (user, *openai_tool_messages(turn.tools, f"call_t{index}"), assistant)
+        return self._view(("openai", index), build)
+
+    def _text_turn(self, index: int) -> tuple:
+        """(user, model) text-only Content of a turn (the legacy view)."""
+        turn = self.turns[index]
+        if not turn.tools:
+            return self.gemini_turn(index)
+        return self._view(("text", index), lambda: gemini_pair(turn.prompt, turn.reply))
+
+    def ui_messages(self) -> List[Dict[str, Any]]:
+        """Chat messages for the UI: {"role": "user"/"assistant", "content", "tools"}."""
+        def build():
+            messages = []
+            for turn in self.turns:
+                messages.append({"role": "user", "content": turn.prompt})
+                messages.append({"role": "assistant", "content": turn.reply, "tools": [t.name for t in turn.tools]})
+            return messages
+        return self._view("ui", build)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the records (cached views excluded)."""
+        return sys.getsizeof(self.turns) + sum(turn.size for turn in self.turns)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [turn.to_record() for turn in self.turns]
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "Transcript":
+        return cls(Turn.from_record(record) for record in records)
+
+    # --- Legacy view: a list of Gemini Content ---
+
+    def __len__(self) -> int:
+        return 2 * len(self.turns)
+
+    def __bool__(self) -> bool:
+        return bool(self.turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return self._text_turn(index // 2)[index % 2]
+
+    def __iter__(self) -> Iterator:
+        for index in range(len(self.turns)):
+            yield from self._text_turn(index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Transcript):
+            return [t.to_record() for t in self.turns] == [t.to_record() for t in other.turns]
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Transcript(turns={len(self.turns)})"
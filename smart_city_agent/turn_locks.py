@@ -0,0 +1,179 @@
+"""
+Per-session Turn Serialization for Addis-Sync.
+
+Streamlit runs every browser session on its own thread and one AdkApp is
+shared by all of them, so a double-submit or a retried request can run two
+turns of the same conversation at once: both read the same history window,
+both mutate Session.state, and the second reply is produced without the
+first one's context.
+
+Turns are serialized with one lock per session_id. A lock entry exists only
+while a turn of that session is running or waiting, and is dropped when the
+last one finishes, so the table holds active sessions only. Different
+sessions never share a lock and run fully in parallel; the table's own
+mutex guards only the few dictionary operations around acquire/release,
+never a turn.
+
+Waiters are queued in arrival order and ownership is handed directly to the
+next one on release. A waiting thread blocks on its own handoff lock; an
+async turn awaits a future on its event loop, so a contended wait holds no
+executor thread. Wait times feed a latency histogram (see lock_report /
+AdkApp.lock_report).
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from .tracing import LatencyHistogram
+
+
+class _SessionLock:
+    """The running turn of one session and the turns queued behind it."""
+    __slots__ = ("waiters",)
+
+    def __init__(self):
+        # (loop, future) for async turns, (None, handoff lock) for threads
+        self.waiters: deque = deque()
+
+
+class TurnLocks:
+    """
+    One lock per session, serializing that session's turns.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held: Dict[str, _SessionLock] = {}
+
+        # Metrics
+        self.acquisitions = 0
+        self.contended = 0
+        self.waits = LatencyHistogram()
+
+    def active(self, session_id: str) -> bool:
+        """True while a turn of the session is running or waiting."""
+        return session_id in self._held
+
+    def _enqueue(self, session_id: str, waiter_factory):
+        """Take the session's lock if free (returns None) or queue a waiter and return it."""
+        with self._lock:
+            self.acquisitions += 1
+            entry = self._held.get(session_id)
+            if entry is None:
+                self._held[session_id] = _SessionLock()
+                return None
+            self.contended += 1
+            waiter = waiter_factory()
+            entry.waiters.append(waiter)
+            return waiter
+
+    def _release(self, session_id: str) -> None:
+        """Hand the lock to the next waiter, or drop the entry when nobody waits."""
+        with self._lock:
+            entry = self._held[session_id]
+            if not entry.waiters:
+                del self._held[session_id]
+                return
+            loop, handoff = entry.waiters.popleft()
+        if loop is None:
+            handoff.release()
+        else:
+            loop.call_soon_threadsafe(self._wake, session_id, handoff)
+
+    def _wake(self, session_id: str, future: asyncio.Future) -> None:
+        if future.done():
+            # Cancelled after ownership was handed over: pass it on
+            self._release(session_id)
+        else:
+            future.set_result(None)
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self.waits.record(waited)
+
+    @contextmanager
+    def hold(self, session_id: str) -> Iterator[float]:
+        """Run the block as the session's only turn; yields the seconds spent waiting."""
+        def handoff():
+            lock = threading.Lock()
+            lock.acquire()
+            return None, lock
+
+        waited = 0.0
+        waiter = self._enqueue(session_id, handoff)
+        if waiter is not None:
+            start = time.perf_counter()
+            waiter[1].acquire()
+            waited = time.perf_counter() - start
+            self._record_wait(waited)
+        try:
+            yield waited
+        finally:
+            self._release(session_id)
+
+    @asynccontextmanager
+    async def hold_async(self, session_id: str) -> AsyncIterator[float]:
+        """Async twin of hold(); a contended wait awaits a future, no thread is blocked."""
+        loop = asyncio.get_running_loop()
+        waited = 0.0
+        waiter = self._enqueue(session_id, lambda: (loop, loop.create_future()))
+        if waiter is not None:
+            start = time.perf_counter()
+            try:
+                await waiter[1]
+            except asyncio.CancelledError:
+                with self._lock:
+                    entry = self._held.get(session_id)
+                    queued = entry is not None and waiter in entry.waiters
+                    if queued:
+                        entry.waiters.remove(waiter)
+                if not queued and waiter[1].done() and not waiter[1].cancelled():
+                    # Woken, then cancelled before resuming: we own the lock
+                    self._release(session_id)
+                # Otherwise _wake sees the cancelled future and passes ownership on
+                raise
+            waited = time.perf_counter() - start
+            self._record_wait(waited)
+        try:
+            yield waited
+        finally:
+            self._release(session_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = self.waits.snapshot()
+            return {
+                "active_sessions": len(self._held),
+                "acquisitions": self.acquisitions,
+                "contended": self.contended,
+                "contention_rate": round(self.contended / self.acquisitions, 4) if self.acquisitions else 0.0,
+                "wait_p50": waits["p50"],
+                "wait_p95": waits["p95"],
+                "wait_p99": waits["p99"],
+                "wait_max": waits["max"],
+            }
+
+
+# Global turn locks (sessions are process-wide, so are their locks)
+_turn_locks: Optional[TurnLocks] = None
+_turn_locks_lock = threading.Lock()
+
+
+def get_turn_locks() -> TurnLocks:
+    """
+    Get or create the global turn locks.
+
+    Returns:
+        TurnLocks instance
+    """
+    global _turn_locks
+
+    if _turn_locks is None:
+        with _turn_locks_lock:
+            if _turn_locks is None:
+                _turn_locks = TurnLocks()
+
+    return _turn_locks
@@ -0,0 +1,84 @@
+"""
+Tests for the asyncio execution path of the local runner
+"""
+
+import asyncio
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient
+
+test_server = MCPServer(name="test_async_server")
+CALLS = []
+
+
+@test_server.tool()
+def lookup_test_office(woreda_name: str) -> dict:
+    """Test office lookup."""
+    CALLS.append(woreda_name)
+    return {"name": f"{woreda_name} Office"}
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-model",
+    instruction="Test agent.",
+    tools=[lookup_test_office],
+)
+
+SCRIPT = [
+    [("lookup_test_office", {"woreda_name": "Bole"})],
+    "Bole Office has been notified.",
+]
+
+
+@pytest.fixture
+def app():
+    app = AdkApp(agent=test_agent)
+    app.gemini_client = None
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+    CALLS.clear()
+    return app
+
+
+def test_run_async_with_gemini(app):
+    """Test async Gemini loop executes tools and records history"""
+    app.gemini_client = FakeGeminiClient(script=SCRIPT)
+
+    response = asyncio.run(app.run_async("u1", "async-gemini", "No power in Bole"))
+
+    assert response == "Bole Office has been notified."
+    assert CALLS == ["Bole"]
+    assert len(get_session("async-gemini").history) == 2
+
+
+def test_run_async_falls_back_to_openrouter(app):
+    """Test async path falls back to OpenRouter when Gemini is unavailable"""
+    app.openrouter_async_client = FakeOpenRouterClient(script=SCRIPT, is_async=True)
+
+    response = asyncio.run(app.run_async("u1", "async-openrouter", "No power in Bole"))
+
+    assert response == "Bole Office has been notified."
+    assert CALLS == ["Bole"]
+
+
+def test_run_async_multiplexes_turns(app):
+    """Test many in-flight turns overlap on one event loop"""
+    app.gemini_client = FakeGeminiClient(script=SCRIPT, latency=0.05)
+
+    async def many():
+        return await asyncio.gather(*(
+            app.run_async("u1", f"async-many-{i}", "No power in Bole") for i in range(50)
+        ))
+
+    loop = asyncio.new_event_loop()
+    try:
+        start = loop.time()
+        results = loop.run_until_complete(many())
+        elapsed = loop.time() - start
+    finally:
+        loop.close()
+
+    assert len(results) == 50
+    # 50 turns x 2 round trips x 50ms would take 5s if serialized
+    assert elapsed < 2.0
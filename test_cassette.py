@@ -0,0 +1,119 @@
+"""
+Tests for provider cassettes (record live exchanges, replay them offline)
+"""
+
+import json
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient
+from smart_city_agent.providers import Providers, replay_providers, load_providers
+from smart_city_agent.cassette import (
+    Cassette,
+    CassetteMiss,
+    RecordingGeminiClient,
+    RecordingOpenRouterClient,
+)
+
+test_server = MCPServer(name="test_cassette_server")
+LOOKUPS = []
+
+
+@test_server.tool()
+def cassette_office_lookup(woreda_name: str) -> dict:
+    """Office lookup."""
+    LOOKUPS.append(woreda_name)
+    return {"name": f"{woreda_name} Office"}
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-model",
+    instruction="Test agent.",
+    tools=[cassette_office_lookup],
+)
+
+SCRIPT = [
+    [("cassette_office_lookup", {"woreda_name": "Bole"})],
+    "The Bole Office will handle it.",
+]
+
+
+def test_recorded_gemini_turn_replays_offline(tmp_path):
+    """Test a recorded turn (with its function call) replays through the same tools without a live client"""
+    path = str(tmp_path / "cassette.jsonl")
+    live = FakeGeminiClient(script=SCRIPT, latency=0.02)
+    recorder = AdkApp(agent=test_agent, use_intent_router=False,
+                      providers=Providers(gemini=RecordingGeminiClient(live, Cassette(path))))
+    assert recorder.run("u1", "rec-1", "No power in Bole") == "The Bole Office will handle it."
+
+    lines = [json.loads(line) for line in open(path)]
+    assert lines[0] == {"version": 2}
+    assert [item["response"] for item in lines[1:]] == [
+        [{"name": "cassette_office_lookup", "args": {"woreda_name": "Bole"}}],
+        "The Bole Office will handle it.",
+    ]
+    assert all(item["latency"] >= 0.02 for item in lines[1:])
+
+    LOOKUPS.clear()
+    replayer = AdkApp(agent=test_agent, use_intent_router=False, providers=replay_providers(path, latency=0.0))
+    assert replayer.run("u1", "replay-1", "No power in Bole") == "The Bole Office will handle it."
+    assert LOOKUPS == ["Bole"]
+
+
+def test_recorded_openrouter_stream_and_replay_latency(tmp_path):
+    """Test streamed OpenRouter tool calls are reassembled into the cassette and replayed with recorded latency"""
+    path = str(tmp_path / "cassette.jsonl")
+    cassette = Cassette(path)
+    live = FakeOpenRouterClient(script=SCRIPT)
+    recorder = AdkApp(agent=test_agent, use_intent_router=False,
+                      providers=Providers(openrouter=RecordingOpenRouterClient(live, cassette)))
+    events = list(recorder.run_stream("u1", "rec-2", "No power in Bole"))
+    assert "".join(e.text for e in events if e.kind == "text") == "The Bole Office will handle it."
+
+    assert Cassette(path).steps("openrouter", "No power in Bole") == SCRIPT
+
+    providers = replay_providers(path)
+    assert providers.gemini is not None
+    assert providers.openrouter.latency_for("any-model") >= 0.0
+    with pytest.raises(CassetteMiss):
+        providers.openrouter.chat.completions.create(model="m", messages=[{"role": "user", "content": "Unknown"}])
+
+
+def test_provider_mode_selection():
+    """Test fake mode runs the app with no API keys and unknown modes are rejected"""
+    app = AdkApp(agent=test_agent, use_intent_router=False, providers=load_providers("fake"))
+    assert app.run("u1", "fake-mode", "Hi") == "Hello! How can I help you with city services today?"
+    with pytest.raises(ValueError):
+        load_providers("cloud")
+
+
+def test_same_prompt_in_two_conversations_keeps_both_replies(tmp_path):
+    """Test a prompt repeated in another conversation gets its own recording, appended, and replays per conversation"""
+    path = str(tmp_path / "cassette.jsonl")
+    conversation = []
+    openers = {"No power in Bole": ["Which street?"], "No water in Yeka": ["Since when?"]}
+    live = FakeGeminiClient(script=lambda prompt: openers.get(prompt) or [f"Noted ({conversation[-1]})."])
+    recorder = AdkApp(agent=test_agent, use_intent_router=False,
+                      providers=Providers(gemini=RecordingGeminiClient(live, Cassette(path))))
+    recorder.run("u1", "rec-power", "No power in Bole")
+    recorder.run("u1", "rec-water", "No water in Yeka")
+    conversation.append("power")
+    assert recorder.run("u1", "rec-power", "Yes") == "Noted (power)."
+    conversation.append("water")
+    assert recorder.run("u1", "rec-water", "Yes") == "Noted (water)."
+    assert len(open(path).readlines()) == 5      # header + one appended line per reply
+
+    replayer = AdkApp(agent=test_agent, use_intent_router=False, providers=replay_providers(path, latency=0.0))
+    replayer.run("u1", "replay-water", "No water in Yeka")
+    replayer.run("u1", "replay-power", "No power in Bole")
+    assert replayer.run("u1", "replay-water", "Yes") == "Noted (water)."
+    assert replayer.run("u1", "replay-power", "Yes") == "Noted (power)."
+
+
+def test_version_1_cassettes_still_replay(tmp_path):
+    """Test a cassette saved as one JSON document (no conversation context) matches the prompt anywhere"""
+    path = tmp_path / "cassette.json"
+    path.write_text(json.dumps({"version": 1, "interactions": [
+        {"provider": "gemini", "model": "m", "prompt": "Yes", "step": 0, "response": "Old reply.", "latency": 0.1},
+    ]}))
+    assert Cassette(str(path)).steps("gemini", "Yes", earlier=["No power in Bole"]) == ["Old reply."]
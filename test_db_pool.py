@@ -0,0 +1,177 @@
+"""
+Tests for the MCP servers' database connection pool
+"""
+
+import threading
+import time
+import psycopg2
+import pytest
+from psycopg2 import extensions
+from smart_city_agent.mcp_server.pool import ConnectionPool, PoolTimeout
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, vars=None):
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool."""
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.schema = None
+        self.info = FakeInfo()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class Factory:
+    def __init__(self, failures=0):
+        self.opened = []
+        self.failures = failures
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise psycopg2.OperationalError("could not connect to server")
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_connections_are_reused():
+    """Test a returned connection is handed out again instead of reconnecting"""
+    factory = Factory()
+    pool = ConnectionPool("test", factory, min_size=0, max_size=2)
+
+    for _ in range(5):
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+    assert len(factory.opened) == 1
+    assert pool.metrics()["checkouts"] == 5
+
+
+def test_checkout_waits_then_times_out():
+    """Test a full pool blocks waiters up to the timeout and reports them"""
+    pool = ConnectionPool("test", Factory(), min_size=0, max_size=1, timeout=0.2)
+    held = pool.getconn()
+
+    # A waiter gets the connection once it is returned
+    result = {}
+    waiter = threading.Thread(target=lambda: result.setdefault("conn", pool.getconn()))
+    waiter.start()
+    time.sleep(0.05)
+    assert pool.metrics()["waiters"] == 1
+    pool.putconn(held)
+    waiter.join()
+    assert result["conn"] is held
+    assert pool.metrics()["wait_time_max_ms"] >= 40
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.metrics()["timeouts"] == 1
+
+
+def test_dead_connection_is_replaced_on_borrow():
+    """Test the liveness check swaps out a connection the server dropped"""
+    factory = Factory()
+    pool = ConnectionPool("test", factory, min_size=0, max_size=2, check_after=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.dead = True
+
+    fresh = pool.getconn()
+
+    assert fresh is not conn
+    assert conn.closed
+    assert pool.metrics()["reconnects"] == 1
+    assert pool.metrics()["size"] == 1
+
+
+def test_connect_retries_with_backoff():
+    """Test transient connect errors are retried before giving up"""
+    factory = Factory(failures=2)
+    pool = ConnectionPool("test", factory, min_size=0, max_size=1)
+
+    conn = pool.getconn()
+
+    assert conn is factory.opened[0]
+    assert pool.metrics()["connect_failures"] == 2
+
+
+def test_discarded_connection_frees_its_slot():
+    """Test a connection broken mid-query is closed and not reused"""
+    factory = Factory()
+    pool = ConnectionPool("test", factory, min_size=1, max_size=1)
+    conn = pool.getconn()
+
+    pool.putconn(conn, discard=True)
+    replacement = pool.getconn()
+
+    assert conn.closed
+    assert replacement is not conn
+    assert pool.metrics()["in_use"] == 1
+
+
+def test_cloud_agents_share_one_pool(monkeypatch):
+    """Test cloud configs for different agents map to the same pool and route per checkout"""
+    from smart_city_agent.mcp_server import db
+
+    monkeypatch.setattr(db, "_POOLS", {})
+    power = {"type": "cloud", "schema": "power"}
+    utility = {"type": "cloud", "schema": "utility"}
+    assert db.get_pool(power) is db.get_pool(utility)
+
+    factory = Factory()
+    db._POOLS[("cloud",)] = ConnectionPool("cloud", factory, min_size=0, max_size=2)
+    seen = []
+    for cfg in (power, utility, power):
+        with db.get_conn(cfg) as conn:
+            seen.append((conn, conn.schema))
+
+    assert [schema for _, schema in seen] == ["power", "utility", "power"]
+    assert len(factory.opened) == 1
+    assert seen[0][0].schema is None
+
+
+def test_routing_rides_on_the_first_statement():
+    """Test a transaction's SET LOCAL search_path is sent in the same execute as its first statement"""
+    from types import SimpleNamespace
+    from smart_city_agent.mcp_server.db import TracedCursor
+
+    route = 'SET LOCAL search_path TO "power", public'
+    opening = SimpleNamespace(_route_sql=lambda: route)
+    in_transaction = SimpleNamespace(_route_sql=lambda: None)
+    query = "SELECT status FROM tickets WHERE ticket_number = %s;"
+
+    assert TracedCursor._routed(opening, query, ("POWR-1A2B3C4D",)) == f"{route}; {query}"
+    assert TracedCursor._routed(in_transaction, query, ("POWR-1A2B3C4D",)) == query
+
+    percent = SimpleNamespace(_route_sql=lambda: 'SET LOCAL search_path TO "50%", public')
+    assert TracedCursor._routed(percent, query, ("x",)).startswith('SET LOCAL search_path TO "50%%"')
@@ -0,0 +1,81 @@
+"""
+Tests for the LLM-free ticket status fast path
+"""
+
+import pytest
+from smart_city_agent.fast_path import match_status_request, render_status
+from smart_city_agent.local_runner import AdkApp, Agent, TOOL_REGISTRY, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+
+@pytest.mark.parametrize("prompt,ticket,tool", [
+    ("What is the status of POWR-AB12CD34?", "POWR-AB12CD34", "get_power_ticket_status"),
+    ("emer-0011aabb", "EMER-0011AABB", "get_emergency_ticket_status"),
+    ("Any update on UTIL-1234ABCD", "UTIL-1234ABCD", "get_ticket_status"),
+])
+def test_detects_ticket_numbers(prompt, ticket, tool):
+    """Test ticket numbers route to the matching status tool"""
+    request = match_status_request(prompt, {})
+    assert request.ticket_number == ticket
+    assert request.tool_name == tool
+
+
+def test_uses_last_ticket_for_my_ticket():
+    """Test 'my ticket' resolves from session state"""
+    request = match_status_request("Can you check my ticket?", {'last_ticket_number': 'SANI-AAAABBBB'})
+    assert request.ticket_number == "SANI-AAAABBBB"
+    assert request.service == "Sanitation"
+
+    assert match_status_request("Can you check my ticket?", {}) is None
+
+
+def test_ignores_non_status_messages():
+    """Test reports that merely mention a ticket still go to the LLM"""
+    assert match_status_request("No power in Bole", {}) is None
+    assert match_status_request("POWR-AB12CD34 was fixed but now the water is off", {}) is None
+
+
+@pytest.mark.parametrize("prompt", [
+    "Please update my ticket POWR-AB12CD34 with my new phone 0911223344",
+    "Cancel POWR-AB12CD34, can you check?",
+    "follow up on POWR-AB12CD34, it exploded again, please escalate",
+    "Where is the office for POWR-AB12CD34?",
+    "Can you check my ticket? The pole is down again",
+])
+def test_status_wording_with_other_content_goes_to_llm(prompt):
+    """Test only pure status queries skip the LLM; extra details or requests are never dropped"""
+    assert match_status_request(prompt, {'last_ticket_number': 'POWR-AB12CD34'}) is None
+
+
+def test_render_not_found():
+    """Test missing tickets get a templated answer"""
+    request = match_status_request("status POWR-AB12CD34", {})
+    assert "couldn't find" in render_status(request, {"error": "Power ticket not found"})
+
+
+def test_run_skips_llm_for_status(monkeypatch):
+    """Test AdkApp.run answers status checks without a provider call"""
+    app = AdkApp(agent=Agent(name="root", model="fake-model"))
+    monkeypatch.setitem(TOOL_REGISTRY, "get_power_ticket_status", lambda ticket_number: {
+        "ticket_number": ticket_number, "woreda": "Bole", "status": "IN_PROGRESS",
+    })
+    app.gemini_client = FakeGeminiClient()
+    app.openrouter_client = None
+
+    reply = app.run("u1", "fast-path-session", "status of POWR-AB12CD34")
+
+    assert "IN_PROGRESS" in reply
+    assert app.gemini_client.calls == 0
+    assert len(get_session("fast-path-session").history) == 2
+
+
+def test_run_falls_back_when_tool_fails(monkeypatch):
+    """Test database errors fall back to the LLM path"""
+    def broken(ticket_number):
+        raise RuntimeError("database unavailable")
+    app = AdkApp(agent=Agent(name="root", model="fake-model"))
+    monkeypatch.setitem(TOOL_REGISTRY, "get_power_ticket_status", broken)
+    app.gemini_client = FakeGeminiClient(script=["Let me look into that."])
+    app.openrouter_client = None
+
+    assert app.run("u1", "fast-path-fallback", "status of POWR-AB12CD34") == "Let me look into that."
@@ -0,0 +1,107 @@
+"""
+Tests for hedged LLM requests
+"""
+
+import asyncio
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, OPENROUTER_MODELS
+from smart_city_agent.hedging import HedgeConfig
+from smart_city_agent.provider_health import ProviderHealthRegistry
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient
+
+test_server = MCPServer(name="test_hedging_server")
+CALLS = []
+
+
+@test_server.tool()
+def create_test_ticket(woreda_name: str) -> dict:
+    """Test ticket creation."""
+    CALLS.append(woreda_name)
+    return {"ticket_number": "TEST-0001"}
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-primary",
+    instruction="Test agent.",
+    tools=[create_test_ticket],
+)
+
+SCRIPT = [
+    [("create_test_ticket", {"woreda_name": "Bole"})],
+    "Ticket TEST-0001 created.",
+]
+
+HEDGING = HedgeConfig(default_delay=0.05, min_delay=0.01, gemini_backup_model="fake-backup")
+
+
+@pytest.fixture
+def app():
+    app = AdkApp(agent=test_agent, health=ProviderHealthRegistry(), hedging=HEDGING)
+    app.gemini_client = None
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+    CALLS.clear()
+    return app
+
+
+def test_deadline_uses_latency_percentile():
+    """Test the hedge deadline follows the primary's latency percentile"""
+    config = HedgeConfig(percentile=0.9, min_delay=0.1, max_delay=5.0, min_samples=5)
+
+    assert config.deadline([1.0, 1.0]) == config.default_delay
+    assert config.deadline([0.2] * 9 + [4.0]) == 0.2
+    assert config.deadline([0.2] * 8 + [4.0, 9.0]) == 4.0
+    assert config.deadline([0.01] * 10) == 0.1
+
+
+def test_stalled_gemini_is_hedged_and_tool_runs_once(app):
+    """Test the backup model wins against a stalled primary without duplicating tools"""
+    app.gemini_client = FakeGeminiClient(SCRIPT, latency={"fake-primary": 0.5, "fake-backup": 0.0})
+
+    reply = app.run("user", "hedge-gemini", "Create a ticket for Bole")
+
+    assert reply == "Ticket TEST-0001 created."
+    assert CALLS == ["Bole"]
+    report = app.hedge_report()
+    # The winning backup chat carries the rest of the turn
+    assert report["requests"] == 2
+    assert report["hedged"] == 1
+    assert report["backup_wins"] == 1
+    assert report["hedge_rate"] == 0.5
+
+
+def test_fast_primary_is_not_hedged(app):
+    """Test no backup request is sent when the primary answers in time"""
+    app.gemini_client = FakeGeminiClient(SCRIPT)
+
+    app.run("user", "hedge-fast", "Create a ticket for Bole")
+
+    assert app.gemini_client.models_called == ["fake-primary", "fake-primary"]
+    assert app.hedge_report()["hedged"] == 0
+    assert app.hedge_report()["requests"] == 2
+
+
+def test_async_openrouter_hedges_to_next_model(app):
+    """Test the async OpenRouter path races the next-best model and cancels the loser"""
+    slow, fast = OPENROUTER_MODELS[0], OPENROUTER_MODELS[1]
+    app.openrouter_async_client = FakeOpenRouterClient(SCRIPT, latency={slow: 0.5}, is_async=True)
+
+    reply = asyncio.run(app.run_async("user", "hedge-async", "Create a ticket for Bole"))
+
+    assert reply == "Ticket TEST-0001 created."
+    assert CALLS == ["Bole"]
+    assert fast in app.openrouter_async_client.models_called
+    assert app.hedge_report()["backup_wins"] >= 1
+
+
+def test_hedging_is_opt_in():
+    """Test AdkApp without a HedgeConfig never races requests"""
+    app = AdkApp(agent=test_agent, health=ProviderHealthRegistry())
+    app.gemini_client = FakeGeminiClient(SCRIPT, latency={"fake-primary": 0.05})
+    CALLS.clear()
+
+    app.run("user", "hedge-off", "Create a ticket for Bole")
+
+    assert set(app.gemini_client.models_called) == {"fake-primary"}
+    assert app.hedge_report()["requests"] == 0
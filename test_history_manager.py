@@ -0,0 +1,77 @@
+"""
+Tests for the token-budgeted history window
+"""
+
+from smart_city_agent.local_runner import AdkApp, Agent, Session, get_session as app_session
+from smart_city_agent.history_manager import HistoryManager, SUMMARY_HEADER, content_text
+from smart_city_agent.prompt_compiler import estimate_tokens
+from smart_city_agent.provider_health import ProviderHealthRegistry
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+LONG_REPLY = "Thank you for the details about the outage in your area. " * 5
+
+
+def chat(manager, session, turns, start=0):
+    for i in range(start, start + turns):
+        manager.record_turn(session, f"Question {i} about my street light", LONG_REPLY)
+
+
+def test_window_stays_within_budget():
+    """Test old turns are summarized and the window stays bounded"""
+    manager = HistoryManager(budget=300)
+    session = Session("history-budget")
+    chat(manager, session, 40)
+
+    window = manager.build(session)
+    verbatim = window[2:]
+    tokens = sum(estimate_tokens(content_text(c)) for c in verbatim)
+
+    assert tokens <= 300
+    assert content_text(window[0]).startswith(SUMMARY_HEADER)
+    assert content_text(verbatim[-2]) == "Question 39 about my street light"
+    assert len(window) < len(session.history)
+
+
+def test_ticket_turns_are_pinned():
+    """Test the turn that created a ticket is replayed verbatim at any age"""
+    manager = HistoryManager(budget=300)
+    session = Session("history-pin")
+    manager.record_turn(session, "No power in Bole", "Your ticket number is POWR-1A2B3C4D.")
+    chat(manager, session, 40)
+
+    window = manager.build(session)
+    texts = [content_text(c) for c in window]
+
+    assert "Your ticket number is POWR-1A2B3C4D." in texts
+    assert "Tickets mentioned: POWR-1A2B3C4D" in texts[0]
+
+
+def test_unbounded_manager_replays_everything():
+    """Test budget=None keeps the previous full-history behaviour"""
+    manager = HistoryManager(budget=None)
+    session = Session("history-full")
+    chat(manager, session, 10)
+
+    assert manager.build(session) == session.history
+
+
+def test_both_providers_receive_the_window():
+    """Test Gemini history and OpenRouter messages come from the same window"""
+    agent = Agent(name="history_agent", model="fake-model", instruction="Test agent.")
+    app = AdkApp(agent=agent, health=ProviderHealthRegistry(), history_manager=HistoryManager(budget=200))
+    app.gemini_client = FakeGeminiClient([LONG_REPLY])
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+    session_id = "history-providers"
+    for i in range(30):
+        app.run("user", session_id, f"Message {i} with some extra words to take up tokens")
+
+    report = app.history_report(session_id)
+    assert report["window_tokens"] < report["full_tokens"]
+    assert len(app.gemini_client.last_history) < 2 * 29
+
+    session = app_session(session_id)
+    messages = app._openai_messages(session, "Test agent.", "One more message")
+    assert len(messages) == 1 + len(app.history_manager.build(session)) + 1
+    assert messages[1]["content"].startswith(SUMMARY_HEADER)
+    assert messages[2]["role"] == "assistant"
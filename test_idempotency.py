@@ -0,0 +1,109 @@
+"""
+Tests for idempotent ticket creation within a turn
+"""
+
+import time
+import uuid
+import pytest
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient
+from smart_city_agent.idempotency import idempotent, turn_scope, get_idempotency_cache
+
+test_server = MCPServer(name="test_idempotency_server")
+CREATED = []
+
+
+@test_server.tool()
+@idempotent(identity=("woreda",))
+def idem_create_ticket(woreda: str, issue_description: str, user_contact: str = "") -> dict:
+    """Create a ticket (counts real writes)."""
+    time.sleep(0.05)
+    ticket = {"ticket_number": f"POWR-{uuid.uuid4().hex[:8].upper()}", "woreda": woreda}
+    CREATED.append(ticket)
+    return ticket
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-model",
+    instruction="Test agent.",
+    tools=[idem_create_ticket],
+)
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    CREATED.clear()
+    get_idempotency_cache().clear()
+
+
+def test_fallback_replays_ticket_created_before_gemini_failed():
+    """Test a turn redone on OpenRouter gets Gemini's ticket instead of writing a second one"""
+    app = AdkApp(agent=test_agent, use_intent_router=False)
+    gemini_calls = []
+
+    def gemini_script(prompt):
+        gemini_calls.append(prompt)
+        if len(gemini_calls) > 1:
+            raise RuntimeError("Gemini failed after the tool call")
+        return [[("idem_create_ticket", {"woreda": "Bole", "issue_description": "No power"})]]
+
+    app.gemini_client = FakeGeminiClient(script=gemini_script)
+    # The fallback model rephrases the description; the woreda still identifies the ticket
+    app.openrouter_client = FakeOpenRouterClient(script=[
+        [("idem_create_ticket", {"woreda": "bole ", "issue_description": "Electricity is out since morning"})],
+        "Ticket created.",
+    ])
+
+    assert app.run("u1", "idem-fallback", "No power in Bole") == "Ticket created."
+
+    assert len(CREATED) == 1
+    assert get_idempotency_cache().metrics()["hits"] == 1
+
+
+def test_new_turns_and_other_arguments_create_new_tickets():
+    """Test deduplication is scoped to the turn and to the normalized identifying arguments"""
+    with turn_scope("s1"):
+        first = idem_create_ticket("Bole", "No power")
+        assert idem_create_ticket(woreda="Bole", issue_description="No power", user_contact="") == first
+        assert idem_create_ticket("Bole", "The power is out") == first
+        assert idem_create_ticket("Yeka", "No power") != first
+    with turn_scope("s1"):
+        assert idem_create_ticket("Bole", "No power") != first
+
+    # Outside a turn nothing is deduplicated
+    idem_create_ticket("Bole", "No power")
+    idem_create_ticket("Bole", "No power")
+    assert len(CREATED) == 5
+
+
+def test_concurrent_duplicates_write_once():
+    """Test duplicate calls in flight at the same time wait for the first write"""
+    with turn_scope("s2"):
+        # Copied here, like AdkApp does, so the workers see the turn scope
+        contexts = [contextvars.copy_context() for _ in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda ctx: ctx.run(idem_create_ticket, "Bole", "No power"), contexts))
+
+    assert len(CREATED) == 1
+    assert all(r == results[0] for r in results)
+
+
+def test_failed_call_is_not_remembered():
+    """Test a retry after an error really runs the tool again"""
+    attempts = []
+
+    @idempotent
+    def flaky(woreda: str) -> dict:
+        attempts.append(woreda)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return {"ticket_number": "POWR-00000001"}
+
+    with turn_scope("s3"):
+        with pytest.raises(RuntimeError):
+            flaky("Bole")
+        assert flaky("Bole") == {"ticket_number": "POWR-00000001"}
+    assert len(attempts) == 2
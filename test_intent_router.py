@@ -0,0 +1,56 @@
+"""
+Tests for the local intent router
+"""
+
+import pytest
+from smart_city_agent.agent import customer_service_agent
+from smart_city_agent.intent_router import IntentRouter
+from smart_city_agent.local_runner import AdkApp, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter.from_agent(customer_service_agent)
+
+
+@pytest.mark.parametrize("prompt,expected", [
+    ("No water in Bole", "utility_agent"),
+    ("There's a fire in my building!", "emergency_agent"),
+    ("The garbage hasn't been collected for two weeks", "sanitation_agent"),
+    ("There's a huge pothole on the main road near Merkato", "infrastructure_agent"),
+    ("My transformer exploded and the electricity is off", "power_agent"),
+])
+def test_routes_clear_requests(router, prompt, expected):
+    """Test clear reports are routed to the right specialist"""
+    decision = router.classify(prompt)
+    assert decision.agent_name == expected
+    assert decision.confidence >= router.threshold
+
+
+@pytest.mark.parametrize("prompt", ["Hello", "Tell me about politics", "Something smells bad outside"])
+def test_falls_back_when_unsure(router, prompt):
+    """Test unclear requests are not routed"""
+    assert router.route(prompt) is None
+
+
+def test_short_follow_up_sticks_to_previous_route(router):
+    """Test a bare woreda answer stays with the specialist that asked for it"""
+    assert router.route("Bole", previous="power_agent") == "power_agent"
+    assert router.route("Bole") is None
+
+
+def test_adkapp_sends_only_routed_specialist():
+    """Test a confident turn carries only one specialist's instruction and tools"""
+    app = AdkApp(agent=customer_service_agent)
+    app.gemini_client = FakeGeminiClient(script=["Reported."])
+    app.openrouter_client = None
+
+    app.run("u1", "router-session", "No water in Bole")
+
+    config = app.gemini_client.last_config
+    tool_names = sorted(d.name for t in config.tools for d in t.function_declarations)
+    assert tool_names == ["create_utility_ticket", "get_ticket_status", "get_utility_office_by_woreda"]
+    assert "You are the Utility Agent" in config.system_instruction
+    assert "You are the Power Agent" not in config.system_instruction
+    assert get_session("router-session").state['current_issue_type'] == 'utility'
@@ -0,0 +1,120 @@
+"""
+Tests for the prepared statement registry used by the MCP servers
+"""
+
+import pytest
+from psycopg2 import errors
+from smart_city_agent.mcp_server.statements import execute_prepared, get_statement
+
+STATUS_SQL = """
+    SELECT ticket_number, status
+    FROM tickets
+    WHERE ticket_number = %s;
+"""
+
+
+class RecordingConnection:
+    def __init__(self, schema=None):
+        self.schema = schema
+        self.sent = []
+        self.fail_next = None
+        self.rollbacks = 0
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.connection = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.sent.append(sql)
+        if self.connection.fail_next:
+            error, self.connection.fail_next = self.connection.fail_next, None
+            raise error
+
+
+def test_prepared_once_per_connection():
+    """Test the first call prepares and later calls only EXECUTE"""
+    conn = RecordingConnection()
+    cur = conn.cursor()
+    name = get_statement(STATUS_SQL).name
+
+    execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+    execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+
+    assert conn.sent[0].startswith(f"PREPARE {name} AS SELECT")
+    assert "WHERE ticket_number = $1" in conn.sent[0]
+    assert conn.sent[0].endswith(f"EXECUTE {name} (%s)")
+    assert conn.sent[1] == f"EXECUTE {name} (%s)"
+
+
+def test_statement_names_are_scoped_by_schema():
+    """Test cloud connections prepare one statement per agent schema"""
+    conn = RecordingConnection(schema="power")
+    name = get_statement(STATUS_SQL).name
+
+    execute_prepared(conn.cursor(), STATUS_SQL, ("POWR-1A2B3C4D",))
+    conn.schema = "utility"
+    execute_prepared(conn.cursor(), STATUS_SQL, ("UTIL-1A2B3C4D",))
+
+    assert conn.sent[0].startswith(f"PREPARE {name}_power AS")
+    assert conn.sent[1].startswith(f"PREPARE {name}_utility AS")
+
+
+def test_lost_statement_is_reprepared():
+    """Test a statement the server forgot is re-prepared and retried without touching other statements"""
+    conn = RecordingConnection()
+    cur = conn.cursor()
+    execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+
+    conn.fail_next = errors.InvalidSqlStatementName("prepared statement does not exist")
+    execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+
+    assert conn.sent[2].startswith("PREPARE")
+    assert not any(sql.startswith("DEALLOCATE") for sql in conn.sent)
+    assert conn.rollbacks == 1
+
+
+def test_only_stale_plans_trigger_a_retry():
+    """Test other unsupported-feature errors are raised, not retried"""
+    conn = RecordingConnection()
+    cur = conn.cursor()
+    execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+
+    conn.fail_next = errors.FeatureNotSupported("cached plan must not change result type")
+    execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+    assert conn.sent[2] == f"DEALLOCATE {get_statement(STATUS_SQL).name}"
+    assert conn.sent[3].startswith("PREPARE")
+
+    conn.sent.clear()
+    conn.fail_next = errors.FeatureNotSupported("FOR UPDATE is not allowed with aggregate functions")
+    with pytest.raises(errors.FeatureNotSupported):
+        execute_prepared(cur, STATUS_SQL, ("POWR-1A2B3C4D",))
+    assert conn.sent == [conn.sent[0]] and conn.sent[0].startswith("EXECUTE")
+
+
+def test_off_by_default_in_cloud_mode(monkeypatch):
+    """Test a DATABASE_URL (usually behind a transaction-mode pooler) turns SQL-level prepares off"""
+    import importlib
+    from smart_city_agent.mcp_server import statements
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql://pooler:6543/postgres")
+    monkeypatch.delenv("DB_PREPARED_STATEMENTS", raising=False)
+    try:
+        assert importlib.reload(statements).PREPARED_STATEMENTS is False
+        monkeypatch.setenv("DB_PREPARED_STATEMENTS", "1")
+        assert importlib.reload(statements).PREPARED_STATEMENTS is True
+    finally:
+        monkeypatch.undo()
+        importlib.reload(statements)
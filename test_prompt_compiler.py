@@ -0,0 +1,66 @@
+"""
+Tests for the precompiled, prefix-stable system instruction
+"""
+
+from smart_city_agent.agent import customer_service_agent
+from smart_city_agent.local_runner import TOOL_REGISTRY, Session
+from smart_city_agent.prompt_compiler import compile_instruction
+# Importing the servers fills the registry like AdkApp does
+from smart_city_agent.mcp_server import power_server, utility_server  # noqa: F401
+
+
+def test_compiled_once_per_root_agent():
+    """Test the static instruction is reused across turns"""
+    first = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+    second = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+
+    assert first is second
+
+
+def test_session_state_comes_last():
+    """Test dynamic state is appended after an identical static prefix"""
+    compiled = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+    session_a = Session("compiler-a")
+    session_b = Session("compiler-b")
+    session_b.state['user:woreda'] = 'Bole'
+
+    text_a = compiled.render(session_a.state)
+    text_b = compiled.render(session_b.state)
+
+    assert text_a.startswith(compiled.static_text)
+    assert text_b.startswith(compiled.static_text)
+    assert text_b.endswith("SESSION STATE:\nuser:woreda: Bole\n")
+
+
+def test_specialist_prompts_are_kept_verbatim():
+    """Test every specialist's rules stay inside its own section"""
+    compiled = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+
+    for sub in customer_service_agent.sub_agents:
+        assert f"--- {sub.name.upper()} ---\n{sub.instruction}\n" in compiled.static_text
+
+
+def test_recompiled_when_a_tool_is_replaced(monkeypatch):
+    """Test re-registering a tool under the same name invalidates the cache"""
+    first = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+    name = next(iter(TOOL_REGISTRY))
+    replacement = lambda **kwargs: {}
+    replacement.__name__ = name
+    monkeypatch.setitem(TOOL_REGISTRY, name, replacement)
+
+    second = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+    assert second is not first
+    assert compile_instruction(customer_service_agent, TOOL_REGISTRY) is second
+
+
+def test_report_has_every_section():
+    """Test per-section byte/token report"""
+    compiled = compile_instruction(customer_service_agent, TOOL_REGISTRY)
+    report = compiled.report({'user:woreda': 'Bole'})
+    names = [row['section'] for row in report]
+
+    assert names[0] == 'customer_service'
+    assert names[-1] == 'session_state'
+    for sub in customer_service_agent.sub_agents:
+        assert sub.name in names
+    assert all(row['bytes'] > 0 and row['tokens'] > 0 for row in report)
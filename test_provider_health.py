@@ -0,0 +1,115 @@
+"""
+Tests for provider health tracking and circuit breaking
+"""
+
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, OPENROUTER_MODELS
+from smart_city_agent.provider_health import (
+    ProviderHealthRegistry, CLOSED, OPEN, HALF_OPEN, FAILURE_THRESHOLD, BASE_COOLDOWN
+)
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def gemini_outage(prompt):
+    raise RuntimeError("503 Service Unavailable")
+
+
+def test_breaker_trips_probes_and_closes():
+    """Test closed -> open -> half-open -> closed transitions"""
+    clock = FakeClock()
+    registry = ProviderHealthRegistry(clock=clock)
+    key = "gemini:test"
+
+    for _ in range(FAILURE_THRESHOLD):
+        assert registry.allow(key)
+        registry.record(key, False, 0.1)
+    assert registry.get(key).state == OPEN
+    assert not registry.allow(key)
+
+    clock.now += BASE_COOLDOWN
+    assert registry.allow(key)
+    assert registry.get(key).state == HALF_OPEN
+    # Only one probe at a time
+    assert not registry.allow(key)
+
+    registry.record(key, True, 0.2)
+    assert registry.get(key).state == CLOSED
+
+
+def test_failed_probe_doubles_cooldown():
+    """Test a failed half-open probe re-opens with a longer cooldown"""
+    clock = FakeClock()
+    registry = ProviderHealthRegistry(clock=clock)
+    key = "openrouter:test"
+    for _ in range(FAILURE_THRESHOLD):
+        registry.record(key, False, 0.1)
+
+    clock.now += BASE_COOLDOWN
+    assert registry.allow(key)
+    registry.record(key, False, 0.1)
+
+    assert registry.get(key).state == OPEN
+    assert registry.get(key).cooldown == BASE_COOLDOWN * 2
+
+
+def test_order_prefers_healthy_models():
+    """Test candidates are ranked by score and open circuits are dropped"""
+    registry = ProviderHealthRegistry(clock=FakeClock())
+    registry.record("openrouter:a", True, 2.0)
+    registry.record("openrouter:b", True, 0.5)
+    for _ in range(FAILURE_THRESHOLD):
+        registry.record("openrouter:c", False, 1.0)
+
+    assert registry.order(["openrouter:a", "openrouter:b", "openrouter:c"]) == ["openrouter:b", "openrouter:a"]
+
+
+def test_order_does_not_claim_the_probe():
+    """Test ranking a recovering model leaves its half-open probe for the real attempt"""
+    clock = FakeClock()
+    registry = ProviderHealthRegistry(clock=clock)
+    key = "openrouter:recovering"
+    for _ in range(FAILURE_THRESHOLD):
+        registry.record(key, False, 0.1)
+    clock.now += BASE_COOLDOWN
+
+    for _ in range(5):
+        assert registry.order(["openrouter:healthy", key]) == ["openrouter:healthy", key]
+    assert registry.get(key).state == OPEN
+    assert registry.get(key).skipped == 0
+
+    assert registry.allow(key)
+    assert registry.order([key]) == []
+
+
+def test_gemini_outage_stops_costing_calls():
+    """Test an open Gemini circuit skips Gemini on later turns"""
+    app = AdkApp(agent=Agent(name="root", model="fake-model"), health=ProviderHealthRegistry())
+    app.gemini_client = FakeGeminiClient(script=gemini_outage)
+    app.openrouter_client = FakeOpenRouterClient(script=["Handled by fallback."])
+
+    for i in range(10):
+        assert app.run("u1", f"health-{i}", "Hello") == "Handled by fallback."
+
+    assert app.gemini_client.calls == FAILURE_THRESHOLD
+
+
+def test_dead_openrouter_model_is_demoted():
+    """Test a failing first model is no longer tried first"""
+    first, second = OPENROUTER_MODELS[0], OPENROUTER_MODELS[1]
+    app = AdkApp(agent=Agent(name="root", model="fake-model"), health=ProviderHealthRegistry())
+    app.gemini_client = None
+    app.openrouter_client = FakeOpenRouterClient(script=["OK"], failing_models={first})
+
+    app.run("u1", "demote-1", "Hello")
+    app.openrouter_client.models_called.clear()
+    app.run("u1", "demote-2", "Hello")
+
+    assert app.openrouter_client.models_called == [second]
@@ -0,0 +1,164 @@
+"""
+Tests for session eviction (TTL, count/memory caps, sweeper)
+"""
+
+import time
+from datetime import timedelta
+from smart_city_agent.local_runner import (
+    AdkApp, Agent, MCPServer, Session, SESSION_STORE, SESSION_EVICTOR, get_session
+)
+from smart_city_agent.fake_provider import FakeGeminiClient
+from smart_city_agent.session_eviction import SessionEvictor, estimate_session_bytes
+from smart_city_agent.session_manager import AddisSessionService
+
+test_server = MCPServer(name="test_eviction_server")
+
+
+@test_server.tool()
+def create_eviction_ticket(woreda: str) -> dict:
+    """Create a ticket while other citizens start conversations."""
+    for i in range(5):
+        get_session(f"eviction-crowd-{i}")
+    return {"ticket_number": "EVCT-1A2B3C4D", "status": "RECEIVED"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _evictor(**kwargs):
+    store = {}
+    clock = Clock()
+    evictor = SessionEvictor(remove=lambda sid: store.pop(sid, None), clock=clock, sweep_interval=0, **kwargs)
+
+    def use(session_id):
+        session = store.setdefault(session_id, Session(session_id))
+        evictor.touch(session)
+        return session
+    return store, clock, evictor, use
+
+
+def test_sweep_evicts_only_idle_sessions_in_lru_order():
+    """Test the sweeper frees expired sessions from the store and stops at the first live one"""
+    store, clock, evictor, use = _evictor(ttl=60, max_sessions=None, max_bytes=None)
+    for i in range(3):
+        clock.now = i * 10
+        use(f"s{i}")
+    clock.now = 75
+    use("s0")                      # refreshed: now the most recent
+
+    assert evictor.sweep() == 1    # only s1 (idle since t=10) has expired
+    assert sorted(store) == ["s0", "s2"]
+    clock.now = 200
+    assert evictor.sweep() == 2 and store == {}
+    metrics = evictor.metrics()
+    assert metrics["evicted"]["ttl"] == 3 and metrics["resident"] == 0 and metrics["resident_bytes"] == 0
+
+
+def test_count_and_memory_caps_evict_least_recently_used():
+    """Test caps evict LRU sessions inline, never the one being used, and track resident bytes"""
+    store, clock, evictor, use = _evictor(ttl=None, max_sessions=3, max_bytes=None)
+    for i in range(5):
+        use(f"s{i}")
+    assert sorted(store) == ["s2", "s3", "s4"]
+    assert evictor.metrics()["evicted"]["count"] == 2
+
+    store, clock, evictor, use = _evictor(ttl=None, max_sessions=None, max_bytes=18_000)
+    for i in range(3):
+        use(f"m{i}")
+    big = use("m0")
+    big.state["notes"] = "x" * 15_000
+    evictor.resize(big)
+    assert sorted(store) == ["m0", "m2"]
+    assert evictor.metrics()["evicted"]["memory"] == 1
+    assert evictor.resident_bytes == sum(estimate_session_bytes(s) for s in store.values())
+
+
+def test_cleanup_expired_sessions_frees_the_session_store():
+    """Test AddisSessionService cleanup removes the Session objects, not just their metadata"""
+    service = AddisSessionService(session_timeout_minutes=0)
+    service.create_session("citizen", "cleanup-1")
+    get_session("cleanup-1").state["user:woreda"] = "Bole"
+    assert "cleanup-1" in SESSION_STORE
+
+    assert service.cleanup_expired_sessions() == 1
+    assert "cleanup-1" not in SESSION_STORE
+    assert get_session("cleanup-1").state == {}
+    assert SESSION_EVICTOR.metrics()["resident"] >= 1
+
+
+def test_cleanup_expired_sessions_honours_turns_and_other_users():
+    """Test cleanup skips sessions a turn uses or used recently, and sessions another user still holds"""
+    service = AddisSessionService(session_timeout_minutes=1)
+    for user, session_id in (("citizen", "cleanup-busy"), ("citizen", "cleanup-recent"),
+                             ("citizen", "cleanup-shared"), ("clerk", "cleanup-shared")):
+        service.create_session(user, session_id)
+    metadata = service._session_metadata
+    for key in ("citizen:cleanup-busy", "citizen:cleanup-recent", "citizen:cleanup-shared"):
+        metadata[key]['last_accessed'] -= timedelta(hours=1)
+    clock, SESSION_EVICTOR.clock = SESSION_EVICTOR.clock, lambda: time.monotonic() + 3600
+    SESSION_EVICTOR.pin("cleanup-busy")
+    try:
+        get_session("cleanup-recent")           # an AdkApp turn, invisible to the service metadata
+        SESSION_EVICTOR.clock = lambda: time.monotonic() + 3630
+        assert service.cleanup_expired_sessions() == 1
+    finally:
+        SESSION_EVICTOR.clock = clock
+        SESSION_EVICTOR.unpin("cleanup-busy")
+
+    assert "citizen:cleanup-shared" not in metadata and "clerk:cleanup-shared" in metadata
+    assert all(sid in SESSION_STORE for sid in ("cleanup-busy", "cleanup-recent", "cleanup-shared"))
+
+
+def test_victims_are_removed_under_the_lock():
+    """Test removal happens with the lock held, so a touch or pin cannot slip in after the choice"""
+    store, clock, evictor, use = _evictor(ttl=60, max_sessions=1, max_bytes=None)
+    held = []
+    evictor.remove = lambda sid: (held.append(evictor._lock.locked()), store.pop(sid, None))
+    use("s0")
+    use("s1")                      # count cap
+    clock.now = 100
+    evictor.sweep()                # TTL
+    use("s2")
+    clock.now = 200
+    assert evictor.expire("s2", idle=60)
+    assert held == [True, True, True] and store == {}
+
+
+def test_pinned_sessions_survive_caps_and_sweeps():
+    """Test a session pinned by a running turn is skipped by the caps and the TTL sweep"""
+    store, clock, evictor, use = _evictor(ttl=60, max_sessions=2, max_bytes=None)
+    use("busy")
+    evictor.pin("busy")
+    for i in range(3):
+        use(f"s{i}")
+    assert sorted(store) == ["busy", "s2"]
+
+    clock.now = 100
+    assert evictor.sweep() == 1 and sorted(store) == ["busy"]
+    evictor.unpin("busy")
+    use("s3")
+    use("s4")
+    assert sorted(store) == ["s3", "s4"]
+    assert evictor.metrics()["pinned"] == 0
+
+
+def test_turn_keeps_one_session_under_pressure():
+    """Test hook state and history land on the same Session when caps evict mid-turn"""
+    agent = Agent(name="eviction_agent", model="fake-model", instruction="Test agent.", tools=[create_eviction_ticket])
+    app = AdkApp(agent=agent, use_intent_router=False)
+    app.openrouter_client = None
+    app.gemini_client = FakeGeminiClient(script=[[("create_eviction_ticket", {"woreda": "Bole"})], "Filed."])
+    previous = SESSION_EVICTOR.max_sessions
+    SESSION_EVICTOR.max_sessions = 1
+    try:
+        assert app.run("u1", "eviction-turn", "No power") == "Filed."
+        session = get_session("eviction-turn")
+        assert session.state["last_ticket_number"] == "EVCT-1A2B3C4D"
+        assert len(session.history.turns) == 1
+    finally:
+        SESSION_EVICTOR.max_sessions = previous
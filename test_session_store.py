@@ -0,0 +1,185 @@
+"""
+Tests for the durable session store (hot cache, write-behind, lazy load)
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, Session, get_session, use_session_store
+from smart_city_agent.fake_provider import FakeGeminiClient
+from smart_city_agent.session_store import SessionStore, SQLiteSessionBackend, PostgresSessionBackend
+
+store_agent = Agent(name="store_test_agent", model="fake-model", instruction="Test agent.")
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def _store(path, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return SessionStore(SQLiteSessionBackend(path), Session, **kwargs)
+
+
+def test_conversation_survives_a_restart(sqlite_path):
+    """Test history, state and pinned turns written behind a turn are lazy-loaded by a fresh process"""
+    store = _store(sqlite_path)
+    previous = use_session_store(store)
+    try:
+        app = AdkApp(agent=store_agent, use_intent_router=False)
+        app.openrouter_client = None
+        app.gemini_client = FakeGeminiClient(script=["Your ticket is POWR-12345678."])
+        get_session("durable-1").state["user:woreda"] = "Bole"
+        app.run("u1", "durable-1", "No power in Bole")
+        assert store.metrics()["dirty"] == 1
+        assert store.flush() == 1
+    finally:
+        use_session_store(previous)
+        store.close()
+
+    restarted = _store(sqlite_path)
+    session = restarted.get("durable-1")
+    assert session.state == {"user:woreda": "Bole"}
+    assert [(t.prompt, t.reply) for t in session.history.turns] == [("No power in Bole", "Your ticket is POWR-12345678.")]
+    assert session.history_window.pinned == {0}
+    assert restarted.metrics()["loads"] == 1
+    assert restarted.get("never-seen").history == []
+    restarted.close()
+
+
+def test_hot_cache_is_bounded_and_evicted_dirty_sessions_stay_current(sqlite_path):
+    """Test evicted sessions awaiting their write are re-admitted, not reloaded from stale rows"""
+    hot = {}
+    store = _store(sqlite_path, hot=hot, max_sessions=2)
+    for i in range(4):
+        session = store.get(f"s{i}")
+        session.state["n"] = i
+        store.mark_dirty(session)
+
+    assert list(hot) == ["s2", "s3"]
+    assert store.get("s0").state == {"n": 0}
+    assert store.metrics()["loads"] == 0
+
+    assert store.flush() == 4
+    store.get("s1")
+    store.get("s2")
+    assert store.get("s3").state == {"n": 3}
+    assert store.metrics()["loads"] == 3 and store.metrics()["evictions"] >= 4
+    store.close()
+
+
+def test_replicas_revalidate_and_never_overwrite_a_newer_write(sqlite_path):
+    """Test a replica sees another's write on its next use, and a stale write is rejected and reloaded"""
+    a = _store(sqlite_path, revalidate_after=0)
+    b = _store(sqlite_path, revalidate_after=0)
+    b.get("shared").state["user:woreda"] = "Bole"
+    b.mark_dirty(b.get("shared"))
+    b.flush()
+
+    stale = a.get("shared")
+    fresh = b.get("shared")
+    fresh.state["last_ticket_number"] = "POWR-1A2B3C4D"
+    b.mark_dirty(fresh)
+    assert b.flush() == 1
+
+    assert a.get("shared").state == fresh.state        # revalidated, not served from the hot cache
+    assert a.metrics()["reloads"] == 1
+
+    stale.state["user:woreda"] = "Yeka"                # a turn still holding the old copy
+    a.mark_dirty(stale)
+    assert a.flush() == 0 and a.metrics()["conflicts"] == 1
+    assert _store(sqlite_path).get("shared").state == fresh.state
+    assert a.get("shared").state == fresh.state
+    a.close()
+    b.close()
+
+
+def test_flush_writes_the_snapshot_taken_at_the_end_of_the_turn(sqlite_path):
+    """Test the flush thread writes what the turn saved, not a session mutated after it"""
+    store = _store(sqlite_path)
+    session = store.get("snapshot-1")
+    session.state["n"] = 1
+    store.mark_dirty(session)
+    session.state["n"] = 2                             # the next turn, not yet saved
+    store.flush()
+    assert _store(sqlite_path).get("snapshot-1").state == {"n": 1}
+    store.close()
+
+
+def test_async_turn_loads_the_session_off_the_event_loop(sqlite_path):
+    """Test run_async reads a non-resident session from the backend on a worker thread"""
+    store = _store(sqlite_path)
+    loop_threads = []
+    load = store.backend.load
+
+    def recording_load(session_id):
+        loop_threads.append(threading.current_thread() is threading.main_thread())
+        return load(session_id)
+    store.backend.load = recording_load
+    previous = use_session_store(store)
+    try:
+        app = AdkApp(agent=store_agent, use_intent_router=False)
+        app.openrouter_client = app.openrouter_async_client = None
+        app.gemini_client = FakeGeminiClient(script=["Noted."])
+        assert asyncio.run(app.run_async("u1", "durable-async", "No power in Bole")) == "Noted."
+    finally:
+        use_session_store(previous)
+        store.close()
+    assert loop_threads and not any(loop_threads)
+
+
+class RecordingPostgres:
+    """Fake get_conn: records statements and keeps upserted rows in a dict."""
+    def __init__(self):
+        self.statements = []
+        self.fail_next = False
+
+    @contextmanager
+    def __call__(self, cfg):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.fail_next and sql.startswith("INSERT"):
+            self.fail_next = False
+            raise RuntimeError("connection reset")
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        # Every upsert applies (no other replica)
+        sql, params = self.statements[-1]
+        return [{"session_id": session_id} for session_id in params[0::5]]
+
+    def commit(self):
+        pass
+
+
+def test_write_behind_batches_one_upsert_and_retries_failures():
+    """Test dirty sessions are upserted in max_batch chunks and a failed batch is retried next flush"""
+    db = RecordingPostgres()
+    store = SessionStore(PostgresSessionBackend({"type": "local", "dbname": "sessions_db"}, connection=db),
+                         Session, flush_interval=60, max_batch=3)
+    for i in range(5):
+        store.mark_dirty(Session(f"pg-{i}"))
+
+    db.fail_next = True
+    assert store.flush() == 2
+    assert store.metrics()["failures"] == 1 and store.metrics()["dirty"] == 3
+    assert store.flush() == 3
+
+    upserts = [(sql, params) for sql, params in db.statements if sql.startswith("INSERT")]
+    assert len(upserts) == 2
+    assert all("ON CONFLICT (session_id) DO UPDATE" in sql and "WHERE adk_sessions.version" in sql for sql, _ in upserts)
+    assert sorted(params[0::5] for _, params in upserts) == [["pg-0", "pg-1", "pg-2"], ["pg-3", "pg-4"]]
+    assert all(params[4::5] == [1] * len(params[4::5]) for _, params in upserts)
+    store.close()
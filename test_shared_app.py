@@ -0,0 +1,34 @@
+"""
+Tests for the process-wide shared AdkApp
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from smart_city_agent.local_runner import Agent, get_shared_app, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+shared_agent = Agent(name="shared_test_agent", model="fake-model", instruction="Test agent.")
+
+
+def test_concurrent_sessions_share_one_app():
+    """Test every caller gets the same AdkApp even when the first calls race"""
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        apps = list(pool.map(lambda _: get_shared_app(shared_agent), range(16)))
+
+    assert all(app is apps[0] for app in apps)
+    assert get_shared_app(Agent(name="other_agent", model="fake-model")) is not apps[0]
+
+
+def test_sessions_stay_isolated_on_the_shared_app():
+    """Test conversations on the shared app are separated by session_id only"""
+    app = get_shared_app(shared_agent)
+    app.gemini_client = FakeGeminiClient(script=["Noted."])
+    app.openrouter_client = None
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: app.run(f"user-{i % 2}", f"shared-{i % 2}", f"Message {i}"), range(8)))
+
+    for session_id in ("shared-0", "shared-1"):
+        session = get_session(session_id)
+        assert len(session.history) == 8
+        assert all(session_id[-1] == str(int(c.parts[0].text.split()[-1]) % 2)
+                   for c in session.history if c.role == "user")
@@ -0,0 +1,74 @@
+"""
+Tests for streaming responses through AdkApp.run_stream
+"""
+
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, get_session
+from smart_city_agent.message_processor import stream_message_with_agent
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient
+
+test_server = MCPServer(name="test_streaming_server")
+
+
+@test_server.tool()
+def stream_office_lookup(woreda_name: str) -> dict:
+    """Test office lookup."""
+    return {"name": f"{woreda_name} Office"}
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-model",
+    instruction="Test agent.",
+    tools=[stream_office_lookup],
+)
+
+SCRIPT = [
+    [("stream_office_lookup", {"woreda_name": "Bole"})],
+    "The Bole Office has been notified about the outage.",
+]
+
+
+@pytest.fixture
+def app():
+    app = AdkApp(agent=test_agent)
+    app.gemini_client = None
+    app.openrouter_client = None
+    return app
+
+
+def test_gemini_stream_yields_deltas_and_tool_events(app):
+    """Test Gemini streaming yields tool progress then text deltas"""
+    app.gemini_client = FakeGeminiClient(script=SCRIPT)
+
+    events = list(app.run_stream("u1", "stream-gemini", "No power in Bole"))
+    kinds = [e.kind for e in events]
+    text = "".join(e.text for e in events if e.kind == "text")
+
+    assert kinds[:2] == ["tool_call", "tool_result"]
+    assert kinds.count("text") > 1
+    assert text == "The Bole Office has been notified about the outage."
+    assert events[1].data == {"result": {"name": "Bole Office"}}
+    assert len(get_session("stream-gemini").history) == 2
+
+
+def test_openrouter_stream_reassembles_tool_calls(app):
+    """Test OpenRouter stream=True chunks are reassembled into tool calls"""
+    app.openrouter_client = FakeOpenRouterClient(script=SCRIPT)
+
+    events = list(app.run_stream("u1", "stream-openrouter", "No power in Bole"))
+    text = "".join(e.text for e in events if e.kind == "text")
+
+    assert [e.name for e in events if e.kind == "tool_call"] == ["stream_office_lookup"]
+    assert text == "The Bole Office has been notified about the outage."
+
+
+def test_stream_message_with_agent_reports_tool_events(app):
+    """Test the Streamlit helper yields only text and forwards tool events"""
+    app.gemini_client = FakeGeminiClient(script=SCRIPT)
+    tool_events = []
+
+    chunks = list(stream_message_with_agent(app, "u1", "stream-helper", "No power in Bole", tool_events.append))
+
+    assert all(isinstance(c, str) for c in chunks)
+    assert [e.kind for e in tool_events] == ["tool_call", "tool_result"]
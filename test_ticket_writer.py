@@ -0,0 +1,130 @@
+"""
+Tests for the group-commit ticket writer
+"""
+
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from smart_city_agent.mcp_server import ticket_writer
+from smart_city_agent.mcp_server.ticket_writer import TicketWriter, ASYNC, RELAXED
+
+CFG = {"type": "local", "dbname": "power_db"}
+
+
+class RecordingDB:
+    """Fake get_conn: records each statement, returns RETURNING rows, rejects bad woredas."""
+    def __init__(self, gate=None):
+        self.statements = []
+        self.commits = 0
+        self.gate = gate
+
+    @contextmanager
+    def __call__(self, cfg):
+        if self.gate:
+            self.gate.wait()
+        yield self
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        if params and "BAD" in params:
+            raise ValueError("value too long for type character varying(50)")
+        self.last_params = params
+
+    def fetchall(self):
+        numbers = [p for p in self.last_params if str(p).startswith("POWR-")]
+        return [{"ticket_number": n, "status": "RECEIVED", "created_at": None} for n in numbers]
+
+    def commit(self):
+        self.commits += 1
+
+    def inserts(self):
+        return [sql for sql, _ in self.statements if sql.startswith("INSERT")]
+
+
+def ticket(i, woreda="Bole"):
+    return {"ticket_number": f"POWR-{i:08d}", "woreda": woreda, "status": "RECEIVED"}
+
+
+def test_concurrent_tickets_share_one_insert():
+    """Test tickets queued while the writer is busy are committed as one multi-row INSERT"""
+    gate = threading.Event()
+    db = RecordingDB(gate)
+    writer = TicketWriter(CFG, max_delay=0.01, connection=db)
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda i: writer.submit(ticket(i)), range(20)))
+        gate.set()
+        rows = [future.result(timeout=5) for future in results]
+
+    assert [r["ticket_number"] for r in rows] == [f"POWR-{i:08d}" for i in range(20)]
+    assert len(db.inserts()) < 20
+    assert db.commits == len(db.inserts())
+    assert writer.metrics()["rows"] == 20
+    assert writer.metrics()["max_batch"] > 1
+
+
+def test_bad_row_only_fails_its_caller():
+    """Test a failing batch is retried row by row so the other tickets still commit"""
+    gate = threading.Event()
+    db = RecordingDB(gate)
+    writer = TicketWriter(CFG, max_delay=0.05, connection=db)
+
+    good = [writer.submit(ticket(i)) for i in range(3)]
+    bad = writer.submit(ticket(99, woreda="BAD"))
+    gate.set()
+
+    assert [f.result(timeout=5)["ticket_number"] for f in good] == [f"POWR-{i:08d}" for i in range(3)]
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert writer.metrics()["failures"] == 1
+
+
+def test_async_durability_acks_before_the_write():
+    """Test async mode returns the reserved ticket at once and writes it in the background"""
+    gate = threading.Event()
+    db = RecordingDB(gate)
+    writer = TicketWriter(CFG, durability=ASYNC, connection=db)
+
+    result = writer.create(ticket(7))
+    assert result["ticket_number"] == "POWR-00000007"
+    assert db.inserts() == []
+
+    gate.set()
+    writer.flush()
+    assert len(db.inserts()) == 1
+
+
+def test_relaxed_durability_skips_fsync_wait():
+    """Test relaxed mode turns off synchronous_commit for the batch transaction only"""
+    db = RecordingDB()
+    writer = TicketWriter(CFG, durability=RELAXED, connection=db)
+
+    writer.create(ticket(1))
+
+    assert db.statements[0][0] == "SET LOCAL synchronous_commit TO off"
+
+
+def test_timed_out_create_returns_pending_and_commits_once(monkeypatch):
+    """Test a sync caller that times out gets the reserved number, and the queued row still commits once"""
+    monkeypatch.setattr(ticket_writer, "RESULT_TIMEOUT", 0.05)
+    gate = threading.Event()
+    db = RecordingDB(gate)
+    writer = TicketWriter(CFG, connection=db)
+
+    result = writer.create(ticket(9))
+    assert result["ticket_number"] == "POWR-00000009" and result["status"] == "PENDING"
+
+    gate.set()
+    writer.flush()
+    assert len(db.inserts()) == 1
+    assert writer.metrics()["timeouts"] == 1
@@ -0,0 +1,94 @@
+"""
+Tests for declarative tool result caching
+"""
+
+import time
+from smart_city_agent.local_runner import MCPServer, TOOL_REGISTRY
+from smart_city_agent.tool_cache import TTL, ticket_key, invalidate, cache_metrics
+
+test_server = MCPServer(name="test_tool_cache_server")
+CALLS = []
+STATUSES = {"POWR-AB12CD34": "RECEIVED"}
+
+
+@test_server.tool(cache=TTL(60, max_entries=2, tags=("offices:test",)))
+def cached_office_lookup(woreda_name: str) -> dict:
+    """Office lookup that counts database hits."""
+    CALLS.append(woreda_name)
+    if woreda_name == "Nowhere":
+        return {"error": f"No office found for woreda: {woreda_name}"}
+    return {"name": f"{woreda_name} Office"}
+
+
+@test_server.tool(cache=TTL(0.1, tags=("tickets:test",)), key=ticket_key)
+def cached_ticket_status(ticket_number: str) -> dict:
+    """Status lookup that counts database hits."""
+    CALLS.append(ticket_number)
+    return {"ticket_number": ticket_number, "status": STATUSES[ticket_number.upper()]}
+
+
+def test_repeat_lookups_are_served_from_cache():
+    """Test the registered tool is the cached one and normalized repeats skip the database"""
+    CALLS.clear()
+    lookup = TOOL_REGISTRY["cached_office_lookup"]
+
+    assert lookup("Bole") == {"name": "Bole Office"}
+    assert lookup(woreda_name=" bole ") == {"name": "Bole Office"}
+
+    assert CALLS == ["Bole"]
+    metrics = lookup.cache.metrics()
+    assert metrics["hits"] == 1 and metrics["misses"] == 1
+    assert any(m["tool"] == "cached_office_lookup" for m in cache_metrics())
+
+
+def test_callers_get_copies():
+    """Test mutating a returned result does not corrupt the cached entry"""
+    cached_office_lookup.cache.invalidate()
+    first = cached_office_lookup("Bole")
+    first["name"] = "Tampered"
+    second = cached_office_lookup("Bole")
+    second["phone"] = "0911"
+
+    assert cached_office_lookup("Bole") == {"name": "Bole Office"}
+
+
+def test_lru_bound_and_errors_not_cached():
+    """Test the least recently used entry is evicted and error results are retried"""
+    CALLS.clear()
+    cached_office_lookup.cache.invalidate()
+
+    cached_office_lookup("Bole")
+    cached_office_lookup("Yeka")
+    cached_office_lookup("Bole")
+    cached_office_lookup("Arada")    # evicts Yeka
+    cached_office_lookup("Yeka")
+    cached_office_lookup("Nowhere")
+    cached_office_lookup("Nowhere")
+
+    assert CALLS == ["Bole", "Yeka", "Arada", "Yeka", "Nowhere", "Nowhere"]
+    assert cached_office_lookup.cache.metrics()["evictions"] == 2
+
+
+def test_status_update_invalidates_and_ttl_expires():
+    """Test a status write drops the cached read, and entries expire after their TTL"""
+    CALLS.clear()
+    assert cached_ticket_status("powr-ab12cd34")["status"] == "RECEIVED"
+
+    STATUSES["POWR-AB12CD34"] = "IN_PROGRESS"
+    assert cached_ticket_status("POWR-AB12CD34")["status"] == "RECEIVED"
+    assert invalidate("tickets:test", ticket_key("POWR-AB12CD34")) == 1
+    assert cached_ticket_status("POWR-AB12CD34")["status"] == "IN_PROGRESS"
+
+    STATUSES["POWR-AB12CD34"] = "RESOLVED"
+    time.sleep(0.15)
+    assert cached_ticket_status("POWR-AB12CD34")["status"] == "RESOLVED"
+    assert len(CALLS) == 3
+
+
+def test_ticket_status_tools_are_not_cached():
+    """Test status reads always hit the database (the admin dashboard writes from another process)"""
+    from smart_city_agent.mcp_server import power_server, utility_server  # noqa: F401
+
+    for name in ("get_power_ticket_status", "get_ticket_status"):
+        assert not hasattr(TOOL_REGISTRY[name], "cache")
+    assert hasattr(TOOL_REGISTRY["get_power_office_by_woreda"], "cache")
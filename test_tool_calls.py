@@ -0,0 +1,100 @@
+"""
+Tests for parallel execution of multiple function calls in one model response
+"""
+
+import time
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer
+from smart_city_agent.fake_provider import FakeGeminiClient, FakeOpenRouterClient, FromToolResult
+
+test_server = MCPServer(name="test_tool_calls_server")
+TOOL_DELAY = 0.2
+
+
+@test_server.tool()
+def slow_office_lookup(woreda_name: str) -> dict:
+    """Slow office lookup."""
+    time.sleep(TOOL_DELAY)
+    return {"name": f"{woreda_name} Office"}
+
+
+@test_server.tool()
+def slow_ticket_create(woreda: str, issue_description: str) -> dict:
+    """Slow ticket creation."""
+    time.sleep(TOOL_DELAY)
+    return {"ticket_number": "POWR-TEST0001", "woreda": woreda}
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-model",
+    instruction="Test agent.",
+    tools=[slow_office_lookup, slow_ticket_create],
+)
+
+SCRIPT = [
+    [
+        ("slow_office_lookup", {"woreda_name": "Bole"}),
+        ("slow_ticket_create", {"woreda": "Bole", "issue_description": "No power"}),
+    ],
+    "Ticket POWR-TEST0001 created.",
+]
+
+
+@pytest.fixture
+def app():
+    app = AdkApp(agent=test_agent)
+    app.gemini_client = None
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+    return app
+
+
+def test_gemini_runs_all_function_calls_in_one_round_trip(app):
+    """Test every function call in a Gemini response is answered in one send_message"""
+    app.gemini_client = FakeGeminiClient(script=SCRIPT)
+
+    start = time.perf_counter()
+    response = app.run("u1", "parallel-gemini", "No power in Bole")
+    elapsed = time.perf_counter() - start
+
+    assert response == "Ticket POWR-TEST0001 created."
+    # Prompt + one combined function-response message
+    assert app.gemini_client.calls == 2
+    assert elapsed < TOOL_DELAY * 2
+
+
+def test_openrouter_runs_tool_calls_in_parallel(app):
+    """Test OpenRouter tool_calls execute concurrently"""
+    app.openrouter_client = FakeOpenRouterClient(script=SCRIPT)
+
+    start = time.perf_counter()
+    response = app.run("u1", "parallel-openrouter", "No power in Bole")
+    elapsed = time.perf_counter() - start
+
+    assert response == "Ticket POWR-TEST0001 created."
+    assert app.openrouter_client.calls == 2
+    assert elapsed < TOOL_DELAY * 2
+
+
+def test_unknown_tool_returns_error_outcome(app):
+    """Test unknown tools produce an error outcome instead of stalling the loop"""
+    outcomes = app._run_tool_calls([("does_not_exist", {}), ("slow_office_lookup", {"woreda_name": "Arada"})])
+
+    assert outcomes[0] == {"error": "Function not found"}
+    assert outcomes[1] == {"result": {"name": "Arada Office"}}
+
+
+@pytest.mark.parametrize("provider", ["gemini", "openrouter"])
+def test_fake_reply_can_quote_the_tool_result(app, provider):
+    """Test a FromToolResult step is filled from the latest tool result on both providers"""
+    script = [
+        [("slow_ticket_create", {"woreda": "Bole", "issue_description": "No power"})],
+        FromToolResult("Ticket {ticket_number} for {woreda} ({missing})."),
+    ]
+    if provider == "gemini":
+        app.gemini_client = FakeGeminiClient(script=script)
+    else:
+        app.openrouter_client = FakeOpenRouterClient(script=script)
+
+    assert app.run("u1", f"quote-{provider}", "No power in Bole") == "Ticket POWR-TEST0001 for Bole (?)."
@@ -0,0 +1,73 @@
+"""
+Tests for post-tool hooks filling the session state from tool results
+"""
+
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient
+from smart_city_agent.session_manager import SessionStateHelper
+
+test_server = MCPServer(name="test_tool_hooks_server")
+
+
+@test_server.tool()
+def get_hooks_office_by_woreda(woreda_name: str) -> dict:
+    """Office lookup."""
+    if woreda_name == "Nowhere":
+        return {"error": f"No hooks office found for woreda: {woreda_name}"}
+    return {"name": f"{woreda_name} Office"}
+
+
+@test_server.tool()
+def create_hooks_ticket(woreda: str, issue_description: str) -> dict:
+    """Create a ticket."""
+    return {"ticket_number": "HOOK-1A2B3C4D", "status": "RECEIVED"}
+
+
+hooks_agent = Agent(name="hooks_agent", model="fake-model", instruction="Test agent.",
+                    tools=[get_hooks_office_by_woreda, create_hooks_ticket])
+
+
+def _app(script, **kwargs):
+    app = AdkApp(agent=hooks_agent, use_intent_router=False, **kwargs)
+    app.openrouter_client = None
+    app.gemini_client = FakeGeminiClient(script=script)
+    return app
+
+
+def test_ticket_and_woreda_reach_the_next_turn():
+    """Test a created ticket and its woreda are stored and rendered into the next turn's instruction"""
+    app = _app([
+        [("get_hooks_office_by_woreda", {"woreda_name": "Bole"})],
+        [("create_hooks_ticket", {"woreda": "Kirkos", "issue_description": "No power"})],
+        "Ticket HOOK-1A2B3C4D created.",
+    ])
+    app.run("u1", "hooks-1", "No power in Kirkos")
+
+    session = get_session("hooks-1")
+    assert SessionStateHelper.get_user_woreda(session) == "Kirkos"   # the ticket's woreda wins
+    assert SessionStateHelper.get_last_ticket(session)["ticket_number"] == "HOOK-1A2B3C4D"
+    assert SessionStateHelper.get_last_ticket(session)["service_type"] == "Hooks"
+
+    app.run("u1", "hooks-1", "Thanks")
+    instruction = app.gemini_client.last_config.system_instruction
+    assert "last_ticket_number: HOOK-1A2B3C4D" in instruction
+    assert "user:woreda: Kirkos" in instruction
+
+
+def test_failed_lookups_leave_state_alone_and_custom_hooks_run():
+    """Test error results are ignored, hooks can be replaced and a failing hook never breaks the turn"""
+    seen = []
+
+    def broken(session, name, args, result):
+        raise RuntimeError("boom")
+
+    app = _app([
+        [("get_hooks_office_by_woreda", {"woreda_name": "Nowhere"})],
+        [("get_hooks_office_by_woreda", {"woreda_name": "Bole"})],
+        "Done.",
+    ], tool_hooks=[broken])
+    app.add_tool_hook(lambda session, name, args, result: seen.append((session.id, name, result["name"])))
+
+    assert app.run("u1", "hooks-2", "Which office?") == "Done."
+    assert seen == [("hooks-2", "get_hooks_office_by_woreda", "Bole Office")]
+    assert get_session("hooks-2").state == {}
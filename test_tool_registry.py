@@ -0,0 +1,78 @@
+"""
+Tests for the typed tool registry (precompiled schemas and argument validation)
+"""
+
+import pytest
+from typing import Optional
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, TOOL_REGISTRY, get_function_schema
+from smart_city_agent.fake_provider import FakeGeminiClient
+from smart_city_agent.tool_registry import ToolSpec, ToolArgumentError
+
+test_server = MCPServer(name="test_tool_registry_server")
+RECEIVED = []
+
+
+@test_server.tool()
+def typed_ticket_tool(woreda: str, household_count: int, urgent: bool = False, user_contact: str | None = None) -> dict:
+    """Create a typed test ticket."""
+    RECEIVED.append((woreda, household_count, urgent, user_contact))
+    return {"ticket_number": "POWR-TYPED001"}
+
+
+def _optional_tool(limit: Optional[int] = None) -> dict:
+    return {}
+
+
+def test_schemas_are_compiled_once_with_nullable_unions():
+    """Test the OpenAI and Gemini schemas come from registration and mark str | None as nullable"""
+    spec = TOOL_REGISTRY.spec("typed_ticket_tool")
+    assert get_function_schema(typed_ticket_tool) is spec.openai_schema
+
+    parameters = spec.openai_schema["function"]["parameters"]
+    assert parameters["required"] == ["woreda", "household_count"]
+    assert parameters["properties"]["household_count"]["type"] == "integer"
+    assert parameters["properties"]["user_contact"]["type"] == ["string", "null"]
+
+    declaration = spec.gemini_declaration
+    assert declaration.name == "typed_ticket_tool"
+    assert declaration.parameters.properties["user_contact"].nullable is True
+    assert declaration.parameters.properties["urgent"].type == "BOOLEAN"
+
+
+def test_arguments_are_coerced_and_validated():
+    """Test LLM-style values are coerced, nulls fall back to defaults and bad input is rejected"""
+    spec = ToolSpec("t", lambda count: count)
+    assert spec.validate({"count": 3}) == {"count": "3"}    # unannotated -> string
+
+    spec = TOOL_REGISTRY.spec("typed_ticket_tool")
+    assert spec.validate({"woreda": "Bole", "household_count": "12", "urgent": "true", "extra": 1}) == {
+        "woreda": "Bole", "household_count": 12, "urgent": True,
+    }
+    assert spec.validate({"woreda": "Bole", "household_count": 3.0, "urgent": None, "user_contact": None}) == {
+        "woreda": "Bole", "household_count": 3, "user_contact": None,
+    }
+    with pytest.raises(ToolArgumentError, match="missing required argument 'woreda'.*'household_count'"):
+        spec.validate({"household_count": "many"})
+
+    optional = ToolSpec("opt", _optional_tool)
+    assert optional.params[0].nullable and optional.params[0].json_type == "integer"
+
+
+def test_gemini_gets_declarations_and_invalid_calls_return_errors():
+    """Test Gemini receives precompiled declarations with AFC off, and bad arguments never reach the tool"""
+    RECEIVED.clear()
+    agent = Agent(name="typed_agent", model="fake-model", instruction="Test.", tools=[typed_ticket_tool])
+    app = AdkApp(agent=agent, use_intent_router=False)
+    app.openrouter_client = None
+    app.gemini_client = FakeGeminiClient(script=[
+        [("typed_ticket_tool", {"woreda": "Bole", "household_count": "lots"})],
+        [("typed_ticket_tool", {"woreda": "Bole", "household_count": 4.0})],
+        "Done.",
+    ])
+
+    assert app.run("u1", "typed-session", "Report") == "Done."
+
+    config = app.gemini_client.last_config
+    assert config.automatic_function_calling.disable is True
+    assert config.tools[0].function_declarations[0] is TOOL_REGISTRY.spec("typed_ticket_tool").gemini_declaration
+    assert RECEIVED == [("Bole", 4, False, None)]
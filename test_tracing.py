@@ -0,0 +1,105 @@
+"""
+Tests for per-turn tracing spans and latency histograms
+"""
+
+import json
+import asyncio
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer
+from smart_city_agent.tracing import Tracer, LatencyHistogram
+from smart_city_agent.provider_health import ProviderHealthRegistry
+from smart_city_agent.fake_provider import FakeGeminiClient
+
+test_server = MCPServer(name="test_tracing_server")
+
+
+@test_server.tool()
+def trace_lookup_office(woreda_name: str) -> dict:
+    """Test office lookup."""
+    return {"name": f"{woreda_name} Office"}
+
+
+@test_server.tool()
+def trace_create_ticket(woreda_name: str) -> dict:
+    """Test ticket creation."""
+    return {"ticket_number": "TEST-0001"}
+
+
+test_agent = Agent(
+    name="test_agent",
+    model="fake-model",
+    instruction="Test agent.",
+    tools=[trace_lookup_office, trace_create_ticket],
+)
+
+SCRIPT = [
+    [("trace_lookup_office", {"woreda_name": "Bole"}), ("trace_create_ticket", {"woreda_name": "Bole"})],
+    "Ticket TEST-0001 created.",
+]
+
+
+@pytest.fixture
+def traced_app(tmp_path):
+    tracer = Tracer(export_path=str(tmp_path / "traces.jsonl"))
+    app = AdkApp(agent=test_agent, health=ProviderHealthRegistry(), tracer=tracer)
+    app.gemini_client = FakeGeminiClient(SCRIPT)
+    app.openrouter_client = None
+    app.openrouter_async_client = None
+    return app
+
+
+def read_traces(app):
+    with open(app.tracer.export_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_turn_span_has_llm_and_tool_children(traced_app):
+    """Test one exported trace per turn with provider and (parallel) tool child spans"""
+    traced_app.run("user", "trace-sync", "Create a ticket for Bole")
+
+    traces = read_traces(traced_app)
+    assert len(traces) == 1
+    spans = traces[0]["spans"]
+    turn = spans[0]
+    assert turn["kind"] == "turn" and turn["parent_id"] is None
+
+    llm = [s for s in spans if s["kind"] == "llm"]
+    tools = [s for s in spans if s["kind"] == "tool"]
+    assert len(llm) == 2
+    assert llm[0]["attributes"]["model"] == "fake-model"
+    assert llm[0]["attributes"]["output_tokens"] > 0
+    # Tools ran on the thread pool but still belong to the turn
+    assert sorted(s["name"] for s in tools) == ["tool:trace_create_ticket", "tool:trace_lookup_office"]
+    assert all(s["parent_id"] == turn["span_id"] for s in llm + tools)
+
+
+def test_async_turn_is_traced(traced_app):
+    """Test the async path opens the same spans"""
+    asyncio.run(traced_app.run_async("user", "trace-async", "Create a ticket for Bole"))
+
+    spans = read_traces(traced_app)[0]["spans"]
+    assert spans[0]["attributes"]["mode"] == "async"
+    assert {s["kind"] for s in spans} == {"turn", "llm", "tool"}
+
+
+def test_latency_report_has_percentiles(traced_app):
+    """Test per-span histograms expose p50/p95/p99"""
+    for i in range(5):
+        traced_app.run("user", f"trace-report-{i}", "Create a ticket for Bole")
+
+    report = traced_app.trace_report()
+    assert report["turn"]["count"] == 5
+    assert report["tool:trace_create_ticket"]["count"] == 5
+    assert report["llm:gemini:fake-model"]["count"] == 10
+    assert set(report["turn"]) >= {"p50", "p95", "p99"}
+
+
+def test_histogram_percentiles():
+    """Test bucketed percentiles stay within one bucket of the true value"""
+    hist = LatencyHistogram()
+    for ms in range(1, 101):
+        hist.record(ms / 1000)
+
+    assert hist.percentile(0.50) == pytest.approx(0.050, rel=0.1)
+    assert hist.percentile(0.99) == pytest.approx(0.099, rel=0.1)
+    assert hist.percentile(1.0) == pytest.approx(0.100)
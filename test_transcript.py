@@ -0,0 +1,101 @@
+"""
+Tests for the compact, provider-neutral session transcript
+"""
+
+import json
+import pytest
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, Session, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient
+from smart_city_agent.history_manager import HistoryManager
+from smart_city_agent.session_store import encode_session, decode_session
+from smart_city_agent.transcript import Transcript, Turn, ToolExchange
+
+test_server = MCPServer(name="test_transcript_server")
+
+
+@test_server.tool()
+def transcript_office_lookup(woreda_name: str) -> dict:
+    """Office lookup."""
+    return {"name": f"{woreda_name} Office", "phone": "+251-11-000-0000"}
+
+
+transcript_agent = Agent(name="transcript_agent", model="fake-model", instruction="Test agent.",
+                         tools=[transcript_office_lookup])
+
+
+def test_records_are_compact_and_views_are_cached_per_turn():
+    """Test turns use __slots__, adapters are built once per turn and survive later turns (only the UI list is rebuilt)"""
+    transcript = Transcript()
+    transcript.record("No power in Bole", "Ticket POWR-1A2B3C4D created.")
+    assert not hasattr(transcript.turns[0], "__dict__")
+
+    first = transcript.gemini_turn(0)
+    assert transcript.gemini_turn(0) is first
+    assert [c.role for c in first] == ["user", "model"]
+    assert transcript.openai_turn(0) == (
+        {"role": "user", "content": "No power in Bole"},
+        {"role": "assistant", "content": "Ticket POWR-1A2B3C4D created."},
+    )
+
+    ui = transcript.ui_messages()
+    transcript.record("Thanks", "You're welcome.")
+    assert transcript.gemini_turn(0) is first
+    assert transcript.ui_messages() is not ui and len(transcript.ui_messages()) == 4
+    assert len(transcript) == 4 and transcript[-1].parts[0].text == "You're welcome."
+    with pytest.raises(IndexError):
+        transcript[4]
+
+
+def test_tool_turns_feed_both_providers_and_the_ui():
+    """Test tool exchanges land in the transcript and both providers replay the same window"""
+    app = AdkApp(agent=transcript_agent, use_intent_router=False)
+    app.openrouter_client = None
+    app.gemini_client = FakeGeminiClient(script=[
+        [("transcript_office_lookup", {"woreda_name": "Bole"})],
+        "The Bole Office can help.",
+    ])
+    app.run("u1", "transcript-tools", "Who handles Bole?")
+
+    session = get_session("transcript-tools")
+    turn = session.history.turns[0]
+    assert (turn.prompt, turn.reply) == ("Who handles Bole?", "The Bole Office can help.")
+    assert [(t.name, t.args, t.outcome["result"]["name"]) for t in turn.tools] == [
+        ("transcript_office_lookup", {"woreda_name": "Bole"}, "Bole Office"),
+    ]
+    assert app.chat_messages("transcript-tools") == [
+        {"role": "user", "content": "Who handles Bole?"},
+        {"role": "assistant", "content": "The Bole Office can help.", "tools": ["transcript_office_lookup"]},
+    ]
+
+    manager = HistoryManager()
+    gemini = manager.build(session)
+    messages = manager.build_messages(session)
+    assert [c.role for c in gemini] == ["user", "model", "user", "model"]
+    call, response = gemini[1].parts[0].function_call, gemini[2].parts[0].function_response
+    assert (call.name, call.args) == ("transcript_office_lookup", {"woreda_name": "Bole"})
+    assert response.response["result"]["name"] == "Bole Office"
+    assert gemini[-1].parts[0].text == "The Bole Office can help."
+
+    assert [m["role"] for m in messages] == ["user", "assistant", "tool", "assistant"]
+    tool_call = messages[1]["tool_calls"][0]
+    assert tool_call["function"]["name"] == "transcript_office_lookup"
+    assert messages[2]["tool_call_id"] == tool_call["id"]
+    assert json.loads(messages[2]["content"])["name"] == "Bole Office"
+    assert app._openai_messages(session, "Test agent.", "Next")[1:-1] == messages
+
+    # The legacy sequence view stays text-only, one (user, model) pair per turn
+    assert [c.parts[0].text for c in session.history] == ["Who handles Bole?", "The Bole Office can help."]
+
+
+def test_transcript_round_trips_through_the_session_store():
+    """Test persisted sessions keep tool exchanges and non-JSON results are stringified"""
+    session = Session("transcript-store")
+    session.history.record("Report", "Done.", [
+        ToolExchange("create_power_ticket", {"woreda": "Bole"}, {"result": {"created_at": Turn}}),
+    ])
+    restored = decode_session(encode_session(session), Session)
+
+    assert restored.history == Transcript([Turn("Report", "Done.", [
+        ToolExchange("create_power_ticket", {"woreda": "Bole"}, {"result": {"created_at": str(Turn)}}),
+    ])])
+    assert restored.history.nbytes() > 0
@@ -0,0 +1,113 @@
+"""
+Tests for per-session turn serialization (per-session turn locks)
+"""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from smart_city_agent.local_runner import AdkApp, Agent, MCPServer, get_session
+from smart_city_agent.fake_provider import FakeGeminiClient
+from smart_city_agent.idempotency import current_turn_scope
+from smart_city_agent.turn_locks import TurnLocks
+
+test_server = MCPServer(name="test_turn_locks_server")
+ACTIVE = {}
+PEAK = {"session": 0, "global": 0}
+PEAK_LOCK = threading.Lock()
+
+
+@test_server.tool()
+def turn_probe() -> dict:
+    """Track how many turns of each session run at once."""
+    session_id = current_turn_scope().rsplit(":", 1)[0]
+    with PEAK_LOCK:
+        ACTIVE[session_id] = ACTIVE.get(session_id, 0) + 1
+        PEAK["session"] = max(PEAK["session"], ACTIVE[session_id])
+        PEAK["global"] = max(PEAK["global"], sum(ACTIVE.values()))
+    time.sleep(0.01)
+    with PEAK_LOCK:
+        ACTIVE[session_id] -= 1
+    return {"ok": True}
+
+
+lock_agent = Agent(name="lock_agent", model="fake-model", instruction="Test agent.", tools=[turn_probe])
+SCRIPT = [[("turn_probe", {})], "Done."]
+
+
+def _app():
+    app = AdkApp(agent=lock_agent, use_intent_router=False, turn_locks=TurnLocks())
+    app.openrouter_client = None
+    app.gemini_client = FakeGeminiClient(script=SCRIPT, latency=0.002)
+    return app
+
+
+def test_concurrent_turns_are_serialized_per_session_only():
+    """Stress: 8 sessions x 12 racing turns never overlap within a session but do across sessions"""
+    PEAK.update(session=0, **{"global": 0})
+    app = _app()
+    jobs = [(f"stress-{i % 8}", f"Message {i}") for i in range(96)]
+    with ThreadPoolExecutor(max_workers=24) as pool:
+        replies = list(pool.map(lambda job: app.run("citizen", *job), jobs))
+
+    assert replies == ["Done."] * 96
+    assert PEAK["session"] == 1
+    assert PEAK["global"] > 1
+    for i in range(8):
+        turns = get_session(f"stress-{i}").history.turns
+        assert len(turns) == 12
+        assert all(len(t.tools) == 1 for t in turns)
+
+    metrics = app.lock_report()
+    assert metrics["acquisitions"] == 96
+    assert metrics["contended"] > 0 and metrics["wait_max"] > 0
+
+
+def test_async_turns_wait_without_blocking_the_event_loop():
+    """Test same-session async turns queue up while other sessions keep running"""
+    PEAK.update(session=0, **{"global": 0})
+    app = _app()
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        clock = asyncio.create_task(ticker())
+        replies = await asyncio.gather(*(
+            app.run_async("citizen", f"async-lock-{i % 2}", f"Message {i}") for i in range(8)
+        ))
+        clock.cancel()
+        return replies, ticks
+
+    replies, ticks = asyncio.run(main())
+    assert replies == ["Done."] * 8
+    assert PEAK["session"] == 1
+    assert ticks > 5
+    assert len(get_session("async-lock-0").history.turns) == 4
+
+
+def test_session_locks_are_independent_and_survive_cancellation():
+    """Test distinct sessions never wait on each other and a cancelled waiter leaks no lock"""
+    locks = TurnLocks()
+
+    async def main():
+        async with locks.hold_async("a"):
+            async with locks.hold_async("b") as waited:
+                assert waited == 0.0
+            queued = asyncio.create_task(locks.hold_async("a").__aenter__())
+            await asyncio.sleep(0)
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+        assert not locks.active("a") and not locks.active("b")
+        async with locks.hold_async("a") as waited:
+            assert waited == 0.0
+
+    asyncio.run(main())
+    metrics = locks.metrics()
+    assert metrics["active_sessions"] == 0
+    assert metrics["contended"] == 1